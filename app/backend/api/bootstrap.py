@@ -0,0 +1,64 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from backend.database.database import get_db, begin_snapshot
+from backend.api.schemas import BootstrapResponse
+from backend.api.tasks import task_crud
+from backend.api.categories import category_manager
+from backend.api.tags import tag_manager
+from backend.api.reminders import reminder_manager
+from backend.api.progress import progress_manager
+from backend.core.module_manager import module_manager
+from backend.core.query_audit import query_budget
+from backend.core.response_cache import cache_response
+
+router = APIRouter(prefix="/bootstrap", tags=["bootstrap"])
+
+
+def setup_modules(db: Session):
+    """各モジュールにDBセッションを設定"""
+    task_crud.set_db(db)
+    category_manager.set_db(db)
+    tag_manager.set_db(db)
+    reminder_manager.set_db(db)
+    progress_manager.set_db(db)
+
+
+@router.get("", response_model=BootstrapResponse)
+@query_budget(6)
+@cache_response(
+    "tasks", "tag_links", "category_links", "categories", "tags", "reminders", time_dependent=True
+)
+def get_bootstrap(
+    status: str = None,
+    root_only: bool = False,
+    limit: int = Query(100, ge=1, le=1000),
+    reminder_limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """初期表示用にタスクの最初のページ・カテゴリ・タグ・未通知のリマインダー・進捗統計をまとめて取得
+
+    タスク・リマインダー・統計は1つの読み取りトランザクションで読むので、互いに食い違わない。
+    1つの接続では文を同時に実行できないため、クエリは順に実行する
+    （カテゴリとタグは参照データのキャッシュにあればデータベースを読まない）。
+    """
+    setup_modules(db)
+    begin_snapshot(db)
+
+    params = {}
+    if status:
+        params["status"] = status
+    if root_only:
+        params["root_only"] = root_only
+
+    # 1件多く読んで次のページの有無を判定
+    tasks = module_manager.call_module("task_crud", "read_all", {**params, "limit": limit + 1, "offset": 0})
+    reminders = module_manager.call_module("reminder_manager", "get_pending", {"limit": reminder_limit + 1})
+    return {
+        "tasks": tasks[:limit],
+        "has_more": len(tasks) > limit,
+        "categories": module_manager.call_module("category_manager", "read_all", {}),
+        "tags": module_manager.call_module("tag_manager", "read_all", {}),
+        "pending_reminders": reminders[:reminder_limit],
+        "pending_reminders_has_more": len(reminders) > reminder_limit,
+        "stats": module_manager.call_module("progress_manager", "calculate_overall_progress", {}),
+    }
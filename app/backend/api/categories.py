@@ -1,12 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Any, Dict, List
 from backend.database.database import get_db
 from backend.api.schemas import (
     CategoryCreate, CategoryUpdate, CategoryResponse,
-    TaskResponse, MessageResponse
+    TaskResponse, MessageResponse,
+    CategoryBulkAssign, BulkAssignResponse
 )
 from backend.core.module_manager import module_manager
+from backend.core.query_audit import query_budget
+from backend.core.response_cache import cache_response
 from backend.modules import CategoryManagerModule
 
 router = APIRouter(prefix="/categories", tags=["categories"])
@@ -38,14 +41,48 @@ def create_category(category: CategoryCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/", response_model=List[CategoryResponse])
-def get_all_categories(db: Session = Depends(get_db)):
-    """すべてのカテゴリを取得"""
+@query_budget(2)
+def get_all_categories(request: Request, response: Response, db: Session = Depends(get_db)):
+    """すべてのカテゴリを取得（If-None-Matchが一致すれば304を返す）"""
     setup_modules(db)
 
+    etag = module_manager.call_module("category_manager", "get_etag", {})
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
     categories = module_manager.call_module("category_manager", "read_all", {})
     return categories
 
 
+@router.get("/cache/stats", response_model=Dict[str, Any])
+def get_categories_cache_stats(db: Session = Depends(get_db)):
+    """カテゴリキャッシュのヒット率などを取得"""
+    setup_modules(db)
+
+    return module_manager.call_module("category_manager", "cache_stats", {})
+
+
+@router.post("/bulk/assign", response_model=BulkAssignResponse)
+def bulk_assign_category_to_tasks(bulk: CategoryBulkAssign, db: Session = Depends(get_db)):
+    """複数のカテゴリを複数のタスクに一括で割り当て"""
+    setup_modules(db)
+
+    affected = module_manager.call_module("category_manager", "bulk_assign", bulk.model_dump())
+    return BulkAssignResponse(affected=affected)
+
+
+@router.post("/bulk/unassign", response_model=BulkAssignResponse)
+def bulk_unassign_category_from_tasks(bulk: CategoryBulkAssign, db: Session = Depends(get_db)):
+    """複数のカテゴリを複数のタスクから一括で解除"""
+    setup_modules(db)
+
+    affected = module_manager.call_module("category_manager", "bulk_unassign", bulk.model_dump())
+    return BulkAssignResponse(affected=affected)
+
+
 @router.get("/{category_id}", response_model=CategoryResponse)
 def get_category(category_id: int, db: Session = Depends(get_db)):
     """特定のカテゴリを取得"""
@@ -137,6 +174,8 @@ def unassign_category_from_task(
 
 
 @router.get("/{category_id}/tasks", response_model=List[TaskResponse])
+@query_budget(3)
+@cache_response("tasks", "category_links")
 def get_tasks_by_category(category_id: int, db: Session = Depends(get_db)):
     """カテゴリに属するタスクを取得"""
     setup_modules(db)
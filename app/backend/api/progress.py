@@ -1,24 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import datetime
 from backend.database.database import get_db
 from backend.api.schemas import (
-    ProgressUpdate, ProgressResponse, ProgressStatsResponse,
-    TaskResponse
+    ProgressUpdate, ProgressResponse, ProgressStatsResponse, ProgressBreakdownEntry,
+    TaskResponse, BurndownPoint
 )
 from backend.core.module_manager import module_manager
-from backend.modules import ProgressManagerModule
+from backend.core.query_audit import query_budget
+from backend.core.response_cache import cache_response
+from backend.modules import ProgressManagerModule, ProgressHistoryModule
 
 router = APIRouter(prefix="/progress", tags=["progress"])
 
 # モジュールの初期化
 progress_manager = ProgressManagerModule()
+progress_history = ProgressHistoryModule()
 module_manager.register_module(progress_manager)
+module_manager.register_module(progress_history)
 
 
 def setup_modules(db: Session):
     """各モジュールにDBセッションを設定"""
     progress_manager.set_db(db)
+    progress_history.set_db(db)
 
 
 @router.put("/tasks/{task_id}", response_model=TaskResponse)
@@ -80,23 +86,50 @@ def increment_task_progress(
 
 
 @router.get("/tasks/range/list", response_model=List[TaskResponse])
+@query_budget(2)
+@cache_response("tasks")
 def get_tasks_by_progress_range(
-    min_progress: int = 0,
-    max_progress: int = 100,
+    response: Response,
+    min_progress: int = Query(0, ge=0, le=100),
+    max_progress: int = Query(100, ge=0, le=100),
+    status: Optional[str] = None,
+    priority: Optional[int] = Query(None, ge=1, le=5),
+    order_by: str = "progress",
+    direction: str = Query("asc", pattern="^(asc|desc)$"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """進捗範囲でタスクを取得"""
+    """進捗範囲でタスクを取得
+
+    order_by: progress, updated_at。続きのページがあればX-Next-Cursorヘッダーの値をcursorに指定する。
+    """
     setup_modules(db)
 
-    tasks = module_manager.call_module(
-        "progress_manager",
-        "get_tasks_by_progress",
-        {"min_progress": min_progress, "max_progress": max_progress}
-    )
-    return tasks
+    params = {
+        "min_progress": min_progress,
+        "max_progress": max_progress,
+        "status": status,
+        "priority": priority,
+        "order_by": order_by,
+        "direction": direction,
+        "limit": limit,
+        "cursor": cursor,
+    }
+
+    try:
+        page = module_manager.call_module("progress_manager", "get_tasks_by_progress", params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if page["next_cursor"]:
+        response.headers["X-Next-Cursor"] = page["next_cursor"]
+    return page["tasks"]
 
 
 @router.get("/stats", response_model=ProgressStatsResponse)
+@query_budget(2)
+@cache_response("tasks")
 def get_overall_progress_stats(
     status: str = None,
     db: Session = Depends(get_db)
@@ -114,3 +147,50 @@ def get_overall_progress_stats(
         params
     )
     return stats
+
+
+@router.get("/stats/breakdown", response_model=List[ProgressBreakdownEntry])
+@query_budget(2)
+@cache_response("tasks", "tag_links", "category_links")
+def get_progress_breakdown(
+    group_by: str,
+    status: str = None,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """カテゴリ・タグ・親タスクごとの進捗統計を取得（group_by: category, tag, parent）"""
+    setup_modules(db)
+
+    params = {"group_by": group_by, "limit": limit, "offset": offset}
+    if status:
+        params["status"] = status
+
+    try:
+        return module_manager.call_module("progress_manager", "get_breakdown", params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/burndown", response_model=List[BurndownPoint])
+@cache_response(time_dependent=True)
+def get_burndown(
+    root: Optional[int] = None,
+    category: Optional[int] = None,
+    from_: Optional[datetime] = Query(None, alias="from"),
+    to: Optional[datetime] = None,
+    interval: str = "day",
+    db: Session = Depends(get_db)
+):
+    """プロジェクト（最上位タスク）・カテゴリ・全体の残作業と完了量を区間ごとに取得
+
+    interval: day, week, month（既定は直近30日を日ごと）
+    """
+    setup_modules(db)
+
+    params = {"root": root, "category": category, "from": from_, "to": to, "interval": interval}
+
+    try:
+        return module_manager.call_module("progress_history", "burndown", params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,19 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import datetime
 from backend.database.database import get_db
 from backend.api.schemas import (
     ReminderCreate, ReminderUpdate, ReminderResponse,
-    MessageResponse
+    MessageResponse, ReminderDispatcherStatus,
+    ReminderClaimRequest, ClaimedReminder, ReminderAckRequest, ReminderOccurrence
 )
 from backend.core.module_manager import module_manager
-from backend.modules import ReminderManagerModule
+from backend.core.query_audit import query_budget
+from backend.core.response_cache import cache_response
+from backend.modules import ReminderManagerModule, ReminderDispatcherModule
 
 router = APIRouter(prefix="/reminders", tags=["reminders"])
 
 # モジュールの初期化
 reminder_manager = ReminderManagerModule()
+reminder_dispatcher = ReminderDispatcherModule()
 module_manager.register_module(reminder_manager)
+module_manager.register_module(reminder_dispatcher)
 
 
 def setup_modules(db: Session):
@@ -38,6 +44,8 @@ def create_reminder(reminder: ReminderCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/", response_model=List[ReminderResponse])
+@query_budget(2)
+@cache_response("reminders")
 def get_all_reminders(db: Session = Depends(get_db)):
     """すべてのリマインダーを取得"""
     setup_modules(db)
@@ -47,6 +55,8 @@ def get_all_reminders(db: Session = Depends(get_db)):
 
 
 @router.get("/pending", response_model=List[ReminderResponse])
+@query_budget(2)
+@cache_response("reminders", time_dependent=True)
 def get_pending_reminders(db: Session = Depends(get_db)):
     """未通知のリマインダーを取得"""
     setup_modules(db)
@@ -55,6 +65,58 @@ def get_pending_reminders(db: Session = Depends(get_db)):
     return reminders
 
 
+@router.get("/calendar", response_model=List[ReminderOccurrence])
+@query_budget(2)
+@cache_response("reminders", time_dependent=True)
+def get_reminder_calendar(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    task_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """期間内の未通知リマインダーを取得（繰り返しは期間内の回を展開、既定は今から7日間）"""
+    setup_modules(db)
+
+    try:
+        return module_manager.call_module(
+            "reminder_manager", "get_occurrences", {"start": start, "end": end, "task_id": task_id}
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/claim", response_model=List[ClaimedReminder])
+def claim_reminders(request: ReminderClaimRequest, db: Session = Depends(get_db)):
+    """期限の来たリマインダーをリース付きで取得（複数ワーカーで重複しない）"""
+    setup_modules(db)
+
+    return module_manager.call_module("reminder_manager", "claim_due", request.model_dump())
+
+
+@router.post("/ack", response_model=MessageResponse)
+def ack_reminders(request: ReminderAckRequest, db: Session = Depends(get_db)):
+    """配信済みのリマインダーを通知済みにする"""
+    setup_modules(db)
+
+    acked = module_manager.call_module("reminder_manager", "ack", request.model_dump())
+    return MessageResponse(message=f"{acked} reminders acknowledged")
+
+
+@router.post("/release", response_model=MessageResponse)
+def release_reminders(request: ReminderAckRequest, db: Session = Depends(get_db)):
+    """取得したリマインダーのリースを解放（配信に失敗した場合）"""
+    setup_modules(db)
+
+    released = module_manager.call_module("reminder_manager", "release", request.model_dump())
+    return MessageResponse(message=f"{released} reminders released")
+
+
+@router.get("/dispatcher/status", response_model=ReminderDispatcherStatus)
+def get_dispatcher_status():
+    """リマインダー配信ループの状況を取得"""
+    return module_manager.call_module("reminder_dispatcher", "status", {})
+
+
 @router.get("/{reminder_id}", response_model=ReminderResponse)
 def get_reminder(reminder_id: int, db: Session = Depends(get_db)):
     """特定のリマインダーを取得"""
@@ -82,11 +144,14 @@ def update_reminder(
     params = {"reminder_id": reminder_id}
     params.update(reminder_update.model_dump(exclude_unset=True))
 
-    updated_reminder = module_manager.call_module(
-        "reminder_manager",
-        "update",
-        params
-    )
+    try:
+        updated_reminder = module_manager.call_module(
+            "reminder_manager",
+            "update",
+            params
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not updated_reminder:
         raise HTTPException(status_code=404, detail="Reminder not found")
     return updated_reminder
@@ -123,6 +188,8 @@ def mark_reminder_as_notified(reminder_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/task/{task_id}", response_model=List[ReminderResponse])
+@query_budget(2)
+@cache_response("reminders")
 def get_reminders_by_task(task_id: int, db: Session = Depends(get_db)):
     """特定タスクのリマインダーを取得"""
     setup_modules(db)
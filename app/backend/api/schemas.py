@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Any, Dict, Optional, List, Union
 from datetime import datetime
 
 
@@ -13,6 +13,7 @@ class TaskBase(BaseModel):
     status: str = Field(default="pending")
     progress: int = Field(default=0, ge=0, le=100)
     parent_task_id: Optional[int] = None
+    recurrence: Optional[str] = Field(None, max_length=255)  # 例: "FREQ=WEEKLY;BYDAY=MO,WE"
 
 
 class TaskCreate(TaskBase):
@@ -29,6 +30,7 @@ class TaskUpdate(BaseModel):
     status: Optional[str] = None
     progress: Optional[int] = Field(None, ge=0, le=100)
     parent_task_id: Optional[int] = None
+    recurrence: Optional[str] = Field(None, max_length=255)
 
 
 class TaskResponse(TaskBase):
@@ -41,6 +43,49 @@ class TaskResponse(TaskBase):
         from_attributes = True
 
 
+class TaskFacets(BaseModel):
+    """タスク一覧のファセット件数"""
+    status: Dict[str, int]
+    priority: Dict[int, int]
+    tags: Dict[int, int]
+    categories: Dict[int, int]
+
+
+class TaskListResponse(BaseModel):
+    """ファセット付きタスク一覧レスポンス用スキーマ"""
+    tasks: List[TaskResponse]
+    facets: TaskFacets
+
+
+class TaskOccurrence(BaseModel):
+    """期間内の期限（繰り返しタスクは展開した回ごと）"""
+    task: TaskResponse
+    due_date: datetime
+    is_virtual: bool  # 未実体化の回ならTrue
+
+
+class NextTaskResponse(BaseModel):
+    """「次にやるタスク」レスポンス用スキーマ"""
+    task: TaskResponse
+    score: float
+
+
+class TaskQueryRequest(BaseModel):
+    """タグ・カテゴリの論理式検索用スキーマ
+
+    filterの例: {"and": [{"tag": 1}, {"tag": 2}, {"not": {"tag": 3}}, {"category": 5}]}
+    """
+    filter: Dict[str, Any]
+    limit: int = Field(default=100, ge=1, le=1000)
+    offset: int = Field(default=0, ge=0)
+
+
+class TaskQueryResponse(BaseModel):
+    """論理式検索レスポンス用スキーマ"""
+    total: int
+    tasks: List[TaskResponse]
+
+
 # 優先度関連スキーマ
 class PriorityUpdate(BaseModel):
     """優先度更新用スキーマ"""
@@ -53,6 +98,31 @@ class PriorityResponse(BaseModel):
     label: str
 
 
+class PriorityHistogramEntry(BaseModel):
+    """優先度分布の1行"""
+    priority: Optional[int]
+    label: Optional[str]
+    group: Optional[Union[int, str]] = None
+    count: int
+
+
+class PriorityBulkUpdate(BaseModel):
+    """優先度一括更新用スキーマ（指定した条件すべてに一致するタスクが対象）"""
+    priority: int = Field(..., ge=1, le=5)
+    status: Optional[str] = None
+    current_priority: Optional[int] = Field(None, ge=1, le=5)
+    category_id: Optional[int] = None
+    tag_id: Optional[int] = None
+    task_ids: Optional[List[int]] = None
+    root_only: bool = False
+
+
+class PriorityBulkResponse(BaseModel):
+    """優先度一括更新レスポンス用スキーマ"""
+    updated: int
+    priority: int
+
+
 # 期限関連スキーマ
 class DeadlineUpdate(BaseModel):
     """期限更新用スキーマ"""
@@ -105,6 +175,20 @@ class TagResponse(TagBase):
         from_attributes = True
 
 
+class TagSuggestion(BaseModel):
+    """タグ候補レスポンス用スキーマ"""
+    id: int
+    name: str
+    usage_count: int
+
+
+class RelatedTag(BaseModel):
+    """関連タグレスポンス用スキーマ"""
+    id: int
+    name: str
+    count: int
+
+
 class TagUpdate(BaseModel):
     """タグ更新用スキーマ"""
     name: str = Field(..., min_length=1, max_length=50)
@@ -116,11 +200,29 @@ class CategoryUpdate(BaseModel):
     color: Optional[str] = Field(None, pattern=r"^#[0-9A-Fa-f]{6}$")
 
 
+class TagBulkAssign(BaseModel):
+    """タグ一括割り当て・解除用スキーマ（すべての組み合わせが対象）"""
+    tag_ids: List[int] = Field(..., min_length=1, max_length=1000)
+    task_ids: List[int] = Field(..., min_length=1, max_length=1000)
+
+
+class CategoryBulkAssign(BaseModel):
+    """カテゴリ一括割り当て・解除用スキーマ（すべての組み合わせが対象）"""
+    category_ids: List[int] = Field(..., min_length=1, max_length=1000)
+    task_ids: List[int] = Field(..., min_length=1, max_length=1000)
+
+
+class BulkAssignResponse(BaseModel):
+    """一括割り当て・解除レスポンス用スキーマ"""
+    affected: int
+
+
 # リマインダー関連スキーマ
 class ReminderBase(BaseModel):
     """リマインダーの基本情報"""
     task_id: int
     remind_at: datetime
+    recurrence: Optional[str] = Field(None, max_length=255)
 
 
 class ReminderCreate(ReminderBase):
@@ -132,6 +234,7 @@ class ReminderUpdate(BaseModel):
     """リマインダー更新用スキーマ"""
     remind_at: Optional[datetime] = None
     is_notified: Optional[bool] = None
+    recurrence: Optional[str] = Field(None, max_length=255)
 
 
 class ReminderResponse(BaseModel):
@@ -140,11 +243,51 @@ class ReminderResponse(BaseModel):
     task_id: int
     remind_at: datetime
     is_notified: bool
+    recurrence: Optional[str] = None
 
     class Config:
         from_attributes = True
 
 
+class ReminderOccurrence(BaseModel):
+    """期間内のリマインダー（繰り返しは展開した回ごと）"""
+    reminder: ReminderResponse
+    remind_at: datetime
+    is_virtual: bool
+
+
+class ReminderClaimRequest(BaseModel):
+    """リマインダー取得（リース）用スキーマ"""
+    worker_id: str = Field(..., min_length=1, max_length=100)
+    limit: int = Field(100, ge=1, le=1000)
+    lease_seconds: int = Field(60, ge=1, le=3600)
+
+
+class ClaimedReminder(BaseModel):
+    """取得したリマインダー"""
+    id: int
+    task_id: int
+    remind_at: datetime
+    attempt: int
+    idempotency_key: str
+
+
+class ReminderAckRequest(BaseModel):
+    """取得したリマインダーの完了・解放用スキーマ"""
+    worker_id: str = Field(..., min_length=1, max_length=100)
+    reminder_ids: List[int] = Field(..., min_length=1)
+
+
+class ReminderDispatcherStatus(BaseModel):
+    """リマインダー配信状況レスポンス用スキーマ"""
+    worker_id: str
+    running: bool
+    dispatched: int
+    failures: int
+    last_error: Optional[str]
+    next_due_at: Optional[datetime]
+
+
 # 進捗管理関連スキーマ
 class ProgressUpdate(BaseModel):
     """進捗更新用スキーマ"""
@@ -165,6 +308,33 @@ class ProgressStatsResponse(BaseModel):
     pending_tasks: int
 
 
+class BurndownPoint(BaseModel):
+    """バーンダウン・バーンアップの1区間（区間の終わり時点の累積値）"""
+    bucket: datetime
+    task_count: int
+    completed_count: int
+    done: int  # 進捗の合計（バーンアップ）
+    remaining: int  # 1タスクを100とした残作業量（バーンダウン）
+
+
+class ProgressBreakdownEntry(ProgressStatsResponse):
+    """カテゴリ・タグ・親タスクごとの進捗統計"""
+    id: int
+    name: str
+
+
+# 初期表示用スキーマ
+class BootstrapResponse(BaseModel):
+    """初期表示に必要なデータをまとめたレスポンス（1つの読み取りトランザクションで取得）"""
+    tasks: List[TaskResponse]
+    has_more: bool  # タスクの次のページがあればTrue
+    categories: List[CategoryResponse]
+    tags: List[TagResponse]
+    pending_reminders: List[ReminderResponse]  # 古い順に最大reminder_limit件
+    pending_reminders_has_more: bool  # 未通知のリマインダーが他にもあればTrue
+    stats: ProgressStatsResponse
+
+
 # 汎用レスポンス
 class MessageResponse(BaseModel):
     """メッセージレスポンス"""
@@ -1,24 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Any, Dict, List
 from backend.database.database import get_db
 from backend.api.schemas import (
     TagCreate, TagUpdate, TagResponse,
-    TaskResponse, MessageResponse
+    TaskResponse, MessageResponse,
+    TagBulkAssign, BulkAssignResponse, TagSuggestion, RelatedTag
 )
 from backend.core.module_manager import module_manager
-from backend.modules import TagManagerModule
+from backend.core.query_audit import query_budget
+from backend.core.response_cache import cache_response
+from backend.modules import TagManagerModule, TagSuggestModule, TagCooccurrenceModule
 
 router = APIRouter(prefix="/tags", tags=["tags"])
 
 # モジュールの初期化
 tag_manager = TagManagerModule()
+tag_suggest = TagSuggestModule()
+tag_cooccurrence = TagCooccurrenceModule()
 module_manager.register_module(tag_manager)
+module_manager.register_module(tag_suggest)
+module_manager.register_module(tag_cooccurrence)
 
 
 def setup_modules(db: Session):
     """各モジュールにDBセッションを設定"""
     tag_manager.set_db(db)
+    tag_suggest.set_db(db)
+    tag_cooccurrence.set_db(db)
 
 
 @router.post("/", response_model=TagResponse, status_code=201)
@@ -38,14 +47,74 @@ def create_tag(tag: TagCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/", response_model=List[TagResponse])
-def get_all_tags(db: Session = Depends(get_db)):
-    """すべてのタグを取得"""
+@query_budget(2)
+def get_all_tags(request: Request, response: Response, db: Session = Depends(get_db)):
+    """すべてのタグを取得（If-None-Matchが一致すれば304を返す）"""
     setup_modules(db)
 
+    etag = module_manager.call_module("tag_manager", "get_etag", {})
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
     tags = module_manager.call_module("tag_manager", "read_all", {})
     return tags
 
 
+@router.get("/cache/stats", response_model=Dict[str, Any])
+def get_tags_cache_stats(db: Session = Depends(get_db)):
+    """タグキャッシュのヒット率などを取得"""
+    setup_modules(db)
+
+    return module_manager.call_module("tag_manager", "cache_stats", {})
+
+
+@router.post("/bulk/assign", response_model=BulkAssignResponse)
+def bulk_assign_tag_to_tasks(bulk: TagBulkAssign, db: Session = Depends(get_db)):
+    """複数のタグを複数のタスクに一括で割り当て"""
+    setup_modules(db)
+
+    affected = module_manager.call_module("tag_manager", "bulk_assign", bulk.model_dump())
+    return BulkAssignResponse(affected=affected)
+
+
+@router.post("/bulk/unassign", response_model=BulkAssignResponse)
+def bulk_unassign_tag_from_tasks(bulk: TagBulkAssign, db: Session = Depends(get_db)):
+    """複数のタグを複数のタスクから一括で解除"""
+    setup_modules(db)
+
+    affected = module_manager.call_module("tag_manager", "bulk_unassign", bulk.model_dump())
+    return BulkAssignResponse(affected=affected)
+
+
+@router.get("/suggest", response_model=List[TagSuggestion])
+@query_budget(3)
+@cache_response("tags", "tag_links")
+def suggest_tags(
+    prefix: str = "",
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """前方一致するタグ名を使用回数の多い順に取得"""
+    setup_modules(db)
+
+    return module_manager.call_module(
+        "tag_suggest",
+        "suggest",
+        {"prefix": prefix, "limit": limit}
+    )
+
+
+@router.post("/related/rebuild", response_model=Dict[str, int])
+def rebuild_related_tags(db: Session = Depends(get_db)):
+    """タグ共起行列をDBから再構築"""
+    setup_modules(db)
+
+    return module_manager.call_module("tag_cooccurrence", "rebuild", {})
+
+
 @router.get("/{tag_id}", response_model=TagResponse)
 def get_tag(tag_id: int, db: Session = Depends(get_db)):
     """特定のタグを取得"""
@@ -137,6 +206,8 @@ def unassign_tag_from_task(
 
 
 @router.get("/{tag_id}/tasks", response_model=List[TaskResponse])
+@query_budget(3)
+@cache_response("tasks", "tag_links")
 def get_tasks_by_tag(tag_id: int, db: Session = Depends(get_db)):
     """タグに属するタスクを取得"""
     setup_modules(db)
@@ -147,3 +218,21 @@ def get_tasks_by_tag(tag_id: int, db: Session = Depends(get_db)):
         {"tag_id": tag_id}
     )
     return tasks
+
+
+@router.get("/{tag_id}/related", response_model=List[RelatedTag])
+@query_budget(3)
+@cache_response("tags", "tag_links")
+def get_related_tags(
+    tag_id: int,
+    k: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """一緒に使われることの多いタグを取得"""
+    setup_modules(db)
+
+    return module_manager.call_module(
+        "tag_cooccurrence",
+        "get_related",
+        {"tag_id": tag_id, "k": k}
+    )
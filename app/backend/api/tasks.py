@@ -1,14 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Union
+from datetime import datetime
 from backend.database.database import get_db
 from backend.api.schemas import (
-    TaskCreate, TaskUpdate, TaskResponse, MessageResponse,
+    TaskCreate, TaskUpdate, TaskResponse, MessageResponse, NextTaskResponse,
+    TaskQueryRequest, TaskQueryResponse, TaskListResponse, TaskOccurrence,
     PriorityUpdate, PriorityResponse,
+    PriorityHistogramEntry, PriorityBulkUpdate, PriorityBulkResponse,
     DeadlineUpdate, DeadlineResponse
 )
 from backend.core.module_manager import module_manager
-from backend.modules import TaskCRUDModule, PriorityManagerModule, DeadlineManagerModule
+from backend.core.query_audit import query_budget
+from backend.core.response_cache import cache_response
+from backend.modules import (
+    TaskCRUDModule, PriorityManagerModule, DeadlineManagerModule, TaskRankerModule,
+    TaskIndexModule
+)
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
@@ -16,10 +24,14 @@ router = APIRouter(prefix="/tasks", tags=["tasks"])
 task_crud = TaskCRUDModule()
 priority_manager = PriorityManagerModule()
 deadline_manager = DeadlineManagerModule()
+task_ranker = TaskRankerModule()
+task_index = TaskIndexModule()
 
 module_manager.register_module(task_crud)
 module_manager.register_module(priority_manager)
 module_manager.register_module(deadline_manager)
+module_manager.register_module(task_ranker)
+module_manager.register_module(task_index)
 
 
 def setup_modules(db: Session):
@@ -27,6 +39,8 @@ def setup_modules(db: Session):
     task_crud.set_db(db)
     priority_manager.set_db(db)
     deadline_manager.set_db(db)
+    task_ranker.set_db(db)
+    task_index.set_db(db)
 
 
 @router.post("/", response_model=TaskResponse, status_code=201)
@@ -45,14 +59,19 @@ def create_task(task: TaskCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.get("/", response_model=List[TaskResponse])
+@router.get("/", response_model=Union[List[TaskResponse], TaskListResponse])
+@query_budget(5)
+@cache_response("tasks", "tag_links", "category_links")
 def get_all_tasks(
     status: str = None,
     priority: int = None,
     root_only: bool = False,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    facets: bool = False,
     db: Session = Depends(get_db)
 ):
-    """すべてのタスクを取得（フィルタリング可能）"""
+    """すべてのタスクを取得（フィルタリング可能、facets=trueでファセット件数も返す）"""
     setup_modules(db)
     
     params = {}
@@ -63,8 +82,76 @@ def get_all_tasks(
     if root_only:
         params["root_only"] = root_only
     
-    tasks = module_manager.call_module("task_crud", "read_all", params)
-    return tasks
+    tasks = module_manager.call_module(
+        "task_crud", "read_all", {**params, "limit": limit, "offset": offset}
+    )
+    if not facets:
+        return tasks
+    
+    facet_counts = module_manager.call_module("task_crud", "get_facets", params)
+    return TaskListResponse(tasks=tasks, facets=facet_counts)
+
+
+@router.get("/next", response_model=List[NextTaskResponse])
+@query_budget(3)
+@cache_response("tasks", time_dependent=True)
+def get_next_tasks(
+    k: int = Query(20, ge=1, le=200),
+    w_priority: Optional[float] = None,
+    w_due: Optional[float] = None,
+    w_progress: Optional[float] = None,
+    w_age: Optional[float] = None,
+    db: Session = Depends(get_db)
+):
+    """次にやるべきタスクをスコア順に取得"""
+    setup_modules(db)
+    
+    params = {
+        "k": k,
+        "weights": {
+            "priority": w_priority,
+            "due": w_due,
+            "progress": w_progress,
+            "age": w_age,
+        }
+    }
+    
+    try:
+        return module_manager.call_module("task_ranker", "get_next", params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/query", response_model=TaskQueryResponse)
+@query_budget(5)
+def query_tasks(query: TaskQueryRequest, db: Session = Depends(get_db)):
+    """タグ・カテゴリのAND/OR/NOT式に一致するタスクを取得"""
+    setup_modules(db)
+    
+    try:
+        return module_manager.call_module("task_index", "query", query.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/calendar", response_model=List[TaskOccurrence])
+@query_budget(2)
+@cache_response("tasks", time_dependent=True)
+def get_task_calendar(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = Query(1000, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """期間内の期限を取得（繰り返しタスクは期間内の回を展開、既定は今から7日間）"""
+    setup_modules(db)
+    
+    try:
+        return module_manager.call_module(
+            "deadline_manager", "get_occurrences", {"start": start, "end": end, "limit": limit}
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/{task_id}", response_model=TaskResponse)
@@ -86,7 +173,10 @@ def update_task(task_id: int, task_update: TaskUpdate, db: Session = Depends(get
     params = {"task_id": task_id}
     params.update(task_update.model_dump(exclude_unset=True))
     
-    updated_task = module_manager.call_module("task_crud", "update", params)
+    try:
+        updated_task = module_manager.call_module("task_crud", "update", params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not updated_task:
         raise HTTPException(status_code=404, detail="Task not found")
     return updated_task
@@ -120,6 +210,8 @@ def add_subtask(task_id: int, subtask: TaskCreate, db: Session = Depends(get_db)
 
 
 @router.get("/{task_id}/subtasks", response_model=List[TaskResponse])
+@query_budget(2)
+@cache_response("tasks")
 def get_subtasks(task_id: int, db: Session = Depends(get_db)):
     """サブタスクを取得"""
     setup_modules(db)
@@ -159,6 +251,39 @@ def get_priority(task_id: int, db: Session = Depends(get_db)):
     return PriorityResponse(priority=priority, label=label)
 
 
+@router.get("/priority/histogram", response_model=List[PriorityHistogramEntry])
+@query_budget(2)
+@cache_response("tasks", "tag_links", "category_links")
+def get_priority_histogram(group_by: Optional[str] = None, db: Session = Depends(get_db)):
+    """優先度ごとのタスク数を取得（group_by: status, category, tag）"""
+    setup_modules(db)
+    
+    try:
+        return module_manager.call_module(
+            "priority_manager",
+            "get_histogram",
+            {"group_by": group_by}
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/priority/bulk", response_model=PriorityBulkResponse)
+def bulk_set_priority(bulk_update: PriorityBulkUpdate, db: Session = Depends(get_db)):
+    """条件に一致するタスクの優先度を一括変更"""
+    setup_modules(db)
+    
+    try:
+        updated = module_manager.call_module(
+            "priority_manager",
+            "bulk_set_priority",
+            bulk_update.model_dump()
+        )
+        return PriorityBulkResponse(updated=updated, priority=bulk_update.priority)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 # 期限関連エンドポイント
 @router.put("/{task_id}/deadline", response_model=TaskResponse)
 def set_deadline(task_id: int, deadline_data: DeadlineUpdate, db: Session = Depends(get_db)):
@@ -186,6 +311,8 @@ def remove_deadline(task_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/overdue/list", response_model=List[TaskResponse])
+@query_budget(2)
+@cache_response("tasks", time_dependent=True)
 def get_overdue_tasks(db: Session = Depends(get_db)):
     """期限切れのタスクを取得"""
     setup_modules(db)
@@ -195,6 +322,8 @@ def get_overdue_tasks(db: Session = Depends(get_db)):
 
 
 @router.get("/upcoming/list", response_model=List[TaskResponse])
+@query_budget(2)
+@cache_response("tasks", time_dependent=True)
 def get_upcoming_deadlines(days: int = 7, db: Session = Depends(get_db)):
     """近日中の期限があるタスクを取得"""
     setup_modules(db)
@@ -12,10 +12,95 @@ class Settings(BaseSettings):
     
     # データベース設定
     DATABASE_URL: str = "sqlite:///./todoapp.db"
+    SQLITE_JOURNAL_MODE: str = "WAL"  # WALなら読み取りが書き込みのロックを待たない
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000  # ロックが解放されるまで待つ時間（超えると "database is locked"）
+    # 起動時（lifespan）にスキーマの確認と集計カウンタ・進捗履歴の初期化を行うか（Falseでもテーブル・列が揃っているかは確認する）
+    # （本番では python -m backend.serve --check-schema で親プロセスが一度だけ行う）
+    SCHEMA_CHECK_ON_STARTUP: bool = False
     
     # API設定
     API_PREFIX: str = "/api/v1"
     
+    # 「次にやるタスク」スコアの重み設定
+    NEXT_UP_WEIGHT_PRIORITY: float = 0.4
+    NEXT_UP_WEIGHT_DUE: float = 0.35
+    NEXT_UP_WEIGHT_PROGRESS: float = 0.1
+    NEXT_UP_WEIGHT_AGE: float = 0.15
+    NEXT_UP_AGE_HORIZON_DAYS: int = 30  # この日数で経過日数スコアが最大になる
+    NEXT_UP_REFRESH_SECONDS: int = 60  # 候補セットをDBから再構築する間隔
+    
+    # タグ・カテゴリのビットマップインデックスをDBから再構築する間隔（秒）
+    TASK_INDEX_REFRESH_SECONDS: int = 300
+    TASK_QUERY_MAX_DEPTH: int = 32  # 検索式の入れ子の上限（超えると400）
+    
+    # カテゴリ・タグのキャッシュ有効期間（秒、他プロセスでの更新への追従用）
+    REFERENCE_CACHE_TTL_SECONDS: int = 30
+    
+    # タグ名前方一致索引をDBから再構築する間隔（秒）
+    TAG_SUGGEST_REFRESH_SECONDS: int = 300
+    
+    # タグ共起行列のずれ（関連の件数・チェックサムの不一致）を確認する間隔（秒）
+    TAG_COOCCURRENCE_CHECK_SECONDS: int = 60
+    
+    # メモリ上の索引（ビットマップ・タグ前方一致・共起行列・次にやるタスクの候補）が
+    # 他のワーカープロセスでの書き込み（data_versionsの版）を確認する間隔（秒、0なら毎回）
+    INDEX_VERSION_CHECK_SECONDS: float = 1.0
+    
+    # リマインダー配信設定
+    REMINDER_DISPATCHER_ENABLED: bool = False  # アプリ内で配信ループを動かすか
+    REMINDER_SINK: str = "log"  # log, file, webhook
+    REMINDER_SINK_TARGET: str = ""  # fileならパス、webhookならURL
+    REMINDER_BATCH_SIZE: int = 500
+    REMINDER_MAX_SLEEP_SECONDS: float = 60.0
+    REMINDER_RETRY_SECONDS: float = 5.0
+    REMINDER_LEASE_SECONDS: int = 60  # 取得したワーカーが配信を終えるまでの猶予（切れると他のワーカーが再取得）
+    
+    # 繰り返しの展開設定（期間指定の取得で1回に生成する仮想的な回の上限）
+    RECURRENCE_MAX_OCCURRENCES: int = 1000
+    
+    # 進捗履歴・バーンダウン設定
+    PROGRESS_SNAPSHOT_BATCH_SIZE: int = 5000  # 1回に日ごとのバケットへ反映する履歴の件数
+    PROGRESS_SNAPSHOT_GRACE_SECONDS: float = 5.0  # この秒数より新しい履歴は次回に反映
+    PROGRESS_SNAPSHOT_INTERVAL_SECONDS: float = 60.0  # 未反映の履歴をバケットに反映する間隔（0なら起動時の1回だけ）
+    BURNDOWN_MAX_POINTS: int = 400
+    
+    # 書き込みキュー（SQLite向け）: モジュールの書き込みを1本のスレッドに集め、まとめてコミットする
+    WRITE_QUEUE_ENABLED: bool = False
+    WRITE_QUEUE_MAX_BATCH: int = 256  # 1回のコミットにまとめる書き込みの上限
+    
+    # GETのレスポンスキャッシュ: 書き込みのイベントで該当するルートだけ無効化する
+    RESPONSE_CACHE_ENABLED: bool = False
+    RESPONSE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # 保存するレスポンスの合計サイズの上限
+    RESPONSE_CACHE_TTL_SECONDS: float = 60.0  # 他のワーカープロセスでの書き込みへの追従用
+    RESPONSE_CACHE_SHORT_TTL_SECONDS: float = 5.0  # 期限切れの一覧など現在時刻で結果が変わるルート
+    
+    # /metrics（Prometheus形式）でリクエスト・SQL・コネクションプールのメトリクスを出力するか
+    METRICS_ENABLED: bool = True
+    
+    # /ready（ロードバランサー向けの準備状態）: いずれかを超えると503を返す
+    READY_TIMEOUT_SECONDS: float = 1.0  # プールからの接続の取得と確認のクエリの期限
+    READY_MAX_POOL_UTILIZATION: float = 1.0  # 使用中の接続の割合（1.0ならすべて使用中で503）
+    READY_MAX_WRITE_QUEUE_DEPTH: int = 1000  # 書き込みキューで待っている書き込みの数
+    READY_MAX_WAL_BYTES: int = 256 * 1024 * 1024  # チェックポイントで書き戻されていないWALの大きさ
+    
+    # SQLの監査（開発・テスト用）: リクエストごとのSQLを記録し、N+1の疑いと予算超過を検出
+    QUERY_AUDIT_ENABLED: bool = False
+    QUERY_AUDIT_STRICT: bool = False  # 違反したリクエストを500にする（テストで検出する場合）
+    QUERY_AUDIT_REPEAT_THRESHOLD: int = 5  # パラメータだけが異なる同じSQLがこの回数以上ならN+1とみなす
+    QUERY_BUDGET_DEFAULT: Optional[int] = None  # 予算を宣言していないルートの上限（Noneなら無制限）
+    
+    # APIへのリクエストをJSON Linesで記録するファイル（負荷試験での再生用、空なら記録しない）
+    REQUEST_LOG_PATH: str = ""
+    
+    # 本番サーバー設定（python -m backend.serve）
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 0  # ワーカープロセス数（0ならCPU数）
+    SERVER_BACKLOG: int = 2048  # 受け付け待ちの接続数の上限
+    SERVER_KEEP_ALIVE_SECONDS: int = 5  # アイドルなキープアライブ接続を閉じるまでの秒数
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: int = 30  # 終了時に処理中のリクエストを待つ秒数
+    SERVER_LIMIT_CONCURRENCY: Optional[int] = None  # ワーカーごとの同時接続数の上限（超えると503）
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -2,5 +2,6 @@
 
 from backend.core.base_module import BaseModule
 from backend.core.module_manager import ModuleManager, module_manager
+from backend.core.bitmap import Bitmap
 
-__all__ = ["BaseModule", "ModuleManager", "module_manager"]
+__all__ = ["BaseModule", "ModuleManager", "module_manager", "Bitmap"]
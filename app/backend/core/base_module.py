@@ -1,13 +1,32 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from contextvars import ContextVar
+from typing import Any, Dict, FrozenSet, Optional
 
 
 class BaseModule(ABC):
     """すべての機能モジュールの基底クラス"""
     
+    # DBに書き込むアクション（書き込みキューが有効なら専用のスレッドでまとめてコミットする）
+    write_actions: FrozenSet[str] = frozenset()
+    
     def __init__(self, name: str):
         self.name = name
         self._enabled = True
+        self._db: ContextVar = ContextVar(f"{name}_db", default=None)
+    
+    @property
+    def db(self):
+        """現在のリクエストのDBセッション
+        
+        モジュールはプロセスで共有されるので、set_dbで設定したセッションは
+        リクエスト（スレッド・コンテキスト）ごとに保持し、同時に処理中の
+        別のリクエストのセッションを上書きしないようにする。
+        """
+        return self._db.get()
+    
+    @db.setter
+    def db(self, db):
+        self._db.set(db)
     
     @abstractmethod
     def initialize(self) -> bool:
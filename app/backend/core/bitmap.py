@@ -0,0 +1,110 @@
+from typing import Dict, Iterable, Iterator, List
+
+
+class Bitmap:
+    """整数IDの集合を表す圧縮ビットマップ
+
+    IDを上位ビット（チャンク番号）と下位ビットに分け、チャンクごとに
+    Pythonの整数をビット列として保持する。空のチャンクは持たないため、
+    IDがまばらな集合でもメモリを消費しない。
+    """
+
+    CHUNK_BITS = 12
+    CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+    __slots__ = ("_chunks",)
+
+    def __init__(self, ids: Iterable[int] = ()):
+        self._chunks: Dict[int, int] = {}
+        for value in ids:
+            self.add(value)
+
+    @classmethod
+    def _from_chunks(cls, chunks: Dict[int, int]) -> "Bitmap":
+        bitmap = cls()
+        bitmap._chunks = chunks
+        return bitmap
+
+    def add(self, value: int):
+        """IDを追加"""
+        key = value >> self.CHUNK_BITS
+        self._chunks[key] = self._chunks.get(key, 0) | (1 << (value & self.CHUNK_MASK))
+
+    def discard(self, value: int):
+        """IDを削除（存在しなければ何もしない）"""
+        key = value >> self.CHUNK_BITS
+        bits = self._chunks.get(key)
+        if bits is None:
+            return
+        bits &= ~(1 << (value & self.CHUNK_MASK))
+        if bits:
+            self._chunks[key] = bits
+        else:
+            del self._chunks[key]
+
+    def copy(self) -> "Bitmap":
+        """複製を作成"""
+        return self._from_chunks(dict(self._chunks))
+
+    def __contains__(self, value: int) -> bool:
+        bits = self._chunks.get(value >> self.CHUNK_BITS, 0)
+        return bool(bits >> (value & self.CHUNK_MASK) & 1)
+
+    def __and__(self, other: "Bitmap") -> "Bitmap":
+        small, large = sorted((self._chunks, other._chunks), key=len)
+        chunks = {}
+        for key, bits in small.items():
+            both = bits & large.get(key, 0)
+            if both:
+                chunks[key] = both
+        return self._from_chunks(chunks)
+
+    def __or__(self, other: "Bitmap") -> "Bitmap":
+        chunks = dict(self._chunks)
+        for key, bits in other._chunks.items():
+            chunks[key] = chunks.get(key, 0) | bits
+        return self._from_chunks(chunks)
+
+    def __sub__(self, other: "Bitmap") -> "Bitmap":
+        chunks = {}
+        for key, bits in self._chunks.items():
+            rest = bits & ~other._chunks.get(key, 0)
+            if rest:
+                chunks[key] = rest
+        return self._from_chunks(chunks)
+
+    def __len__(self) -> int:
+        return sum(bin(bits).count("1") for bits in self._chunks.values())
+
+    def __bool__(self) -> bool:
+        return bool(self._chunks)
+
+    def __iter__(self) -> Iterator[int]:
+        for key in sorted(self._chunks):
+            yield from self._iter_chunk(key, self._chunks[key])
+
+    def _iter_chunk(self, key: int, bits: int) -> Iterator[int]:
+        base = key << self.CHUNK_BITS
+        while bits:
+            lowest = bits & -bits
+            yield base + lowest.bit_length() - 1
+            bits ^= lowest
+
+    def slice(self, offset: int, limit: int) -> List[int]:
+        """昇順でoffset番目からlimit件のIDを取得"""
+        result: List[int] = []
+        for key in sorted(self._chunks):
+            bits = self._chunks[key]
+            count = bin(bits).count("1")
+            # チャンク単位で読み飛ばす
+            if offset >= count:
+                offset -= count
+                continue
+            for value in self._iter_chunk(key, bits):
+                if offset:
+                    offset -= 1
+                    continue
+                result.append(value)
+                if len(result) >= limit:
+                    return result
+        return result
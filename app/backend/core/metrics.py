@@ -0,0 +1,359 @@
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import event
+
+Labels = Tuple[str, ...]
+
+# 秒単位の所要時間のバケット
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 1リクエストあたりのSQL文の数のバケット
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    """ラベル値のエスケープ"""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """{name="value",...} 形式のラベル"""
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    """数値の出力（整数はそのまま）"""
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric:
+    """メトリクスの基底クラス
+
+    値はスレッドごとの辞書（シャード）に記録し、出力時に合計する。
+    記録側はそのスレッドだけが書き込む辞書を更新するのでロックを取らない
+    （ロックはスレッドが初めて記録するときのシャード登録だけ）。
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[Dict[Labels, Any]] = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> Dict[Labels, Any]:
+        """このスレッドのシャード"""
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = {}
+            with self._shards_lock:
+                self._shards.append(values)
+            return values
+
+    def _snapshots(self) -> List[Dict[Labels, Any]]:
+        """各シャードの写し（辞書のコピーはGILの下で一度に行われる）"""
+        with self._shards_lock:
+            shards = list(self._shards)
+        return [dict(shard) for shard in shards]
+
+    def render(self) -> List[str]:
+        """Prometheusのテキスト形式の行"""
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """単調増加するカウンタ"""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1, labels: Labels = ()):
+        """値を加算"""
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def collect(self) -> Dict[Labels, float]:
+        """ラベルごとの合計"""
+        totals: Dict[Labels, float] = {}
+        for shard in self._snapshots():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self.collect().items())
+        ]
+
+
+class Gauge(Counter):
+    """増減する値（増加と減少を別のスレッドで記録しても合計が正しくなる）"""
+
+    type = "gauge"
+
+    def dec(self, amount: float = 1, labels: Labels = ()):
+        """値を減算"""
+        self.inc(-amount, labels)
+
+
+class GaugeFunction(Metric):
+    """出力時に関数を呼んで値を得るゲージ（コネクションプールの使用数など）"""
+
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, function: Callable[[], Optional[float]]):
+        super().__init__(name, documentation)
+        self.function = function
+
+    def render(self) -> List[str]:
+        value = self.function()
+        return [] if value is None else [f"{self.name} {_format_value(value)}"]
+
+
+class Histogram(Metric):
+    """値の分布（バケットごとの件数・合計・件数）"""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, labels: Labels = ()):
+        """値を記録"""
+        shard = self._shard()
+        # [バケットごとの件数（最後は+Inf）..., 合計]
+        counts = shard.get(labels)
+        if counts is None:
+            counts = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def collect(self) -> Dict[Labels, List[float]]:
+        """ラベルごとのバケット件数と合計"""
+        totals: Dict[Labels, List[float]] = {}
+        for shard in self._snapshots():
+            for labels, counts in shard.items():
+                # 記録中のリストを読むので先に写す
+                counts = list(counts)
+                total = totals.get(labels)
+                if total is None:
+                    totals[labels] = counts
+                else:
+                    for index, count in enumerate(counts):
+                        total[index] += count
+        return totals
+
+    def render(self) -> List[str]:
+        lines = []
+        bounds = self.buckets + (float("inf"),)
+        for labels, counts in sorted(self.collect().items()):
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                bucket_labels = _format_labels(self.labelnames + ("le",), labels + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(counts[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Registry:
+    """メトリクスの登録先（/metricsで出力）"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        """メトリクスを登録（同じ名前なら置き換える）"""
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """すべてのメトリクスをPrometheusのテキスト形式で出力"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUEST_DURATION = registry.register(Histogram(
+    "todoapp_http_request_duration_seconds", "HTTP request latency by route.",
+    ("method", "route", "status")
+))
+HTTP_REQUESTS_IN_FLIGHT = registry.register(Gauge(
+    "todoapp_http_requests_in_flight", "HTTP requests currently being processed."
+))
+DB_STATEMENTS = registry.register(Counter(
+    "todoapp_db_statements_total", "SQL statements executed.", ("operation",)
+))
+DB_STATEMENT_SECONDS = registry.register(Counter(
+    "todoapp_db_statement_seconds_total", "Total time spent executing SQL statements.", ("operation",)
+))
+DB_STATEMENTS_PER_REQUEST = registry.register(Histogram(
+    "todoapp_db_statements_per_request", "SQL statements issued per HTTP request.",
+    ("route",), buckets=COUNT_BUCKETS
+))
+DB_SECONDS_PER_REQUEST = registry.register(Histogram(
+    "todoapp_db_seconds_per_request", "SQL execution time per HTTP request.", ("route",)
+))
+DB_POOL_CHECKOUT_SECONDS = registry.register(Histogram(
+    "todoapp_db_pool_checkout_seconds",
+    "Time spent waiting for a pooled connection (including opening a new one)."
+))
+DB_LOCKED_ERRORS = registry.register(Counter(
+    "todoapp_db_locked_errors_total",
+    "Statements that failed because the database was locked or busy after the driver's busy timeout."
+))
+MODULE_ACTION_DURATION = registry.register(Histogram(
+    "todoapp_module_action_duration_seconds", "Module action latency.", ("module", "action")
+))
+WRITE_QUEUE_WAIT_SECONDS = registry.register(Histogram(
+    "todoapp_write_queue_wait_seconds", "Time a write spent queued before its batch started."
+))
+WRITE_BATCH_SIZE = registry.register(Histogram(
+    "todoapp_write_batch_size", "Writes committed together in one write queue transaction.",
+    buckets=COUNT_BUCKETS
+))
+STARTUP_SECONDS = registry.register(Gauge(
+    "todoapp_startup_seconds", "Time spent importing the app and running its startup, by phase.", ("phase",)
+))
+
+# 計測を登録したエンジン（アプリを作り直しても二重に記録しない）
+_instrumented_engines: "weakref.WeakSet" = weakref.WeakSet()
+
+# 処理中のリクエストのSQL集計 [文の数, 実行時間]（エンドポイントを実行するスレッドにも引き継がれる）
+_request_sql: ContextVar[Optional[List[float]]] = ContextVar("request_sql", default=None)
+
+SQL_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "PRAGMA", "CREATE", "ALTER"}
+
+
+def _operation(statement: str) -> str:
+    """SQL文の種類（ラベルが増えすぎないよう既知のもの以外はother）"""
+    words = statement.lstrip().split(None, 1)
+    operation = words[0].upper() if words else ""
+    return operation.lower() if operation in SQL_OPERATIONS else "other"
+
+
+class MetricsMiddleware:
+    """リクエストのレイテンシ・処理中の件数・SQLの数と時間を記録するASGIミドルウェア"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        sql = [0, 0.0]
+        token = _request_sql.set(sql)
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            _request_sql.reset(token)
+
+            # パスそのものではなくルートのテンプレートで集計する（IDごとに系列が増えないように）
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_DURATION.observe(elapsed, (scope["method"], route, str(status[0])))
+            DB_STATEMENTS_PER_REQUEST.observe(sql[0], (route,))
+            DB_SECONDS_PER_REQUEST.observe(sql[1], (route,))
+
+
+def _time_checkouts(pool):
+    """プールから接続を取り出す時間を記録するようにする"""
+    do_get = getattr(pool, "_do_get", None)
+    if do_get is None or getattr(do_get, "_timed", False):
+        return
+
+    def timed_do_get():
+        start = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - start)
+
+    timed_do_get._timed = True
+    pool._do_get = timed_do_get
+
+
+def instrument_engine(engine):
+    """エンジンのSQL実行・コネクションプールのメトリクスを記録する（同じエンジンには一度だけ）"""
+    if engine in _instrumented_engines:
+        return
+    _instrumented_engines.add(engine)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["metrics_started"].pop()
+        operation = (_operation(statement),)
+        DB_STATEMENTS.inc(1, operation)
+        DB_STATEMENT_SECONDS.inc(elapsed, operation)
+        sql = _request_sql.get()
+        if sql is not None:
+            sql[0] += 1
+            sql[1] += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(context):
+        started = context.connection.info.get("metrics_started") if context.connection is not None else None
+        if started:
+            started.pop()
+        message = str(context.original_exception).lower()
+        if "locked" in message or "busy" in message:
+            DB_LOCKED_ERRORS.inc()
+
+    # dispose()でプールが作り直されたら（serveのワーカーなど）新しいプールにも仕掛ける
+    _time_checkouts(engine.pool)
+    event.listen(engine, "engine_disposed", lambda engine: _time_checkouts(engine.pool))
+
+    def pool_value(name: str) -> Callable[[], Optional[float]]:
+        def read():
+            method = getattr(engine.pool, name, None)
+            # overflow()はプールに空きがある間は負の値になる
+            return max(method(), 0) if callable(method) else None
+        return read
+
+    registry.register(GaugeFunction(
+        "todoapp_db_pool_checked_out", "Connections currently checked out of the pool.", pool_value("checkedout")
+    ))
+    registry.register(GaugeFunction(
+        "todoapp_db_pool_size", "Configured size of the connection pool.", pool_value("size")
+    ))
+    registry.register(GaugeFunction(
+        "todoapp_db_pool_overflow", "Connections opened beyond the pool size.", pool_value("overflow")
+    ))
@@ -1,5 +1,10 @@
-from typing import Dict, Any, Optional
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Iterator, Optional, List, Callable, Set
 from backend.core.base_module import BaseModule
+from backend.core.metrics import MODULE_ACTION_DURATION
 
 
 class ModuleManager:
@@ -7,25 +12,64 @@ class ModuleManager:
     
     def __init__(self):
         self._modules: Dict[str, BaseModule] = {}
+        # 初期化済みのモジュール名（初期化は最初に使われるときに行う）
+        self._initialized: Set[str] = set()
+        self._init_lock = threading.RLock()
+        self._listeners: Dict[str, List[Callable[[Dict[str, Any]], None]]] = {}
+        self._write_queue = None
+        # 書き込みキューで実行中のアクションがコミット後に行う処理（イベントの通知など）
+        self._deferred: ContextVar[Optional[List[Callable[[], None]]]] = ContextVar("deferred", default=None)
     
     def register_module(self, module: BaseModule) -> bool:
-        """モジュールを登録"""
+        """モジュールを登録（初期化は最初にget_module・call_moduleで使われるときに行う）"""
         if module.name in self._modules:
             raise ValueError(f"Module '{module.name}' is already registered")
         
         self._modules[module.name] = module
-        return module.initialize()
+        return True
     
     def unregister_module(self, module_name: str) -> bool:
         """モジュールの登録を解除"""
         if module_name in self._modules:
             del self._modules[module_name]
+            self._initialized.discard(module_name)
             return True
         return False
     
     def get_module(self, module_name: str) -> Optional[BaseModule]:
-        """モジュールを取得"""
-        return self._modules.get(module_name)
+        """モジュールを取得（未初期化なら初期化する）"""
+        module = self._modules.get(module_name)
+        if module is not None and module_name not in self._initialized:
+            self._initialize(module)
+        return module
+    
+    def get_modules(self) -> List[BaseModule]:
+        """登録されているすべてのモジュールを取得（初期化はしない）"""
+        return list(self._modules.values())
+    
+    def initialize_modules(self):
+        """登録されているすべてのモジュールを初期化（起動時に済ませておく場合）"""
+        for module in self.get_modules():
+            if module.name not in self._initialized:
+                self._initialize(module)
+    
+    def _initialize(self, module: BaseModule):
+        """モジュールを一度だけ初期化（初期化の中で他のモジュールを使えるよう再入可能なロック）"""
+        with self._init_lock:
+            if module.name in self._initialized:
+                return
+            if not module.initialize():
+                raise RuntimeError(f"Module '{module.name}' failed to initialize")
+            self._initialized.add(module.name)
+    
+    def set_write_queue(self, write_queue):
+        """書き込みアクション（BaseModule.write_actions）を実行する書き込みキューを設定"""
+        self._write_queue = write_queue
+    
+    @property
+    def write_queue(self):
+        """設定されている書き込みキュー（なければNone）"""
+        return self._write_queue
     
     def call_module(
         self, 
@@ -42,7 +86,15 @@ class ModuleManager:
         if not module.is_enabled():
             raise RuntimeError(f"Module '{module_name}' is disabled")
         
-        return module.execute(action, params)
+        start = time.perf_counter()
+        try:
+            write_queue = self._write_queue
+            # 書き込みキューのスレッドから呼ばれた場合（アクションの中の呼び出し）はそのまま実行する
+            if write_queue is not None and action in module.write_actions and not write_queue.is_writer_thread():
+                return write_queue.submit(module_name, action, params).result()
+            return module.execute(action, params)
+        finally:
+            MODULE_ACTION_DURATION.observe(time.perf_counter() - start, (module_name, action))
     
     def list_modules(self) -> Dict[str, Dict[str, Any]]:
         """登録されているすべてのモジュール情報を取得"""
@@ -66,6 +118,41 @@ class ModuleManager:
             module.disable()
             return True
         return False
+    
+    def subscribe(self, event: str, handler: Callable[[Dict[str, Any]], None]):
+        """イベントの購読を登録（モジュール間の変更通知）"""
+        self._listeners.setdefault(event, []).append(handler)
+    
+    def publish(self, event: str, payload: Optional[Dict[str, Any]] = None):
+        """イベントを発行し、購読しているハンドラーを呼び出す（書き込みキューの中ではコミット後）"""
+        self.after_commit(lambda: self._dispatch(event, payload or {}))
+    
+    def _dispatch(self, event: str, payload: Dict[str, Any]):
+        """購読しているハンドラーを呼び出す"""
+        for handler in self._listeners.get(event, []):
+            handler(payload)
+    
+    def after_commit(self, callback: Callable[[], None]):
+        """変更がコミットされた後に行う処理（キャッシュの無効化など）を登録
+        
+        書き込みキューの中ではまとめたトランザクションのコミット後に呼ぶ。
+        それ以外ではアクションが自分でコミットしているので、すぐに呼ぶ。
+        """
+        deferred = self._deferred.get()
+        if deferred is None:
+            callback()
+        else:
+            deferred.append(callback)
+    
+    @contextmanager
+    def deferring(self) -> Iterator[List[Callable[[], None]]]:
+        """after_commitで登録された処理を呼ばずに溜める（書き込みキュー用）"""
+        deferred: List[Callable[[], None]] = []
+        token = self._deferred.set(deferred)
+        try:
+            yield deferred
+        finally:
+            self._deferred.reset(token)
 
 
 # グローバルなモジュールマネージャーインスタンス
@@ -0,0 +1,126 @@
+import json
+import weakref
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import event
+from backend.config import settings
+
+# 処理中のリクエストで実行したSQL {SQL文: 回数}（エンドポイントを実行するスレッドにも引き継がれる）
+_request_statements: ContextVar[Optional[Dict[str, int]]] = ContextVar("request_statements", default=None)
+# 監査を登録したエンジン（アプリを作り直しても二重に数えない）
+_audited_engines: "weakref.WeakSet" = weakref.WeakSet()
+
+
+def query_budget(limit: int) -> Callable:
+    """ルートで実行してよいSQLの数を宣言するデコレーター
+
+    ルートのデコレーターの内側に付ける:
+        @router.get("/")
+        @query_budget(3)
+        def list_items(...):
+    """
+    def decorator(endpoint: Callable) -> Callable:
+        endpoint.query_budget = limit
+        return endpoint
+    return decorator
+
+
+def audit_engine(engine):
+    """エンジンで実行したSQLを処理中のリクエストに記録する（同じエンジンには一度だけ）"""
+    if engine in _audited_engines:
+        return
+    _audited_engines.add(engine)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _record_statement(conn, cursor, statement, parameters, context, executemany):
+        statements = _request_statements.get()
+        if statements is not None:
+            # パラメータだけが異なるSQLは同じ文として数える（executemanyは1回）
+            statements[statement] = statements.get(statement, 0) + 1
+
+
+def _check(statements: Dict[str, int], budget: Optional[int]) -> Tuple[int, List[Tuple[str, int]], List[str]]:
+    """(SQLの数, 繰り返されたSQLと回数, 違反の内容)"""
+    count = sum(statements.values())
+    repeated = sorted(
+        ((statement, times) for statement, times in statements.items()
+         if times >= settings.QUERY_AUDIT_REPEAT_THRESHOLD),
+        key=lambda item: -item[1]
+    )
+
+    violations = []
+    if budget is not None and count > budget:
+        violations.append(f"{count} queries exceed the budget of {budget}")
+    for statement, times in repeated:
+        violations.append(f"possible N+1: {times}x {' '.join(statement.split())[:200]}")
+    return count, repeated, violations
+
+
+class QueryAuditMiddleware:
+    """リクエストごとのSQLを記録し、N+1の疑い（同じSQLの繰り返し）と予算超過を検出するASGIミドルウェア
+
+    結果はX-Query-Count / X-Query-Repeatedヘッダーとログに出す。
+    QUERY_AUDIT_STRICTなら違反したリクエストを500にして、テストで検出できるようにする。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        statements: Dict[str, int] = {}
+        token = _request_statements.set(statements)
+        # 違反してレスポンスを差し替えた場合、元のレスポンスは送らない
+        replaced = False
+
+        async def send_with_audit(message):
+            nonlocal replaced
+            if replaced:
+                return
+            if message["type"] == "http.response.start":
+                route = scope.get("route")
+                budget = getattr(getattr(route, "endpoint", None), "query_budget", settings.QUERY_BUDGET_DEFAULT)
+                count, repeated, violations = _check(statements, budget)
+                if violations:
+                    path = getattr(route, "path", scope["path"])
+                    for violation in violations:
+                        print(f"[query_audit] {scope['method']} {path}: {violation}")
+
+                if violations and settings.QUERY_AUDIT_STRICT:
+                    replaced = True
+                    await self._send_violation(send, count, violations)
+                    return
+
+                headers = list(message.get("headers", []))
+                headers.append((b"x-query-count", str(count).encode()))
+                if repeated:
+                    headers.append((b"x-query-repeated", str(max(times for _, times in repeated)).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_audit)
+        finally:
+            _request_statements.reset(token)
+
+    @staticmethod
+    async def _send_violation(send, count: int, violations: List[str]):
+        """予算超過・N+1の内容を500エラーとして返す"""
+        body = json.dumps({
+            "detail": "Query audit failed",
+            "query_count": count,
+            "violations": violations,
+        }).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 500,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"x-query-count", str(count).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,100 @@
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Optional
+from backend.config import settings
+from backend.core.module_manager import module_manager
+
+
+class ReadinessProbe:
+    """ワーカーがリクエストを受け付けられるかを判定する（/ready 用）
+
+    プールから接続を取り出して軽いクエリを期限内に実行できるか、プールの使用率、
+    書き込みキューの待ち数、SQLiteのWALファイルの大きさを確認し、いずれかが上限を超えたら
+    準備できていないと判定する。ロードバランサーはそのワーカーへの振り分けを止める。
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        # 期限を過ぎても終わっていない確認（スレッドは止められないので、終わるまで次の確認は失敗とする）
+        self._pending: Optional[asyncio.Future] = None
+
+    async def check(self) -> Dict[str, Any]:
+        """確認結果（status が "ready" でなければ503で返す）"""
+        database = await self._check_database()
+        pool = self._pool_usage()
+        write_queue = module_manager.write_queue
+        write_queue_depth = write_queue.depth() if write_queue is not None else None
+        wal_bytes = self._wal_bytes()
+
+        reasons: List[str] = []
+        if database["error"] is not None:
+            reasons.append(f"database: {database['error']}")
+        if pool["utilization"] is not None and pool["utilization"] >= settings.READY_MAX_POOL_UTILIZATION:
+            reasons.append(f"connection pool {pool['checked_out']}/{pool['capacity']} in use")
+        if write_queue_depth is not None and write_queue_depth > settings.READY_MAX_WRITE_QUEUE_DEPTH:
+            reasons.append(f"{write_queue_depth} writes queued")
+        if wal_bytes is not None and wal_bytes > settings.READY_MAX_WAL_BYTES:
+            reasons.append(f"WAL is {wal_bytes} bytes")
+
+        return {
+            "status": "unavailable" if reasons else "ready",
+            "reasons": reasons,
+            "database": database,
+            "pool": pool,
+            "write_queue_depth": write_queue_depth,
+            "wal_bytes": wal_bytes,
+        }
+
+    async def _check_database(self) -> Dict[str, Any]:
+        """プールの接続で軽いクエリを実行（READY_TIMEOUT_SECONDS まで待つ）"""
+        if self._pending is not None and not self._pending.done():
+            return {"latency_ms": None, "error": "previous check has not finished"}
+
+        self._pending = asyncio.ensure_future(asyncio.to_thread(self._ping))
+        try:
+            # 期限で打ち切っても確認自体は続ける（終わるまで次の確認は上で失敗する）
+            latency = await asyncio.wait_for(asyncio.shield(self._pending), settings.READY_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            return {"latency_ms": None, "error": f"no response within {settings.READY_TIMEOUT_SECONDS}s"}
+        except Exception as e:
+            return {"latency_ms": None, "error": str(e)}
+        return {"latency_ms": round(latency * 1000, 3), "error": None}
+
+    def _ping(self) -> float:
+        """接続を取り出してクエリを実行し、所要時間を返す（プールの待ちを含む）"""
+        started = time.perf_counter()
+        with self.engine.connect() as conn:
+            if conn.dialect.name == "sqlite":
+                # SELECT 1 はファイルを読まないので表を読む（ファイルを開けない・WALでない場合のロック待ちも検出する）
+                conn.exec_driver_sql("SELECT count(*) FROM sqlite_master").scalar()
+            else:
+                conn.exec_driver_sql("SELECT 1").scalar()
+        return time.perf_counter() - started
+
+    def _pool_usage(self) -> Dict[str, Any]:
+        """プールの使用状況（プールを持たない実装では値がNone）"""
+        pool = self.engine.pool
+        size = pool.size() if callable(getattr(pool, "size", None)) else None
+        checked_out = pool.checkedout() if callable(getattr(pool, "checkedout", None)) else None
+        max_overflow = getattr(pool, "_max_overflow", None)
+        # max_overflowが負なら上限なし
+        capacity = size + max_overflow if size is not None and max_overflow is not None and max_overflow >= 0 \
+            else None
+        return {
+            "size": size,
+            "checked_out": checked_out,
+            "capacity": capacity,
+            "utilization": round(checked_out / capacity, 3) if capacity and checked_out is not None else None,
+        }
+
+    def _wal_bytes(self) -> Optional[int]:
+        """SQLiteのWALファイルの大きさ（チェックポイントで書き戻されずに溜まっている分、SQLite以外はNone）"""
+        url = self.engine.url
+        if url.get_backend_name() != "sqlite" or not url.database or url.database == ":memory:":
+            return None
+        try:
+            return os.path.getsize(f"{url.database}-wal")
+        except OSError:
+            # WALモードでない（SQLITE_JOURNAL_MODE）か、最後の接続が閉じてチェックポイントで削除された
+            return 0
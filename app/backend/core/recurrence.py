@@ -0,0 +1,191 @@
+import calendar
+from datetime import datetime, timedelta
+from typing import Iterator, NamedTuple, Optional, Tuple
+
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+UNTIL_FORMAT = "%Y%m%dT%H%M%S"
+
+
+class RecurrenceRule(NamedTuple):
+    """iCalendarのRRULEのサブセットで表した繰り返しルール
+
+    例: "FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE;COUNT=10"
+    保存するのはルールと次の1回分（タスクのdue_date・リマインダーのremind_at）だけで、
+    それ以降の回は必要な期間の分だけその場で展開する。
+    COUNTは実体化されている回を含めた残り回数として扱い、次の回へ進むたびに減らす。
+    """
+    freq: str
+    interval: int = 1
+    by_day: Tuple[int, ...] = ()
+    by_month_day: Optional[int] = None
+    count: Optional[int] = None
+    until: Optional[datetime] = None
+
+    @classmethod
+    def parse(cls, text: str) -> "RecurrenceRule":
+        """ルール文字列を解析（不正な場合はValueError）"""
+        if text.upper().startswith("RRULE:"):
+            text = text[len("RRULE:"):]
+
+        parts = {}
+        for part in text.split(";"):
+            if not part.strip():
+                continue
+            key, sep, value = part.partition("=")
+            if not sep or not value.strip():
+                raise ValueError(f"Invalid recurrence rule part: {part}")
+            parts[key.strip().upper()] = value.strip().upper()
+
+        freq = parts.pop("FREQ", None)
+        if freq not in FREQUENCIES:
+            raise ValueError(f"FREQ must be one of {', '.join(FREQUENCIES)}")
+
+        rule = cls(freq=freq)
+        try:
+            if "INTERVAL" in parts:
+                rule = rule._replace(interval=int(parts.pop("INTERVAL")))
+            if "BYDAY" in parts:
+                rule = rule._replace(by_day=tuple(sorted(
+                    {WEEKDAYS.index(day.strip()) for day in parts.pop("BYDAY").split(",")}
+                )))
+            if "BYMONTHDAY" in parts:
+                rule = rule._replace(by_month_day=int(parts.pop("BYMONTHDAY")))
+            if "COUNT" in parts:
+                rule = rule._replace(count=int(parts.pop("COUNT")))
+            if "UNTIL" in parts:
+                value = parts.pop("UNTIL").rstrip("Z")
+                until = datetime.strptime(value, UNTIL_FORMAT) if "-" not in value \
+                    else datetime.fromisoformat(value)
+                rule = rule._replace(until=until)
+        except ValueError:
+            raise ValueError(f"Invalid recurrence rule: {text}")
+
+        if parts:
+            raise ValueError(f"Unsupported recurrence rule parts: {', '.join(parts)}")
+        if rule.interval < 1:
+            raise ValueError("INTERVAL must be at least 1")
+        if rule.by_day and rule.freq != "WEEKLY":
+            raise ValueError("BYDAY is only supported with FREQ=WEEKLY")
+        if rule.by_month_day is not None and (
+                rule.freq not in ("MONTHLY", "YEARLY") or not 1 <= rule.by_month_day <= 31):
+            raise ValueError("BYMONTHDAY must be 1-31 with FREQ=MONTHLY or YEARLY")
+        if rule.count is not None and rule.count < 1:
+            raise ValueError("COUNT must be at least 1")
+
+        return rule
+
+    def __str__(self) -> str:
+        parts = [f"FREQ={self.freq}"]
+        if self.interval != 1:
+            parts.append(f"INTERVAL={self.interval}")
+        if self.by_day:
+            parts.append("BYDAY=" + ",".join(WEEKDAYS[day] for day in self.by_day))
+        if self.by_month_day is not None:
+            parts.append(f"BYMONTHDAY={self.by_month_day}")
+        if self.count is not None:
+            parts.append(f"COUNT={self.count}")
+        if self.until is not None:
+            parts.append(f"UNTIL={self.until.strftime(UNTIL_FORMAT)}")
+        return ";".join(parts)
+
+    def anchored(self, start: datetime) -> "RecurrenceRule":
+        """最初の回に合わせて月末などで日付がずれないよう日を固定"""
+        if self.freq in ("MONTHLY", "YEARLY") and self.by_month_day is None:
+            return self._replace(by_month_day=start.day)
+        return self
+
+    def _period(self) -> Optional[timedelta]:
+        """間隔が一定のルールなら1回分の長さ"""
+        if self.freq == "DAILY":
+            return timedelta(days=self.interval)
+        if self.freq == "WEEKLY" and not self.by_day:
+            return timedelta(weeks=self.interval)
+        return None
+
+    def _step(self, current: datetime) -> datetime:
+        """currentの次の回（COUNT・UNTILは考慮しない）"""
+        period = self._period()
+        if period is not None:
+            return current + period
+
+        if self.freq == "WEEKLY":
+            weekday = current.weekday()
+            later = [day for day in self.by_day if day > weekday]
+            if later:
+                return current + timedelta(days=later[0] - weekday)
+            # 週の残りに該当する曜日がなければINTERVAL週後の最初の曜日
+            return current + timedelta(days=7 * self.interval - weekday + self.by_day[0])
+
+        months = self.interval if self.freq == "MONTHLY" else 12 * self.interval
+        year, month = divmod(current.month - 1 + months, 12)
+        year += current.year
+        month += 1
+        day = min(self.by_month_day or current.day, calendar.monthrange(year, month)[1])
+        return current.replace(year=year, month=month, day=day)
+
+    def _skip_to(self, current: datetime, target: datetime) -> Tuple[datetime, int]:
+        """間隔が一定のルールでtarget以前の最後の回まで一度に進める（進めた回数も返す）"""
+        period = self._period()
+        if period is None or target <= current:
+            return current, 0
+        steps = (target - current) // period
+        return current + steps * period, steps
+
+    def occurrences(self, start: datetime, window_start: datetime, window_end: datetime,
+                    limit: int) -> Iterator[datetime]:
+        """startから始まる回のうち、期間[window_start, window_end]に含まれるものを最大limit件生成"""
+        current = start
+        remaining = self.count
+        produced = 0
+
+        current, skipped = self._skip_to(current, window_start)
+        if remaining is not None:
+            remaining -= skipped
+            if remaining < 1:
+                return
+
+        while current <= window_end and produced < limit:
+            if self.until is not None and current > self.until:
+                return
+            if current >= window_start:
+                yield current
+                produced += 1
+            if remaining is not None:
+                remaining -= 1
+                if remaining < 1:
+                    return
+            current = self._step(current)
+
+    def advance(self, current: datetime,
+                after: Optional[datetime] = None) -> Optional[Tuple[datetime, "RecurrenceRule"]]:
+        """currentの次の回（afterより後）と残り回数を更新したルールを返す（終了ならNone）"""
+        remaining = self.count
+        following = current
+
+        if after is not None:
+            following, skipped = self._skip_to(following, after)
+            if remaining is not None:
+                remaining -= skipped
+                if remaining < 1:
+                    return None
+
+        while True:
+            if remaining is not None:
+                remaining -= 1
+                if remaining < 1:
+                    return None
+            following = self._step(following)
+            if self.until is not None and following > self.until:
+                return None
+            if after is None or following > after:
+                return following, self._replace(count=remaining)
+
+
+def parse_recurrence(text: Optional[str], start: Optional[datetime]) -> Optional[str]:
+    """入力されたルールを検証し、最初の回に合わせて正規化した文字列を返す"""
+    if not text:
+        return None
+    if start is None:
+        raise ValueError("A recurring item needs a date for its first occurrence")
+    return str(RecurrenceRule.parse(text).anchored(start))
@@ -0,0 +1,78 @@
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+
+class ReferenceSnapshot(NamedTuple):
+    """キャッシュされた参照データの1世代分"""
+    version: int
+    loaded_at: float
+    items: List[Dict[str, Any]]
+    by_id: Dict[int, Dict[str, Any]]
+    by_name: Dict[str, Dict[str, Any]]
+    etag: str
+
+
+class ReferenceCache:
+    """カテゴリ・タグなど小さく更新の少ない参照データのプロセス内キャッシュ
+
+    書き込み時に invalidate() でバージョンを進めると、次回の読み込みで
+    ローダーから再取得する。他プロセスでの更新に追従するためTTLも持つ。
+    """
+
+    def __init__(self, name: str, ttl_seconds: float):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._version = 0
+        self._snapshot: Optional[ReferenceSnapshot] = None
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """バージョンを進めてキャッシュを無効化"""
+        with self._lock:
+            self._version += 1
+
+    def get(self, loader: Callable[[], List[Dict[str, Any]]]) -> ReferenceSnapshot:
+        """有効なスナップショットを取得（無効ならローダーで再構築）"""
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == self._version \
+                and time.monotonic() - snapshot.loaded_at < self.ttl_seconds:
+            self.hits += 1
+            return snapshot
+
+        self.misses += 1
+        version = self._version
+        items = loader()
+        body = json.dumps(items, sort_keys=True, default=str).encode()
+        snapshot = ReferenceSnapshot(
+            version=version,
+            loaded_at=time.monotonic(),
+            items=items,
+            by_id={item["id"]: item for item in items},
+            by_name={item["name"]: item for item in items},
+            etag=f'"{self.name}-{hashlib.sha1(body).hexdigest()}"',
+        )
+
+        with self._lock:
+            # 読み込み中に無効化された場合は保存しない
+            if self._version == version:
+                self._snapshot = snapshot
+
+        return snapshot
+
+    def stats(self) -> Dict[str, Any]:
+        """ヒット率などの統計を取得"""
+        total = self.hits + self.misses
+        snapshot = self._snapshot
+        return {
+            "name": self.name,
+            "version": self._version,
+            "size": len(snapshot.items) if snapshot else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
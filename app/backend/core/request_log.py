@@ -0,0 +1,56 @@
+import json
+import time
+from backend.config import settings
+
+
+class RequestLogMiddleware:
+    """APIへのリクエストをJSON Linesで記録するASGIミドルウェア
+
+    記録したログは負荷試験ツールで再生できる:
+        python -m backend.tools.loadtest --replay requests.jsonl --url http://localhost:8000
+    1行に1リクエスト（到着時刻・メソッド・パス・クエリ・本文・ステータス・所要時間）を書く。
+    追記モードで1行ずつ書き込むので、複数のワーカープロセスで同じファイルを指定できる。
+    """
+
+    def __init__(self, app, path: str):
+        self.app = app
+        self.file = open(path, "a", encoding="utf-8")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(settings.API_PREFIX):
+            await self.app(scope, receive, send)
+            return
+
+        chunks = []
+        status = [None]
+
+        async def receive_with_body():
+            message = await receive()
+            if message["type"] == "http.request":
+                chunks.append(message.get("body", b""))
+            return message
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        arrived = time.time()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive_with_body, send_with_status)
+        finally:
+            body = b"".join(chunks)
+            content_type = dict(scope["headers"]).get(b"content-type", b"").decode("latin-1")
+            entry = {
+                "ts": arrived,
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope["query_string"].decode("latin-1"),
+                "content_type": content_type or None,
+                "body": body.decode("utf-8", errors="replace") if body else None,
+                "status": status[0],
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+            }
+            self.file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self.file.flush()
@@ -0,0 +1,237 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode
+from starlette.routing import Match
+from backend.config import settings
+from backend.core.metrics import Counter, GaugeFunction, registry
+
+# イベントと、それによって変わるデータの系統
+# キャッシュするルートは読むデータの系統を cache_response で宣言し、その系統のイベントで無効化される
+INVALIDATING_EVENTS: Dict[str, Tuple[str, ...]] = {
+    "task_created": ("tasks",),
+    "task_updated": ("tasks",),
+    "task_deleted": ("tasks", "reminders"),
+    "tasks_bulk_updated": ("tasks",),
+    "tag_created": ("tags",),
+    "tag_updated": ("tags",),
+    "tag_deleted": ("tags", "tag_links"),
+    "tags_assigned": ("tag_links",),
+    "tags_unassigned": ("tag_links",),
+    "category_created": ("categories",),
+    "category_updated": ("categories",),
+    "category_deleted": ("categories", "category_links"),
+    "categories_assigned": ("category_links",),
+    "categories_unassigned": ("category_links",),
+    "reminder_created": ("reminders",),
+    "reminder_updated": ("reminders",),
+    "reminder_deleted": ("reminders",),
+    "reminders_acked": ("reminders",),
+}
+
+RESPONSE_CACHE_REQUESTS = registry.register(Counter(
+    "todoapp_response_cache_requests_total", "Cacheable GET requests by route and cache result.",
+    ("route", "result")
+))
+RESPONSE_CACHE_EVICTIONS = registry.register(Counter(
+    "todoapp_response_cache_evictions_total", "Cached responses dropped to stay under the byte limit."
+))
+
+
+def cache_response(*families: str, time_dependent: bool = False) -> Callable:
+    """GETのレスポンスをキャッシュするルートを宣言するデコレーター
+
+    familiesは読むデータの系統（tasks, tag_links など）で、その系統を変える書き込みで無効化される。
+    期限切れの一覧など現在時刻で結果が変わるルートは time_dependent=True にすると短いTTLになる。
+    ルートのデコレーターの内側に付ける:
+        @router.get("/overdue/list")
+        @cache_response("tasks", time_dependent=True)
+        def get_overdue_tasks(...):
+    """
+    def decorator(endpoint: Callable) -> Callable:
+        endpoint.response_cache = (frozenset(families), time_dependent)
+        return endpoint
+    return decorator
+
+
+class CachedResponse(NamedTuple):
+    """キャッシュしたレスポンス"""
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    families: frozenset
+    expires_at: float
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(name) + len(value) for name, value in self.headers)
+
+
+class ResponseCache:
+    """シリアライズ済みのレスポンスのLRUキャッシュ（合計バイト数で上限を設ける）
+
+    エントリはデータの系統ごとに索引し、書き込みのイベントで該当する系統のエントリだけを捨てる。
+    他のワーカープロセスでの書き込みはイベントが届かないので、TTLで追従する。
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._families: Dict[str, Set[str]] = {}
+        # 系統ごとの世代（読み込み中に無効化されたレスポンスを保存しないように比べる）
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        registry.register(GaugeFunction(
+            "todoapp_response_cache_bytes", "Bytes held by the response cache.", lambda: self.size
+        ))
+        registry.register(GaugeFunction(
+            "todoapp_response_cache_entries", "Responses held by the response cache.", lambda: len(self._entries)
+        ))
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """有効なエントリを取得（最近使ったものとして末尾に移す）"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def generations(self, families: frozenset) -> Tuple[int, ...]:
+        """系統の現在の世代"""
+        with self._lock:
+            return tuple(self._generations.get(family, 0) for family in sorted(families))
+
+    def put(self, key: str, entry: CachedResponse, generations: Tuple[int, ...]):
+        """エントリを保存（読み込みを始めてから系統が無効化されていれば保存しない）"""
+        size = entry.size
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if tuple(self._generations.get(family, 0) for family in sorted(entry.families)) != generations:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self.size += size
+            for family in entry.families:
+                self._families.setdefault(family, set()).add(key)
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                RESPONSE_CACHE_EVICTIONS.inc()
+
+    def invalidate(self, *families: str):
+        """系統のエントリを捨てる"""
+        with self._lock:
+            for family in families:
+                self._generations[family] = self._generations.get(family, 0) + 1
+                for key in self._families.pop(family, ()):
+                    if key in self._entries:
+                        self._remove(key)
+
+    def clear(self):
+        """すべてのエントリを捨てる"""
+        with self._lock:
+            for family in list(self._families):
+                self._generations[family] = self._generations.get(family, 0) + 1
+            self._entries.clear()
+            self._families.clear()
+            self.size = 0
+
+    def _remove(self, key: str):
+        """エントリを削除（ロックを取った状態で呼ぶ）"""
+        entry = self._entries.pop(key)
+        self.size -= entry.size
+        for family in entry.families:
+            keys = self._families.get(family)
+            if keys is not None:
+                keys.discard(key)
+
+    def subscribe(self, module_manager):
+        """書き込みのイベントで該当する系統を無効化する"""
+        for event, families in INVALIDATING_EVENTS.items():
+            module_manager.subscribe(event, lambda payload, families=families: self.invalidate(*families))
+
+
+def cache_key(scope) -> str:
+    """パスと正規化したクエリ（パラメータの順序によらず同じキー）"""
+    query = sorted(parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True))
+    return f"{scope['path']}?{urlencode(query)}" if query else scope["path"]
+
+
+class ResponseCacheMiddleware:
+    """cache_responseを付けたルートへのGETをキャッシュから返すASGIミドルウェア
+
+    ステータス200のレスポンスだけを保存し、X-Cacheヘッダー（hit / miss）を付ける。
+    Cache-Control: no-cache のリクエストはキャッシュを読まずに実行する（結果は保存する）。
+    """
+
+    def __init__(self, app, router, cache: ResponseCache):
+        self.app = app
+        self.router = router
+        self.cache = cache
+
+    def _match(self, scope):
+        """リクエストを処理するルート（ルーターと同じく最初に一致したもの）"""
+        for route in self.router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        route = self._match(scope)
+        declaration = getattr(getattr(route, "endpoint", None), "response_cache", None)
+        if declaration is None:
+            await self.app(scope, receive, send)
+            return
+
+        families, time_dependent = declaration
+        key = cache_key(scope)
+        headers = dict(scope["headers"])
+        entry = None
+        if b"no-cache" not in headers.get(b"cache-control", b""):
+            entry = self.cache.get(key)
+        if entry is not None:
+            RESPONSE_CACHE_REQUESTS.inc(1, (route.path, "hit"))
+            await send({
+                "type": "http.response.start",
+                "status": entry.status,
+                "headers": entry.headers + [(b"x-cache", b"hit")],
+            })
+            await send({"type": "http.response.body", "body": entry.body})
+            return
+
+        RESPONSE_CACHE_REQUESTS.inc(1, (route.path, "miss"))
+        generations = self.cache.generations(families)
+        start: dict = {}
+        chunks: List[bytes] = []
+
+        async def send_and_capture(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"x-cache", b"miss")]}
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False) and start.get("status") == 200:
+                    ttl = settings.RESPONSE_CACHE_SHORT_TTL_SECONDS if time_dependent \
+                        else settings.RESPONSE_CACHE_TTL_SECONDS
+                    self.cache.put(key, CachedResponse(
+                        status=200,
+                        headers=list(start.get("headers", [])),
+                        body=b"".join(chunks),
+                        families=families,
+                        expires_at=time.monotonic() + ttl,
+                    ), generations)
+            await send(message)
+
+        await self.app(scope, receive, send_and_capture)
@@ -0,0 +1,172 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from contextvars import Context, copy_context
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from backend.core.metrics import GaugeFunction, WRITE_BATCH_SIZE, WRITE_QUEUE_WAIT_SECONDS, registry
+from backend.core.module_manager import module_manager
+
+
+class WriteRequest(NamedTuple):
+    """キューに入れた書き込みアクション"""
+    module_name: str
+    action: str
+    params: Optional[Dict[str, Any]]
+    # 呼び出し元のコンテキスト（リクエストごとのSQLの集計などを引き継ぐ）
+    context: Context
+    future: Future
+    submitted_at: float
+
+
+# (コミット後に行う処理, 結果, 例外)
+Outcome = Tuple[List[Callable[[], None]], Any, Optional[BaseException]]
+
+
+class WriteQueue:
+    """モジュールの書き込みアクションを1本のスレッドでまとめてコミットするキュー（グループコミット）
+
+    SQLiteは同時に1つの接続しか書き込めないため、リクエストごとにコミットすると
+    ロック待ちとビジータイムアウトが起きる。書き込みアクションをキューに入れ、
+    専用のスレッドが溜まっている分を1つのトランザクションで実行し、コミットを共有する。
+
+    アクションごとにSAVEPOINTを切るので、失敗したアクションは自分の変更だけを取り消し、
+    呼び出し元には単独で実行した場合と同じ結果・例外が返る。イベントの通知などの
+    コミット後の処理（module_manager.after_commit）は、まとめたコミットの後に行う。
+    """
+
+    def __init__(self, engine, session_factory, max_batch: int = 256):
+        self.engine = engine
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[Optional[WriteRequest]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        registry.register(GaugeFunction(
+            "todoapp_write_queue_depth", "Writes waiting in the write queue.", self.depth
+        ))
+
+    def start(self):
+        """書き込みスレッドを開始（forkしたワーカーでは新しく開始する）"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="write-queue", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """キューに入っている書き込みを終えてからスレッドを停止"""
+        with self._lock:
+            thread = self._thread
+            if thread is None or not thread.is_alive():
+                return
+            self._queue.put(None)
+        thread.join(timeout)
+
+    def depth(self) -> int:
+        """キューで待っている書き込みの数"""
+        return self._queue.qsize()
+
+    def is_writer_thread(self) -> bool:
+        """書き込みスレッドから呼ばれているか"""
+        thread = self._thread
+        return thread is not None and thread.ident == threading.get_ident()
+
+    def submit(self, module_name: str, action: str, params: Optional[Dict[str, Any]] = None) -> Future:
+        """書き込みアクションをキューに入れる（結果はFutureで受け取る）"""
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+
+        future: Future = Future()
+        self._queue.put(WriteRequest(module_name, action, params, copy_context(), future, time.perf_counter()))
+        return future
+
+    def _run(self):
+        """キューに溜まっている書き込みをまとめて実行する"""
+        print(f"[write_queue] Writer started (pid {os.getpid()})")
+        stopping = False
+        while not stopping:
+            request = self._queue.get()
+            if request is None:
+                break
+
+            batch = [request]
+            while len(batch) < self.max_batch:
+                try:
+                    request = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    stopping = True
+                    break
+                batch.append(request)
+
+            self._process(batch)
+
+    def _process(self, batch: List[WriteRequest]):
+        """バッチを1つのトランザクションで実行し、各呼び出し元に結果を返す"""
+        started = time.perf_counter()
+        for request in batch:
+            WRITE_QUEUE_WAIT_SECONDS.observe(started - request.submitted_at)
+
+        try:
+            outcomes = self._execute_batch(batch)
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0].future.set_exception(e)
+                return
+            # まとめたトランザクション自体が失敗したら（コミットの失敗など）、
+            # すべて取り消されているので1件ずつやり直して失敗した書き込みだけにエラーを返す
+            for request in batch:
+                self._process([request])
+            return
+
+        WRITE_BATCH_SIZE.observe(len(batch))
+        for request, (deferred, result, error) in zip(batch, outcomes):
+            if error is None:
+                try:
+                    for callback in deferred:
+                        request.context.run(callback)
+                except Exception as e:
+                    error = e
+            if error is None:
+                request.future.set_result(result)
+            else:
+                request.future.set_exception(error)
+
+    def _execute_batch(self, batch: List[WriteRequest]) -> List[Outcome]:
+        """バッチの各アクションをSAVEPOINTの中で実行してコミット"""
+        with self.engine.connect() as conn:
+            if conn.dialect.name == "sqlite":
+                # 最初に書き込みロックを取る（読み取りから書き込みへの昇格でビジーにならないように）
+                conn.exec_driver_sql("BEGIN IMMEDIATE")
+            # アクションのcommit()/rollback()はSAVEPOINTの確定・取り消しになる
+            session = self.session_factory(
+                bind=conn, join_transaction_mode="create_savepoint", expire_on_commit=False
+            )
+            try:
+                outcomes = [request.context.run(self._execute, session, request) for request in batch]
+                conn.commit()
+            finally:
+                session.close()
+        return outcomes
+
+    @staticmethod
+    def _execute(session, request: WriteRequest) -> Outcome:
+        """アクションを1つ実行（呼び出し元のコンテキストの写しの中で実行される）"""
+        for module in module_manager.get_modules():
+            module.db = session
+
+        module = module_manager.get_module(request.module_name)
+        with module_manager.deferring() as deferred:
+            try:
+                result = module.execute(request.action, request.params)
+                session.commit()
+            except Exception as e:
+                # SAVEPOINTまで戻す（ここで失敗したらバッチ全体の失敗として扱う）
+                session.rollback()
+                return [], None, e
+            finally:
+                # 後のアクションの取り消しで、返した結果のオブジェクトが期限切れにならないよう切り離す
+                session.expunge_all()
+        return deferred, result, None
@@ -1,6 +1,19 @@
 """Database Package"""
 
-from backend.database.database import Base, engine, SessionLocal, get_db
-from backend.database.models import Task, Category, Tag, Reminder
+from backend.database.database import (
+    Base, engine, SessionLocal, get_db, begin_snapshot, ensure_schema, missing_schema, insert_ignore, upsert,
+    upsert_increment
+)
+from backend.database.models import Task, Category, Tag, Reminder, TaskStat, ProgressHistory, ProgressSnapshot, DataVersion
+from backend.database.counters import (
+    record_links, record_priority_change, read_counters, verify_counters, ensure_counters
+)
+from backend.database.history import record_category_links, ensure_history
+from backend.database.versions import VersionWatch
 
-__all__ = ["Base", "engine", "SessionLocal", "get_db", "Task", "Category", "Tag", "Reminder"]
+__all__ = [
+    "Base", "engine", "SessionLocal", "get_db", "begin_snapshot", "ensure_schema", "missing_schema", "insert_ignore", "upsert", "upsert_increment",
+    "Task", "Category", "Tag", "Reminder", "TaskStat", "ProgressHistory", "ProgressSnapshot", "DataVersion",
+    "record_links", "record_priority_change", "read_counters", "verify_counters", "ensure_counters",
+    "record_category_links", "ensure_history", "VersionWatch"
+]
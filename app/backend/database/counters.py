@@ -0,0 +1,205 @@
+from typing import Any, Dict, Iterable, List, Tuple
+from sqlalchemy import delete, event, func, select
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+from backend.database.database import SessionLocal, upsert_increment
+from backend.database.models import Task, Category, Tag, TaskStat, task_categories, task_tags
+
+# {(次元, キー): [タスク数, 進捗合計]}
+Deltas = Dict[Tuple[str, str], List[int]]
+
+# task_stats が初期化済みであることを示す行（全タスク数も兼ねる）
+TOTAL_KEY = ("all", "tasks")
+
+# 関連テーブル・対象の列と task_stats の次元
+LINK_TABLES = (
+    (task_tags, task_tags.c.tag_id, "tag"),
+    (task_categories, task_categories.c.category_id, "category"),
+)
+
+
+def _add(deltas: Deltas, dimension: str, key: Any, count: int, progress: int = 0):
+    """差分を加算"""
+    delta = deltas.setdefault((dimension, str(key)), [0, 0])
+    delta[0] += count
+    delta[1] += progress
+
+
+def _add_task(deltas: Deltas, status: str, priority: int, progress: int, sign: int):
+    """タスク1件分の差分を加算（sign=1で追加、-1で削除）"""
+    _add(deltas, *TOTAL_KEY, sign, sign * progress)
+    _add(deltas, "status", status, sign, sign * progress)
+    _add(deltas, "priority", priority, sign, sign * progress)
+
+
+def _values(task: Task, committed: bool) -> Tuple[str, int, int]:
+    """タスクのステータス・優先度・進捗（committed=Trueなら変更前の値）"""
+    values = []
+    for name in ("status", "priority", "progress"):
+        added, unchanged, deleted = get_history(task, name)
+        if committed:
+            value = deleted[0] if deleted else (unchanged[0] if unchanged else getattr(task, name))
+        else:
+            value = added[0] if added else getattr(task, name)
+        if value is None:
+            # 未設定なら列のデフォルト値がINSERTされる
+            value = Task.__table__.c[name].default.arg
+        values.append(value)
+    return tuple(values)
+
+
+def apply_deltas(session: Session, deltas: Deltas):
+    """差分をtask_statsに加算（呼び出し側のトランザクション内で実行）"""
+    rows = [
+        {"dimension": dimension, "key": key, "task_count": count, "progress_sum": progress}
+        for (dimension, key), (count, progress) in deltas.items()
+        if count or progress
+    ]
+    if rows:
+        session.execute(upsert_increment(TaskStat.__table__, ["task_count", "progress_sum"]), rows)
+
+
+def record_links(session: Session, dimension: str, pairs: Iterable[Tuple[int, int]], sign: int):
+    """タグ・カテゴリの割り当て（sign=1）・解除（sign=-1）をtask_statsに反映"""
+    deltas: Deltas = {}
+    for _, target_id in pairs:
+        _add(deltas, dimension, target_id, sign)
+    apply_deltas(session, deltas)
+
+
+def record_priority_change(session: Session, groups: Iterable[Tuple[int, int, int]], priority: int):
+    """一括UPDATEでの優先度変更をtask_statsに反映
+
+    groupsは変更対象の (変更前の優先度, タスク数, 進捗合計) の集計。
+    """
+    deltas: Deltas = {}
+    for old_priority, count, progress in groups:
+        _add(deltas, "priority", old_priority, -count, -(progress or 0))
+        _add(deltas, "priority", priority, count, progress or 0)
+    apply_deltas(session, deltas)
+
+
+@event.listens_for(SessionLocal, "before_flush")
+def _track_task_changes(session: Session, flush_context, instances):
+    """ORM経由のタスクの作成・更新・削除を同じトランザクションでtask_statsに反映"""
+    deltas: Deltas = {}
+    deleted_task_ids = []
+    deleted_targets = []
+
+    for obj in session.new:
+        if isinstance(obj, Task):
+            _add_task(deltas, *_values(obj, committed=False), 1)
+
+    for obj in session.dirty:
+        if isinstance(obj, Task) and session.is_modified(obj):
+            before = _values(obj, committed=True)
+            after = _values(obj, committed=False)
+            if before != after:
+                _add_task(deltas, *before, -1)
+                _add_task(deltas, *after, 1)
+
+    for obj in session.deleted:
+        if isinstance(obj, Task):
+            _add_task(deltas, *_values(obj, committed=True), -1)
+            deleted_task_ids.append(obj.id)
+        elif isinstance(obj, Tag):
+            deleted_targets.append(("tag", obj.id))
+        elif isinstance(obj, Category):
+            deleted_targets.append(("category", obj.id))
+
+    # 削除されるタスクの関連もflushで一緒に消える
+    if deleted_task_ids:
+        for table, column, dimension in LINK_TABLES:
+            rows = session.execute(
+                select(column, func.count()).where(table.c.task_id.in_(deleted_task_ids)).group_by(column)
+            )
+            for target_id, count in rows:
+                _add(deltas, dimension, target_id, -count)
+
+    for dimension, target_id in deleted_targets:
+        deltas.pop((dimension, str(target_id)), None)
+        session.execute(delete(TaskStat).where(
+            TaskStat.dimension == dimension, TaskStat.key == str(target_id)
+        ))
+
+    apply_deltas(session, deltas)
+
+
+# 変更前の値を履歴に残すため、代入時に古い値を読み込ませる
+for _attribute in (Task.status, Task.priority, Task.progress):
+    event.listen(_attribute, "set", lambda target, value, oldvalue, initiator: None, active_history=True)
+
+
+def compute_counters(session: Session) -> Dict[Tuple[str, str], Tuple[int, int]]:
+    """task_statsのあるべき値をタスクと関連テーブルから集計"""
+    counters: Deltas = {}
+
+    rows = session.execute(
+        select(Task.status, Task.priority, func.count(Task.id), func.sum(Task.progress))
+        .group_by(Task.status, Task.priority)
+    )
+    for status, priority, count, progress in rows:
+        progress = progress or 0
+        _add(counters, *TOTAL_KEY, count, progress)
+        _add(counters, "status", status, count, progress)
+        _add(counters, "priority", priority, count, progress)
+    counters.setdefault(TOTAL_KEY, [0, 0])
+
+    for table, column, dimension in LINK_TABLES:
+        for target_id, count in session.execute(select(column, func.count()).group_by(column)):
+            _add(counters, dimension, target_id, count)
+
+    return {key: tuple(value) for key, value in counters.items()}
+
+
+def read_counters(session: Session, *dimensions: str) -> Dict[Tuple[str, str], Tuple[int, int]]:
+    """task_statsの現在の値を取得（次元の指定がなければすべて、0件の行は除く）"""
+    query = select(TaskStat.dimension, TaskStat.key, TaskStat.task_count, TaskStat.progress_sum)
+    if dimensions:
+        query = query.where(TaskStat.dimension.in_(dimensions))
+    rows = session.execute(query)
+    return {
+        (dimension, key): (count, progress)
+        for dimension, key, count, progress in rows
+        if count or progress or (dimension, key) == TOTAL_KEY
+    }
+
+
+def verify_counters(session: Session, repair: bool = False) -> Dict[str, Any]:
+    """task_statsを集計し直して差分を報告（repair=Trueなら作り直す）"""
+    expected = compute_counters(session)
+    actual = read_counters(session)
+
+    drift = [
+        {
+            "dimension": dimension,
+            "key": key,
+            "expected": expected.get((dimension, key), (0, 0)),
+            "actual": actual.get((dimension, key), (0, 0)),
+        }
+        for dimension, key in sorted(set(expected) | set(actual))
+        if expected.get((dimension, key), (0, 0)) != actual.get((dimension, key), (0, 0))
+    ]
+
+    if repair:
+        session.execute(delete(TaskStat))
+        session.add_all([
+            TaskStat(dimension=dimension, key=key, task_count=count, progress_sum=progress)
+            for (dimension, key), (count, progress) in expected.items()
+        ])
+        session.commit()
+
+    return {"rows": len(expected), "drift": drift, "repaired": repair and bool(drift)}
+
+
+def ensure_counters():
+    """task_statsが未初期化（テーブルを追加した直後など）なら集計して作成"""
+    db = SessionLocal()
+    try:
+        initialized = db.execute(select(TaskStat.dimension).where(
+            TaskStat.dimension == TOTAL_KEY[0], TaskStat.key == TOTAL_KEY[1]
+        )).first()
+        if initialized is None:
+            verify_counters(db, repair=True)
+    finally:
+        db.close()
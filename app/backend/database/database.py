@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine
+from typing import List
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from backend.config import settings
@@ -9,6 +10,17 @@ engine = create_engine(
     connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
 )
 
+
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _configure_sqlite(dbapi_connection, connection_record):
+        """SQLiteの接続設定（WALで読み取りが書き込みを待たないように、ロック待ちはbusy_timeoutまで）"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.close()
+
+
 # セッションの作成
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -16,6 +28,98 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def ensure_schema():
+    """テーブルを作成し、既存のテーブルに不足している列とインデックスを追加"""
+    Base.metadata.create_all(bind=engine)
+
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                # 後から追加した列はNULL許容にしているので、そのまま追加できる
+                if column.name not in existing and column.nullable:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+def missing_schema(bind=None) -> List[str]:
+    """モデルにあってDBにないテーブル・列の一覧（ensure_schemaを実行していない古いDBの検出用）"""
+    inspector = inspect(bind if bind is not None else engine)
+    tables = set(inspector.get_table_names())
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in tables:
+            missing.append(table.name)
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        missing.extend(f"{table.name}.{column.name}" for column in table.columns if column.name not in existing)
+    return missing
+
+
+def insert_ignore(table):
+    """主キーが重複する行を無視するINSERT文を作成"""
+    if engine.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert(table).on_conflict_do_nothing()
+    if engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert(table).on_conflict_do_nothing()
+    return table.insert().prefix_with("IGNORE")
+
+
+def upsert_increment(table, columns):
+    """主キーが重複する場合は指定した列に値を加算するINSERT文を作成"""
+    if engine.dialect.name in ("sqlite", "postgresql"):
+        if engine.dialect.name == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        statement = insert(table)
+        return statement.on_conflict_do_update(
+            index_elements=list(table.primary_key.columns),
+            set_={column: table.c[column] + statement.excluded[column] for column in columns}
+        )
+    from sqlalchemy.dialects.mysql import insert
+    statement = insert(table)
+    return statement.on_duplicate_key_update(
+        {column: table.c[column] + statement.inserted[column] for column in columns}
+    )
+
+
+def upsert(table, columns):
+    """主キーが重複する場合は指定した列を新しい値で置き換えるINSERT文を作成"""
+    if engine.dialect.name in ("sqlite", "postgresql"):
+        if engine.dialect.name == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        statement = insert(table)
+        return statement.on_conflict_do_update(
+            index_elements=list(table.primary_key.columns),
+            set_={column: statement.excluded[column] for column in columns}
+        )
+    from sqlalchemy.dialects.mysql import insert
+    statement = insert(table)
+    return statement.on_duplicate_key_update({column: statement.inserted[column] for column in columns})
+
+
+def begin_snapshot(db):
+    """セッションの以降の読み取りを1つのトランザクション（一貫したスナップショット）で行う
+
+    最初の文を実行する前に呼ぶ。pysqliteはSELECTではトランザクションを始めず文ごとに
+    別の読み取りになるので明示的にBEGINし、他のデータベースはREPEATABLE READで始める。
+    """
+    if engine.dialect.name == "sqlite":
+        db.connection().exec_driver_sql("BEGIN")
+    else:
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+
+
 def get_db():
     """データベースセッションを取得する依存性注入関数"""
     db = SessionLocal()
@@ -0,0 +1,233 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import event, func, insert, literal, select
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.orm.attributes import get_history
+from backend.database.database import SessionLocal
+from backend.database.models import Task, ProgressHistory, ProgressSnapshot, task_categories
+
+# 親をたどる深さの上限（循環した親子関係での無限ループ防止）
+MAX_DEPTH = 100
+
+
+def _committed(task: Task, name: str) -> Any:
+    """変更前の値"""
+    added, unchanged, deleted = get_history(task, name)
+    if deleted:
+        return deleted[0]
+    return unchanged[0] if unchanged else getattr(task, name)
+
+
+def _state(task: Task, committed: bool) -> Tuple[int, bool]:
+    """(進捗, 完了かどうか)"""
+    progress = _committed(task, "progress") if committed else task.progress
+    status = _committed(task, "status") if committed else task.status
+    return progress or 0, status == "completed"
+
+
+def _find_root(session: Session, task_id: int, parent_id: Optional[int], roots: Dict[int, int]) -> int:
+    """親をたどって最上位のタスクIDを求める"""
+    path = [task_id]
+    while parent_id is not None and parent_id not in roots and len(path) < MAX_DEPTH:
+        path.append(parent_id)
+        parent_id = session.execute(select(Task.parent_task_id).where(Task.id == parent_id)).scalar()
+
+    root = roots.get(parent_id, path[-1]) if parent_id is not None else path[-1]
+    for visited in path:
+        roots[visited] = root
+    return root
+
+
+def _categories(session: Session, task_ids: Optional[List[int]]) -> Dict[int, str]:
+    """タスクごとのカテゴリID（カンマ区切り、task_idsがNoneならすべてのタスク）"""
+    categories: Dict[int, List[int]] = {}
+    if task_ids is None or task_ids:
+        query = select(task_categories.c.task_id, task_categories.c.category_id)
+        if task_ids is not None:
+            query = query.where(task_categories.c.task_id.in_(task_ids))
+        for task_id, category_id in session.execute(query):
+            categories.setdefault(task_id, []).append(category_id)
+    return {task_id: ",".join(map(str, sorted(ids))) for task_id, ids in categories.items()}
+
+
+# 親の変更前の値を履歴に残すため、代入時に古い値を読み込ませる
+event.listen(Task.parent_task_id, "set", lambda target, value, oldvalue, initiator: None, active_history=True)
+
+
+@event.listens_for(SessionLocal, "before_flush")
+def _capture_deleted_categories(session: Session, flush_context, instances):
+    """削除されるタスクのカテゴリはflushで関連と一緒に消えるので先に控えておく"""
+    deleted = [obj.id for obj in session.deleted if isinstance(obj, Task)]
+    if deleted:
+        session.info["deleted_task_categories"] = _categories(session, deleted)
+
+
+def _subtrees(session: Session, task_ids: List[int]) -> List[Tuple[int, int, int, str]]:
+    """タスクの子孫を1つの再帰CTEで取得 [(子孫のID, 祖先の移動したタスクID, 進捗, ステータス)]"""
+    child = aliased(Task)
+    tree = select(
+        Task.id, Task.parent_task_id.label("moved_id"), literal(1).label("depth"), Task.progress, Task.status
+    ).where(Task.parent_task_id.in_(task_ids)).cte("subtree", recursive=True)
+    tree = tree.union_all(
+        select(child.id, tree.c.moved_id, tree.c.depth + 1, child.progress, child.status)
+        .where(child.parent_task_id == tree.c.id, tree.c.depth < MAX_DEPTH)
+    )
+    return session.execute(select(tree.c.id, tree.c.moved_id, tree.c.progress, tree.c.status)).all()
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _record_progress_history(session: Session, flush_context):
+    """ORM経由のタスクの作成・進捗/ステータス変更・移動・削除を履歴に追記"""
+    # (タスクID, 親タスクID, 最上位タスクID（Noneなら親からたどる）, タスク数・進捗・完了数の差分)
+    changes = []
+    # {別のプロジェクトに移ったタスクのID: 移動前の最上位タスクID}
+    moved: Dict[int, int] = {}
+    for obj in session.new:
+        if isinstance(obj, Task):
+            progress, completed = _state(obj, committed=False)
+            changes.append((obj.id, obj.parent_task_id, None, 1, progress, int(completed)))
+
+    for obj in session.dirty:
+        if not isinstance(obj, Task) or obj in session.deleted:
+            continue
+        before_progress, before_completed = _state(obj, committed=True)
+        after_progress, after_completed = _state(obj, committed=False)
+        if get_history(obj, "parent_task_id").has_changes():
+            # 別のプロジェクトに移ったら、移動元から除いて移動先に加える（子孫も下で一緒に移す）
+            moved[obj.id] = _find_root(session, obj.id, _committed(obj, "parent_task_id"), {})
+            changes.append((obj.id, None, moved[obj.id], -1, -before_progress, -int(before_completed)))
+            changes.append((obj.id, obj.parent_task_id, None, 1, after_progress, int(after_completed)))
+        elif (before_progress, before_completed) != (after_progress, after_completed):
+            changes.append((obj.id, obj.parent_task_id, None, 0, after_progress - before_progress,
+                            int(after_completed) - int(before_completed)))
+
+    deleted_ids = set()
+    for obj in session.deleted:
+        if isinstance(obj, Task):
+            progress, completed = _state(obj, committed=True)
+            changes.append((obj.id, _committed(obj, "parent_task_id"), None, -1, -progress, -int(completed)))
+            deleted_ids.add(obj.id)
+
+    if moved:
+        # 子孫は親と一緒に移るので、移動前の値で移動元から除いて移動先に加える
+        # （同じflushでの子孫自身の変更は、上の差分の行が移動先に記録する）
+        pending = {obj.id: obj for obj in session.dirty | session.new if isinstance(obj, Task)}
+        for task_id, moved_id, progress, status in _subtrees(session, list(moved)):
+            obj = pending.get(task_id)
+            if obj is not None and obj in session.new:
+                continue
+            if obj is not None:
+                progress, completed = _state(obj, committed=True)
+            else:
+                progress, completed = progress or 0, status == "completed"
+            changes.append((task_id, None, moved[moved_id], -1, -progress, -int(completed)))
+            changes.append((task_id, moved_id, None, 1, progress, int(completed)))
+
+    if not changes:
+        return
+
+    categories = _categories(session, list({task_id for task_id, *_ in changes} - deleted_ids))
+    categories.update(session.info.pop("deleted_task_categories", {}))
+
+    now = datetime.utcnow()
+    roots: Dict[int, int] = {}
+    rows = []
+    for task_id, parent_id, root_id, task_delta, progress_delta, completed_delta in changes:
+        rows.append({
+            "task_id": task_id,
+            "root_task_id": root_id if root_id is not None else _find_root(session, task_id, parent_id, roots),
+            "category_ids": categories.get(task_id),
+            "recorded_at": now,
+            "task_delta": task_delta,
+            "progress_delta": progress_delta,
+            "completed_delta": completed_delta,
+        })
+
+    session.execute(insert(ProgressHistory), rows)
+
+
+def record_category_links(session: Session, pairs: Iterable[Tuple[int, int]], sign: int):
+    """カテゴリの割り当て（sign=1）・解除（sign=-1）をカテゴリのバーンダウン用に履歴へ追記"""
+    pairs = list(pairs)
+    if not pairs:
+        return
+
+    states = {
+        task_id: (progress or 0, status == "completed")
+        for task_id, progress, status in session.execute(
+            select(Task.id, Task.progress, Task.status).where(Task.id.in_({task_id for task_id, _ in pairs}))
+        )
+    }
+
+    now = datetime.utcnow()
+    rows = []
+    for task_id, category_id in pairs:
+        progress, completed = states.get(task_id, (0, False))
+        rows.append({
+            "task_id": task_id,
+            "root_task_id": None,
+            "category_ids": str(category_id),
+            "recorded_at": now,
+            "task_delta": sign,
+            "progress_delta": sign * progress,
+            "completed_delta": sign * int(completed),
+        })
+
+    session.execute(insert(ProgressHistory), rows)
+
+
+def ensure_history():
+    """履歴とバケットが空（テーブルを追加した直後など）なら、既存のタスクを今日のバケットに基準として記録
+
+    タスクごとの履歴は書かず、スコープ（全体・プロジェクト・カテゴリ）ごとの累積値を直接バケットに入れる。
+    バケットに反映済みの履歴ID（history_id）は0なので、以降の履歴はすべて未反映として積み上がる。
+    """
+    db = SessionLocal()
+    try:
+        if db.execute(select(ProgressHistory.id).limit(1)).first() is not None or \
+                db.execute(select(ProgressSnapshot.scope).limit(1)).first() is not None:
+            return
+
+        tasks = db.execute(select(Task.id, Task.parent_task_id, Task.progress, Task.status)).all()
+        if not tasks:
+            return
+
+        parents = {task_id: parent_id for task_id, parent_id, _, _ in tasks}
+        roots: Dict[int, int] = {}
+
+        def find_root(task_id: int) -> int:
+            path = [task_id]
+            while parents.get(path[-1]) is not None and path[-1] not in roots and len(path) < MAX_DEPTH:
+                path.append(parents[path[-1]])
+            root = roots.get(path[-1], path[-1])
+            for visited in path:
+                roots[visited] = root
+            return root
+
+        states = {task_id: (progress or 0, int(status == "completed")) for task_id, _, progress, status in tasks}
+        # {(スコープ, スコープID): [タスク数, 進捗合計, 完了数]}
+        totals: Dict[Tuple[str, int], List[int]] = {}
+
+        def add(scope: Tuple[str, int], task_id: int):
+            progress, completed = states[task_id]
+            total = totals.setdefault(scope, [0, 0, 0])
+            total[0] += 1
+            total[1] += progress
+            total[2] += completed
+
+        for task_id in states:
+            add(("all", 0), task_id)
+            add(("root", find_root(task_id)), task_id)
+        for task_id, category_id in db.execute(select(task_categories.c.task_id, task_categories.c.category_id)):
+            if task_id in states:
+                add(("category", category_id), task_id)
+
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        db.execute(insert(ProgressSnapshot), [
+            {"scope": scope, "scope_id": scope_id, "bucket": today, "task_count": task_count,
+             "progress_sum": progress_sum, "completed_count": completed_count, "history_id": 0}
+            for (scope, scope_id), (task_count, progress_sum, completed_count) in totals.items()
+        ])
+        db.commit()
+    finally:
+        db.close()
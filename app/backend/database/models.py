@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Table, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from backend.database.database import Base
@@ -33,6 +33,7 @@ class Task(Base):
     status = Column(String(50), default="pending")  # pending, in_progress, completed
     progress = Column(Integer, default=0)  # 0-100
     parent_task_id = Column(Integer, ForeignKey('tasks.id'), nullable=True)
+    recurrence = Column(String(255), nullable=True)  # 繰り返しルール（due_dateが次の回）
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -41,6 +42,17 @@ class Task(Base):
     categories = relationship("Category", secondary=task_categories, back_populates="tasks")
     tags = relationship("Tag", secondary=task_tags, back_populates="tasks")
     reminders = relationship("Reminder", back_populates="task", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # 「次にやるタスク」のスコア計算用の狭い射影（インデックスのみで読める）
+        Index("ix_tasks_rank", "status", "priority", "due_date", "progress", "created_at"),
+        # 親タスクごとの進捗集計・サブタスク取得用
+        Index("ix_tasks_parent", "parent_task_id", "status", "progress"),
+        # 進捗範囲の取得用（範囲の絞り込みと並び替え・キーセットページングを同じインデックスで行う）
+        Index("ix_tasks_progress", "progress", "id"),
+        Index("ix_tasks_status_progress", "status", "progress", "id"),
+        Index("ix_tasks_updated", "updated_at", "id"),
+    )
 
 
 class Category(Base):
@@ -74,6 +86,65 @@ class Reminder(Base):
     task_id = Column(Integer, ForeignKey('tasks.id'), nullable=False)
     remind_at = Column(DateTime, nullable=False)
     is_notified = Column(Boolean, default=False)
+    claimed_by = Column(String(100), nullable=True)  # 配信中のワーカーID
+    lease_until = Column(DateTime, nullable=True)  # この時刻を過ぎたら他のワーカーが再取得できる
+    attempts = Column(Integer, nullable=True, default=0)  # 配信を試みた回数
+    recurrence = Column(String(255), nullable=True)  # 繰り返しルール（remind_atが次の回）
     
     # リレーションシップ
     task = relationship("Task", back_populates="reminders")
+    
+    __table_args__ = (
+        # 未通知で期限の来たリマインダーの取得用
+        Index("ix_reminders_due", "is_notified", "remind_at"),
+    )
+
+
+class TaskStat(Base):
+    """タスク数の集計カウンタ（タスク・関連の変更と同じトランザクションで差分更新）"""
+    __tablename__ = "task_stats"
+    
+    dimension = Column(String(20), primary_key=True)  # all, status, priority, category, tag
+    key = Column(String(50), primary_key=True)  # ステータス名・優先度・カテゴリID・タグID
+    task_count = Column(Integer, nullable=False, default=0)
+    progress_sum = Column(Integer, nullable=False, default=0)  # カテゴリ・タグでは未使用
+
+
+class ProgressHistory(Base):
+    """タスクの進捗・ステータス変更の履歴（変更分の差分のみを追記）"""
+    __tablename__ = "progress_history"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    task_id = Column(Integer, nullable=False)  # タスクの削除後も残すため外部キーにしない
+    root_task_id = Column(Integer, nullable=True)  # 親をたどった最上位のタスク（カテゴリの割り当て変更ではNULL）
+    category_ids = Column(String(255), nullable=True)  # 変更時点のカテゴリID（カンマ区切り）
+    recorded_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    task_delta = Column(Integer, nullable=False, default=0)  # 作成で+1、削除で-1
+    progress_delta = Column(Integer, nullable=False, default=0)
+    completed_delta = Column(Integer, nullable=False, default=0)
+
+
+class ProgressSnapshot(Base):
+    """スコープ・日ごとの進捗の累積値（progress_historyから作成するバーンダウン用のバケット）"""
+    __tablename__ = "progress_snapshots"
+    
+    scope = Column(String(20), primary_key=True)  # all, root, category
+    scope_id = Column(Integer, primary_key=True)  # allでは0
+    bucket = Column(DateTime, primary_key=True)  # 日の開始時刻
+    task_count = Column(Integer, nullable=False, default=0)
+    progress_sum = Column(Integer, nullable=False, default=0)
+    completed_count = Column(Integer, nullable=False, default=0)
+    history_id = Column(Integer, nullable=False)  # このバケットに反映済みの最後の履歴ID
+    
+    __table_args__ = (
+        # 未反映の履歴の開始位置（MAX(history_id)）の取得用
+        Index("ix_progress_snapshots_history", "history_id"),
+    )
+
+
+class DataVersion(Base):
+    """テーブルごとの変更の版（書き込みと同じトランザクションで上げ、他のワーカープロセスでの変更の検出に使う）"""
+    __tablename__ = "data_versions"
+    
+    topic = Column(String(50), primary_key=True)  # テーブル名
+    version = Column(Integer, nullable=False, default=0)
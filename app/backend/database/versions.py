@@ -0,0 +1,150 @@
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+from backend.config import settings
+from backend.database.database import SessionLocal, upsert_increment
+from backend.database.models import Task, Category, Tag, DataVersion, task_categories, task_tags
+
+# 版を管理するテーブルと、行を削除すると一緒に消える関連テーブル
+TOPICS = {
+    Task.__tablename__: (task_tags.name, task_categories.name),
+    Tag.__tablename__: (task_tags.name,),
+    Category.__tablename__: (task_categories.name,),
+    task_tags.name: (),
+    task_categories.name: (),
+}
+
+# 関連を持つ属性と関連テーブル
+LINK_ATTRIBUTES = {
+    Task: (("tags", task_tags.name), ("categories", task_categories.name)),
+    Tag: (("tasks", task_tags.name),),
+    Category: (("tasks", task_categories.name),),
+}
+
+# このプロセスでコミットした版の更新回数（他のプロセスでの更新と区別するため）
+_own_bumps: Dict[str, int] = {}
+_own_lock = threading.Lock()
+
+
+def _bump(session: Session, topics: Iterable[str]):
+    """変更したテーブルの版を上げる（トランザクションごとに1回）"""
+    bumped = session.info.setdefault("bumped_versions", set())
+    topics = set(topics) - bumped
+    if not topics:
+        return
+    bumped |= topics
+    session.connection().execute(
+        upsert_increment(DataVersion.__table__, ["version"]),
+        [{"topic": topic, "version": 1} for topic in sorted(topics)]
+    )
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _bump_flushed(session: Session, flush_context):
+    """ORMで変更したタスク・タグ・カテゴリと関連の版を上げる"""
+    topics = set()
+    for obj in list(session.new) + list(session.dirty):
+        links = LINK_ATTRIBUTES.get(type(obj))
+        if links is None:
+            continue
+        if obj in session.new or session.is_modified(obj, include_collections=False):
+            topics.add(obj.__tablename__)
+        topics.update(topic for name, topic in links if get_history(obj, name).has_changes())
+    for obj in session.deleted:
+        if obj.__tablename__ in TOPICS:
+            topics.add(obj.__tablename__)
+            topics.update(TOPICS[obj.__tablename__])
+    _bump(session, topics)
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _bump_executed(state):
+    """INSERT・UPDATE・DELETE文で直接変更したテーブルの版を上げる"""
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    table = getattr(state.statement, "table", None)
+    name = getattr(table, "name", None)
+    if name in TOPICS:
+        _bump(state.session, (name,) + (TOPICS[name] if state.is_delete else ()))
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _count_own_bumps(session: Session):
+    """コミットした版の更新をこのプロセスの分として数える（SAVEPOINTの確定では数えない）"""
+    if session.in_nested_transaction():
+        return
+    bumped = session.info.pop("bumped_versions", None)
+    if not bumped:
+        return
+    with _own_lock:
+        for topic in bumped:
+            _own_bumps[topic] = _own_bumps.get(topic, 0) + 1
+
+
+@event.listens_for(SessionLocal, "after_soft_rollback")
+def _discard_bumps(session: Session, previous_transaction):
+    """ロールバックした版の更新は数えない
+
+    SAVEPOINTの取り消しでも全部忘れて、以降の変更で版を上げ直す（DBの版が自分の数より進むのは再構築が1回増えるだけ）。
+    """
+    session.info.pop("bumped_versions", None)
+
+
+class VersionWatch:
+    """他のワーカープロセスでのテーブルの変更を検出する
+
+    DBの版の増加分からこのプロセスでコミットした分を引き、残りがあれば他のプロセスで変更されている。
+    """
+
+    def __init__(self, *topics: str):
+        self.topics = topics
+        self._seen: Optional[Tuple[Dict[str, int], Dict[str, int]]] = None
+        # changedで読んだ版（同じセッションでの再構築ではsyncで読み直さない）
+        self._latest: Optional[Tuple[Session, Dict[str, int], Dict[str, int]]] = None
+        self._checked_at: Optional[float] = None
+
+    def _own(self) -> Dict[str, int]:
+        with _own_lock:
+            return {topic: _own_bumps.get(topic, 0) for topic in self.topics}
+
+    def _read(self, session: Session) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """DBの版とこのプロセスでの更新回数を読む
+
+        自分の分を先に読むので、その間のコミットは版のずれに見える（再構築が1回増えるだけ）。
+        """
+        own = self._own()
+        rows = session.execute(
+            select(DataVersion.topic, DataVersion.version).where(DataVersion.topic.in_(self.topics))
+        )
+        return dict(rows.all()), own
+
+    def sync(self, session: Session):
+        """現在の版を記録（DBから読み直す前に呼ぶ）"""
+        latest, self._latest = self._latest, None
+        if latest is not None and latest[0] is session:
+            self._seen = latest[1:]
+        else:
+            self._seen = self._read(session)
+        self._checked_at = time.monotonic()
+
+    def changed(self, session: Session) -> bool:
+        """前回のsync以降に他のプロセスが変更したか（INDEX_VERSION_CHECK_SECONDSごとに確認）"""
+        if self._seen is None:
+            return True
+        if time.monotonic() - self._checked_at < settings.INDEX_VERSION_CHECK_SECONDS:
+            return False
+
+        versions, own = self._read(session)
+        self._checked_at = time.monotonic()
+        self._latest = (session, versions, own)
+        seen_versions, seen_own = self._seen
+        if any(
+            versions.get(topic, 0) - seen_versions.get(topic, 0) != own[topic] - seen_own[topic]
+            for topic in self.topics
+        ):
+            return True
+        self._seen = (versions, own)
+        return False
@@ -1,60 +1,208 @@
-from fastapi import FastAPI
+import time
+
+# 読み込みにかかった時間（依存ライブラリ・ルーターの読み込みを含む）の計測開始
+_import_started = time.perf_counter()
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from backend.config import settings
-from backend.database.database import engine, Base
+from backend.core.metrics import CONTENT_TYPE, STARTUP_SECONDS, MetricsMiddleware, instrument_engine, registry
+from backend.core.module_manager import module_manager
+from backend.core.query_audit import QueryAuditMiddleware, audit_engine
+from backend.core.readiness import ReadinessProbe
+from backend.core.request_log import RequestLogMiddleware
+from backend.core.response_cache import ResponseCache, ResponseCacheMiddleware
+from backend.core.write_queue import WriteQueue
+from backend.database import engine, SessionLocal, ensure_schema, ensure_counters, ensure_history, missing_schema
 from backend.api import (
     tasks_router,
     categories_router,
     tags_router,
     reminders_router,
-    progress_router
+    progress_router,
+    bootstrap_router
 )
 
-# データベーステーブルの作成
-Base.metadata.create_all(bind=engine)
 
-# FastAPIアプリケーションの作成
-app = FastAPI(
-    title=settings.APP_NAME,
-    version=settings.APP_VERSION,
-    debug=settings.DEBUG
-)
+def prepare_database():
+    """データベースを準備（スキーマの確認と集計カウンタ・進捗履歴の初期化）"""
+    # テーブルの作成（既存のテーブルには不足している列・インデックスを追加）
+    ensure_schema()
+    # 集計カウンタ（task_stats）が未作成なら既存のタスクから作成
+    ensure_counters()
+    # 進捗履歴が空なら既存のタスクをバーンダウンの基準として記録
+    ensure_history()
 
-# CORS設定（フロントエンドからのアクセスを許可）
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # 本番環境では適切に制限すること
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
 
-# APIルーターの登録
-app.include_router(tasks_router, prefix=settings.API_PREFIX)
-app.include_router(categories_router, prefix=settings.API_PREFIX)
-app.include_router(tags_router, prefix=settings.API_PREFIX)
-app.include_router(reminders_router, prefix=settings.API_PREFIX)
-app.include_router(progress_router, prefix=settings.API_PREFIX)
+def verify_schema():
+    """スキーマが作成済みかを確認（スキーマの確認をしない起動で、古いDBのまま500を返さないように）"""
+    missing = missing_schema()
+    if missing:
+        shown = ", ".join(missing[:5]) + (", ..." if len(missing) > 5 else "")
+        raise RuntimeError(
+            f"Database schema is out of date (missing {shown}). "
+            "Start once with SCHEMA_CHECK_ON_STARTUP=true or `python -m backend.serve --check-schema`, "
+            "or call backend.main.prepare_database()"
+        )
+
+
+def snapshot_progress() -> int:
+    """未反映の進捗履歴をバーンダウンのバケットに反映（書き込みキューが有効ならキューで実行）"""
+    db = SessionLocal()
+    try:
+        module_manager.get_module("progress_history").set_db(db)
+        return module_manager.call_module("progress_history", "snapshot", {})
+    finally:
+        db.close()
+
+
+async def _run_progress_snapshots():
+    """進捗履歴のバケットへの反映を起動時に一度、その後は定期的に行う（チャートの取得では書き込まない）"""
+    while True:
+        try:
+            await asyncio.to_thread(snapshot_progress)
+        except Exception as e:
+            print(f"[progress_history] Snapshot failed: {e}")
+        if settings.PROGRESS_SNAPSHOT_INTERVAL_SECONDS <= 0:
+            return
+        await asyncio.sleep(settings.PROGRESS_SNAPSHOT_INTERVAL_SECONDS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """アプリケーションの起動・終了処理"""
+    started = time.perf_counter()
+    if app.state.check_schema:
+        await asyncio.to_thread(prepare_database)
+    else:
+        await asyncio.to_thread(verify_schema)
+    write_queue = module_manager.write_queue
+    if write_queue is not None:
+        write_queue.start()
+    reminder_dispatcher = None
+    if settings.REMINDER_DISPATCHER_ENABLED:
+        # 初期化（リマインダーの変更通知の購読）してから配信ループを開始
+        reminder_dispatcher = module_manager.get_module("reminder_dispatcher")
+        reminder_dispatcher.start()
+    # 起動前に溜まった履歴をバケットに反映しておく（チャートの取得で重ねる未反映の分を小さく保つ）
+    snapshots = asyncio.get_running_loop().create_task(_run_progress_snapshots())
+    startup_seconds = time.perf_counter() - started
+    STARTUP_SECONDS.inc(startup_seconds, ("startup",))
+    print(f"[startup] Worker {os.getpid()} ready "
+          f"(import {IMPORT_SECONDS * 1000:.0f} ms, startup {startup_seconds * 1000:.0f} ms)")
+    yield
+    snapshots.cancel()
+    if reminder_dispatcher is not None:
+        await reminder_dispatcher.stop()
+    # 受け付け済みの書き込みをコミットしてから終了する
+    if write_queue is not None:
+        await asyncio.to_thread(write_queue.stop)
+
+
+def create_app(check_schema: Optional[bool] = None) -> FastAPI:
+    """FastAPIアプリケーションを作成
+
+    check_schemaがTrueなら起動時（lifespan）にスキーマの確認と集計カウンタ・進捗履歴の初期化を行う
+    （省略時は SCHEMA_CHECK_ON_STARTUP）。Falseならテーブル・列が揃っているかだけを確認し、足りなければ起動しない。
+    モジュールは最初に呼ばれたときに初期化される。
+    """
+    # FastAPIアプリケーションの作成
+    app = FastAPI(
+        title=settings.APP_NAME,
+        version=settings.APP_VERSION,
+        debug=settings.DEBUG,
+        lifespan=lifespan
+    )
+    app.state.check_schema = settings.SCHEMA_CHECK_ON_STARTUP if check_schema is None else check_schema
+
+    # 書き込みキュー（モジュールの書き込みをまとめてコミット）
+    if settings.WRITE_QUEUE_ENABLED and module_manager.write_queue is None:
+        module_manager.set_write_queue(WriteQueue(engine, SessionLocal, settings.WRITE_QUEUE_MAX_BATCH))
+
+    # GETのレスポンスキャッシュ（CORSのヘッダーはリクエストごとに付くよう内側に追加）
+    if settings.RESPONSE_CACHE_ENABLED:
+        response_cache = ResponseCache(settings.RESPONSE_CACHE_MAX_BYTES)
+        response_cache.subscribe(module_manager)
+        app.add_middleware(ResponseCacheMiddleware, router=app.router, cache=response_cache)
+
+    # CORS設定（フロントエンドからのアクセスを許可）
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  # 本番環境では適切に制限すること
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["X-Next-Cursor"],  # 進捗範囲の取得の次ページ用カーソル
+    )
+
+    # SQLの監査（開発・テスト用）
+    if settings.QUERY_AUDIT_ENABLED:
+        audit_engine(engine)
+        app.add_middleware(QueryAuditMiddleware)
+
+    # リクエストの記録（負荷試験での再生用）
+    if settings.REQUEST_LOG_PATH:
+        app.add_middleware(RequestLogMiddleware, path=settings.REQUEST_LOG_PATH)
+
+    # メトリクスの記録（CORSの処理も含めて計測するよう外側に追加）
+    if settings.METRICS_ENABLED:
+        instrument_engine(engine)
+        app.add_middleware(MetricsMiddleware)
+
+    # APIルーターの登録
+    app.include_router(tasks_router, prefix=settings.API_PREFIX)
+    app.include_router(categories_router, prefix=settings.API_PREFIX)
+    app.include_router(tags_router, prefix=settings.API_PREFIX)
+    app.include_router(reminders_router, prefix=settings.API_PREFIX)
+    app.include_router(progress_router, prefix=settings.API_PREFIX)
+    app.include_router(bootstrap_router, prefix=settings.API_PREFIX)
+
+    @app.get("/")
+    async def root():
+        """ルートエンドポイント"""
+        return {
+            "app": settings.APP_NAME,
+            "version": settings.APP_VERSION,
+            "status": "running"
+        }
+
+    @app.get("/health")
+    async def health_check():
+        """ヘルスチェックエンドポイント"""
+        return {"status": "healthy"}
+
+    readiness = ReadinessProbe(engine)
+
+    @app.get("/ready")
+    async def readiness_check(response: Response):
+        """準備状態エンドポイント（データベースが飽和していれば503を返し、ロードバランサーに振り分けを止めさせる）"""
+        report = await readiness.check()
+        if report["status"] != "ready":
+            response.status_code = 503
+        return report
 
+    if settings.METRICS_ENABLED:
+        @app.get("/metrics", include_in_schema=False)
+        def metrics():
+            """メトリクスエンドポイント（Prometheusのテキスト形式、値はワーカープロセスごと）"""
+            return Response(content=registry.render(), media_type=CONTENT_TYPE)
 
-@app.get("/")
-async def root():
-    """ルートエンドポイント"""
-    return {
-        "app": settings.APP_NAME,
-        "version": settings.APP_VERSION,
-        "status": "running"
-    }
+    return app
 
 
-@app.get("/health")
-async def health_check():
-    """ヘルスチェックエンドポイント"""
-    return {"status": "healthy"}
+app = create_app()
+IMPORT_SECONDS = time.perf_counter() - _import_started
+STARTUP_SECONDS.inc(IMPORT_SECONDS, ("import",))
 
 
 if __name__ == "__main__":
     import uvicorn
+    # 開発サーバーは起動前にデータベースを準備する（ワーカーごとには行わない）
+    prepare_database()
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
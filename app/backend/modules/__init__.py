@@ -7,6 +7,12 @@ from backend.modules.category_manager import CategoryManagerModule
 from backend.modules.tag_manager import TagManagerModule
 from backend.modules.reminder_manager import ReminderManagerModule
 from backend.modules.progress_manager import ProgressManagerModule
+from backend.modules.progress_history import ProgressHistoryModule
+from backend.modules.task_ranker import TaskRankerModule
+from backend.modules.task_index import TaskIndexModule
+from backend.modules.tag_suggest import TagSuggestModule
+from backend.modules.tag_cooccurrence import TagCooccurrenceModule
+from backend.modules.reminder_dispatcher import ReminderDispatcherModule
 
 __all__ = [
     "TaskCRUDModule",
@@ -15,5 +21,11 @@ __all__ = [
     "CategoryManagerModule",
     "TagManagerModule",
     "ReminderManagerModule",
-    "ProgressManagerModule"
+    "ProgressManagerModule",
+    "ProgressHistoryModule",
+    "TaskRankerModule",
+    "TaskIndexModule",
+    "TagSuggestModule",
+    "TagCooccurrenceModule",
+    "ReminderDispatcherModule"
 ]
@@ -1,19 +1,31 @@
-from typing import Any, Dict, Optional, List
+from typing import Any, Dict, Optional, List, Tuple
+from sqlalchemy import select, delete, true
 from sqlalchemy.orm import Session
+from backend.config import settings
 from backend.core.base_module import BaseModule
-from backend.database.models import Category, Task
+from backend.core.module_manager import module_manager
+from backend.core.reference_cache import ReferenceCache, ReferenceSnapshot
+from backend.database.counters import record_links
+from backend.database.history import record_category_links
+from backend.database.database import insert_ignore
+from backend.database.models import Category, Task, task_categories
 
 
 class CategoryManagerModule(BaseModule):
     """カテゴリ管理モジュール"""
 
+    write_actions = frozenset({
+        "create", "update", "delete", "assign_to_task",
+        "unassign_from_task", "bulk_assign", "bulk_unassign"
+    })
+
     def __init__(self):
         super().__init__("category_manager")
         self.db: Optional[Session] = None
+        self._cache = ReferenceCache("categories", settings.REFERENCE_CACHE_TTL_SECONDS)
 
     def initialize(self) -> bool:
         """モジュールの初期化"""
-        print(f"[{self.name}] Module initialized")
         return True
 
     def set_db(self, db: Session):
@@ -31,10 +43,15 @@ class CategoryManagerModule(BaseModule):
             "create": self._create_category,
             "read": self._read_category,
             "read_all": self._read_all_categories,
+            "read_by_name": self._read_category_by_name,
+            "get_etag": self._get_etag,
+            "cache_stats": self._get_cache_stats,
             "update": self._update_category,
             "delete": self._delete_category,
             "assign_to_task": self._assign_to_task,
             "unassign_from_task": self._unassign_from_task,
+            "bulk_assign": self._bulk_assign,
+            "bulk_unassign": self._bulk_unassign,
             "get_tasks": self._get_tasks_by_category,
         }
 
@@ -54,19 +71,47 @@ class CategoryManagerModule(BaseModule):
         self.db.commit()
         self.db.refresh(category)
 
+        module_manager.after_commit(self._cache.invalidate)
+        module_manager.publish("category_created", {"category_id": category.id, "name": category.name})
+
         return category
 
-    def _read_category(self, params: Dict[str, Any]) -> Optional[Category]:
-        """カテゴリを取得"""
+    def _read_category(self, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """カテゴリを取得（キャッシュから）"""
         category_id = params.get("category_id")
         if not category_id:
             raise ValueError("category_id is required")
 
-        return self.db.query(Category).filter(Category.id == category_id).first()
+        return self._snapshot().by_id.get(category_id)
+
+    def _read_category_by_name(self, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """名前でカテゴリを取得（キャッシュから）"""
+        name = params.get("name")
+        if not name:
+            raise ValueError("name is required")
+
+        return self._snapshot().by_name.get(name)
+
+    def _read_all_categories(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """すべてのカテゴリを取得（キャッシュから）"""
+        return self._snapshot().items
 
-    def _read_all_categories(self, params: Dict[str, Any]) -> List[Category]:
-        """すべてのカテゴリを取得"""
-        return self.db.query(Category).all()
+    def _get_etag(self, params: Dict[str, Any]) -> str:
+        """カテゴリ一覧のETagを取得"""
+        return self._snapshot().etag
+
+    def _get_cache_stats(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """キャッシュの統計を取得"""
+        return self._cache.stats()
+
+    def _snapshot(self) -> ReferenceSnapshot:
+        """キャッシュ済みのカテゴリ一覧を取得（無効ならDBから読み込む）"""
+        return self._cache.get(self._load_categories)
+
+    def _load_categories(self) -> List[Dict[str, Any]]:
+        """DBからカテゴリ一覧を読み込む"""
+        rows = self.db.query(Category.id, Category.name, Category.color).order_by(Category.id).all()
+        return [{"id": row.id, "name": row.name, "color": row.color} for row in rows]
 
     def _update_category(self, params: Dict[str, Any]) -> Optional[Category]:
         """カテゴリを更新"""
@@ -87,6 +132,9 @@ class CategoryManagerModule(BaseModule):
         self.db.commit()
         self.db.refresh(category)
 
+        module_manager.after_commit(self._cache.invalidate)
+        module_manager.publish("category_updated", {"category_id": category.id, "name": category.name})
+
         return category
 
     def _delete_category(self, params: Dict[str, Any]) -> bool:
@@ -99,9 +147,20 @@ class CategoryManagerModule(BaseModule):
         if not category:
             return False
 
+        # 削除で一緒に消える関連を通知用に控えておく
+        pairs = [
+            (task_id, category_id) for (task_id,) in
+            self.db.query(task_categories.c.task_id).filter(task_categories.c.category_id == category_id)
+        ]
+
         self.db.delete(category)
         self.db.commit()
 
+        module_manager.after_commit(self._cache.invalidate)
+        if pairs:
+            module_manager.publish("categories_unassigned", {"pairs": pairs})
+        module_manager.publish("category_deleted", {"category_id": category_id})
+
         return True
 
     def _assign_to_task(self, params: Dict[str, Any]) -> bool:
@@ -112,17 +171,11 @@ class CategoryManagerModule(BaseModule):
         if not task_id or not category_id:
             raise ValueError("task_id and category_id are required")
 
-        task = self.db.query(Task).filter(Task.id == task_id).first()
-        category = self.db.query(Category).filter(Category.id == category_id).first()
-
-        if not task or not category:
-            return False
-
-        if category not in task.categories:
-            task.categories.append(category)
-            self.db.commit()
+        if self._insert_links([task_id], [category_id]):
+            return True
 
-        return True
+        # 既に割り当て済み、またはタスク・カテゴリが存在しない
+        return self._both_exist(task_id, category_id)
 
     def _unassign_from_task(self, params: Dict[str, Any]) -> bool:
         """タスクからカテゴリを解除"""
@@ -132,17 +185,94 @@ class CategoryManagerModule(BaseModule):
         if not task_id or not category_id:
             raise ValueError("task_id and category_id are required")
 
-        task = self.db.query(Task).filter(Task.id == task_id).first()
-        category = self.db.query(Category).filter(Category.id == category_id).first()
+        if self._delete_links([task_id], [category_id]):
+            return True
 
-        if not task or not category:
-            return False
+        # 割り当てられていない、またはタスク・カテゴリが存在しない
+        return self._both_exist(task_id, category_id)
 
-        if category in task.categories:
-            task.categories.remove(category)
-            self.db.commit()
+    def _bulk_assign(self, params: Dict[str, Any]) -> int:
+        """複数のカテゴリを複数のタスクに1文で割り当て（追加された件数を返す）"""
+        task_ids = params.get("task_ids")
+        category_ids = params.get("category_ids")
 
-        return True
+        if not task_ids or not category_ids:
+            raise ValueError("task_ids and category_ids are required")
+
+        return len(self._insert_links(task_ids, category_ids))
+
+    def _bulk_unassign(self, params: Dict[str, Any]) -> int:
+        """複数のカテゴリを複数のタスクから1文で解除（削除された件数を返す）"""
+        task_ids = params.get("task_ids")
+        category_ids = params.get("category_ids")
+
+        if not task_ids or not category_ids:
+            raise ValueError("task_ids and category_ids are required")
+
+        return len(self._delete_links(task_ids, category_ids))
+
+    def _insert_links(self, task_ids: List[int], category_ids: List[int]) -> List[Tuple[int, int]]:
+        """存在するタスクとカテゴリの組み合わせをtask_categoriesに追加してコミット（追加された組を返す）"""
+        source = select(Task.id, Category.id) \
+            .join_from(Task, Category, true()) \
+            .where(Task.id.in_(task_ids), Category.id.in_(category_ids))
+        statement = insert_ignore(task_categories).from_select(["task_id", "category_id"], source)
+
+        if self.db.bind.dialect.insert_returning:
+            statement = statement.returning(task_categories.c.task_id, task_categories.c.category_id)
+            pairs = [tuple(row) for row in self.db.execute(statement)]
+        else:
+            existing = set(self._select_links(task_ids, category_ids))
+            self.db.execute(statement)
+            pairs = [pair for pair in self._select_links(task_ids, category_ids) if pair not in existing]
+
+        record_links(self.db, "category", pairs, 1)
+        record_category_links(self.db, pairs, 1)
+        self.db.commit()
+
+        if pairs:
+            module_manager.publish("categories_assigned", {"pairs": pairs})
+
+        return pairs
+
+    def _delete_links(self, task_ids: List[int], category_ids: List[int]) -> List[Tuple[int, int]]:
+        """task_categoriesから組み合わせを削除してコミット（削除された組を返す）"""
+        statement = delete(task_categories).where(
+            task_categories.c.task_id.in_(task_ids),
+            task_categories.c.category_id.in_(category_ids)
+        )
+
+        if self.db.bind.dialect.delete_returning:
+            statement = statement.returning(task_categories.c.task_id, task_categories.c.category_id)
+            pairs = [tuple(row) for row in self.db.execute(statement)]
+        else:
+            pairs = self._select_links(task_ids, category_ids)
+            self.db.execute(statement)
+
+        record_links(self.db, "category", pairs, -1)
+        record_category_links(self.db, pairs, -1)
+        self.db.commit()
+
+        if pairs:
+            module_manager.publish("categories_unassigned", {"pairs": pairs})
+
+        return pairs
+
+    def _select_links(self, task_ids: List[int], category_ids: List[int]) -> List[Tuple[int, int]]:
+        """task_categoriesに存在する組み合わせを取得"""
+        rows = self.db.execute(
+            select(task_categories.c.task_id, task_categories.c.category_id).where(
+                task_categories.c.task_id.in_(task_ids),
+                task_categories.c.category_id.in_(category_ids)
+            )
+        )
+        return [tuple(row) for row in rows]
+
+    def _both_exist(self, task_id: int, category_id: int) -> bool:
+        """タスクとカテゴリが両方存在するかを確認"""
+        task_exists = self.db.query(Task.id).filter(Task.id == task_id).first() is not None
+        category_exists = self.db.query(Category.id).filter(Category.id == category_id).first() is not None
+        return task_exists and category_exists
 
     def _get_tasks_by_category(self, params: Dict[str, Any]) -> List[Task]:
         """カテゴリに属するタスクを取得"""
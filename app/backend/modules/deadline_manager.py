@@ -1,8 +1,11 @@
-from typing import Any, Dict, Optional, List
+from typing import Any, Dict, Iterator, Optional, List
 from datetime import datetime, timedelta
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
+from backend.config import settings
 from backend.core.base_module import BaseModule
 from backend.core.module_manager import module_manager
+from backend.core.recurrence import RecurrenceRule
 from backend.database.models import Task
 
 
@@ -15,7 +18,6 @@ class DeadlineManagerModule(BaseModule):
     
     def initialize(self) -> bool:
         """モジュールの初期化"""
-        print(f"[{self.name}] Module initialized")
         return True
     
     def set_db(self, db: Session):
@@ -37,6 +39,7 @@ class DeadlineManagerModule(BaseModule):
             "get_overdue_tasks": self._get_overdue_tasks,
             "get_upcoming_deadlines": self._get_upcoming_deadlines,
             "get_time_remaining": self._get_time_remaining,
+            "get_occurrences": self._get_occurrences,
         }
         
         if action not in actions:
@@ -109,44 +112,53 @@ class DeadlineManagerModule(BaseModule):
         return datetime.utcnow() > due_date
     
     def _get_overdue_tasks(self, params: Dict[str, Any]) -> List[Task]:
-        """期限切れのタスクを取得"""
-        all_tasks = module_manager.call_module(
-            "task_crud",
-            "read_all",
-            {}
-        )
-        
-        overdue_tasks = [
-            task for task in all_tasks
-            if task.due_date and datetime.utcnow() > task.due_date
-            and task.status != "completed"
-        ]
-        
-        return overdue_tasks
+        """期限切れのタスクを取得（期限の古い順）
+
+        繰り返しタスクも今より前に回があれば期限切れとする。
+        展開はカレンダーと同じで、最初の回は実体化されている未完了の回（due_date）になる。
+        """
+        return self._tasks_due_between(datetime.min, datetime.utcnow(), include_end=False)
     
     def _get_upcoming_deadlines(self, params: Dict[str, Any]) -> List[Task]:
-        """近日中の期限があるタスクを取得"""
+        """近日中の期限があるタスクを取得（期間内の最初の回が近い順）
+
+        繰り返しタスクは実体化されている回が期間より前（期限切れ）でも、
+        期間内に次の回が来れば含める。
+        """
         days = params.get("days", 7)  # デフォルトは7日以内
         
-        all_tasks = module_manager.call_module(
-            "task_crud",
-            "read_all",
-            {}
-        )
-        
         now = datetime.utcnow()
-        upcoming_deadline = now + timedelta(days=days)
-        
-        upcoming_tasks = [
-            task for task in all_tasks
-            if task.due_date and now <= task.due_date <= upcoming_deadline
-            and task.status != "completed"
-        ]
-        
-        # 期限が近い順にソート
-        upcoming_tasks.sort(key=lambda x: x.due_date)
-        
-        return upcoming_tasks
+        return self._tasks_due_between(now, now + timedelta(days=days))
+    
+    def _tasks_due_between(self, start: datetime, end: datetime, include_end: bool = True) -> List[Task]:
+        """期間内に回がある未完了のタスクを、期間内の最初の回が近い順に取得"""
+        due_dates = {}
+        for task in self._candidates(start, end):
+            # タスクごとに期間内の最初の回だけを展開する
+            due_date = next(self._expand(task, start, end, 1), None)
+            if due_date is not None and (include_end or due_date < end):
+                due_dates[task] = due_date
+        
+        return sorted(due_dates, key=lambda task: (due_dates[task], task.id))
+    
+    def _candidates(self, start: datetime, end: datetime) -> List[Task]:
+        """期間内に回がありうる未完了のタスク"""
+        # 繰り返しタスクは次の回が期間より前でも、期間内に回が来る可能性がある
+        return self.db.query(Task).filter(
+            Task.status != "completed",
+            Task.due_date <= end,
+            or_(Task.due_date >= start, Task.recurrence.isnot(None))
+        ).all()
+    
+    @staticmethod
+    def _expand(task: Task, start: datetime, end: datetime, limit: int) -> Iterator[datetime]:
+        """タスクの期間内の回（繰り返しタスクは期間内の回をその場で展開）"""
+        if not task.recurrence:
+            if start <= task.due_date <= end:
+                yield task.due_date
+            return
+        rule = RecurrenceRule.parse(task.recurrence)
+        yield from rule.occurrences(task.due_date, start, end, limit)
     
     def _get_time_remaining(self, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """タスクの残り時間を取得"""
@@ -178,3 +190,26 @@ class DeadlineManagerModule(BaseModule):
             "minutes": minutes,
             "total_seconds": abs((due_date - now).total_seconds())
         }
+    
+    def _get_occurrences(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """期間内の期限を取得（繰り返しタスクは期間内の回をその場で展開）"""
+        start = params.get("start") or datetime.utcnow()
+        end = params.get("end") or start + timedelta(days=7)
+        limit = min(params.get("limit", settings.RECURRENCE_MAX_OCCURRENCES),
+                    settings.RECURRENCE_MAX_OCCURRENCES)
+        
+        if end < start:
+            raise ValueError("end must be after start")
+        
+        occurrences = []
+        for task in self._candidates(start, end):
+            for due_date in self._expand(task, start, end, limit):
+                occurrences.append({
+                    "task": task,
+                    "due_date": due_date,
+                    # 実体化されているのは次の回（due_date）だけ
+                    "is_virtual": due_date != task.due_date,
+                })
+        
+        occurrences.sort(key=lambda occurrence: (occurrence["due_date"], occurrence["task"].id))
+        return occurrences[:limit]
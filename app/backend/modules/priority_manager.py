@@ -1,12 +1,18 @@
 from typing import Any, Dict, Optional, List
+from datetime import datetime
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 from backend.core.base_module import BaseModule
 from backend.core.module_manager import module_manager
+from backend.database.counters import record_priority_change
+from backend.database.models import Task, task_categories, task_tags
 
 
 class PriorityManagerModule(BaseModule):
     """タスクの優先度管理を行うモジュール"""
     
+    write_actions = frozenset({"bulk_set_priority"})
+    
     PRIORITY_LEVELS = {
         1: "最高",
         2: "高",
@@ -21,7 +27,6 @@ class PriorityManagerModule(BaseModule):
     
     def initialize(self) -> bool:
         """モジュールの初期化"""
-        print(f"[{self.name}] Module initialized")
         return True
     
     def set_db(self, db: Session):
@@ -41,6 +46,8 @@ class PriorityManagerModule(BaseModule):
             "get_priority_label": self._get_priority_label,
             "get_tasks_by_priority": self._get_tasks_by_priority,
             "validate_priority": self._validate_priority,
+            "get_histogram": self._get_priority_histogram,
+            "bulk_set_priority": self._bulk_set_priority,
         }
         
         if action not in actions:
@@ -110,3 +117,83 @@ class PriorityManagerModule(BaseModule):
             "read_all",
             {"priority": priority}
         )
+    
+    def _get_priority_histogram(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """優先度ごとのタスク数を集計（ステータス・カテゴリ・タグ別も可）"""
+        group_by = params.get("group_by")
+        
+        if group_by is None:
+            query = self.db.query(Task.priority, func.count(Task.id)).group_by(Task.priority)
+        elif group_by == "status":
+            query = self.db.query(Task.priority, Task.status, func.count(Task.id)) \
+                .group_by(Task.priority, Task.status)
+        elif group_by == "category":
+            query = self.db.query(Task.priority, task_categories.c.category_id, func.count(Task.id)) \
+                .join(task_categories, task_categories.c.task_id == Task.id) \
+                .group_by(Task.priority, task_categories.c.category_id)
+        elif group_by == "tag":
+            query = self.db.query(Task.priority, task_tags.c.tag_id, func.count(Task.id)) \
+                .join(task_tags, task_tags.c.task_id == Task.id) \
+                .group_by(Task.priority, task_tags.c.tag_id)
+        else:
+            raise ValueError("group_by must be one of: status, category, tag")
+        
+        histogram = []
+        for row in query.all():
+            priority, count = row[0], row[-1]
+            histogram.append({
+                "priority": priority,
+                "label": self.PRIORITY_LEVELS.get(priority),
+                "group": row[1] if group_by else None,
+                "count": count,
+            })
+        
+        histogram.sort(key=lambda entry: (entry["priority"] or 0, str(entry["group"])))
+        return histogram
+    
+    def _bulk_set_priority(self, params: Dict[str, Any]) -> int:
+        """条件に一致するすべてのタスクの優先度を1文のUPDATEで変更"""
+        priority = params.get("priority")
+        
+        if not self._validate_priority({"priority": priority}):
+            raise ValueError(f"Invalid priority level. Must be between 1 and 5")
+        
+        conditions = []
+        if params.get("status") is not None:
+            conditions.append(Task.status == params["status"])
+        if params.get("current_priority") is not None:
+            conditions.append(Task.priority == params["current_priority"])
+        if params.get("task_ids") is not None:
+            # 空のリストは「一致するタスクなし」（条件なしとして全件を変更しない）
+            if not params["task_ids"]:
+                return 0
+            conditions.append(Task.id.in_(params["task_ids"]))
+        if params.get("category_id") is not None:
+            conditions.append(Task.id.in_(
+                select(task_categories.c.task_id)
+                .where(task_categories.c.category_id == params["category_id"])
+            ))
+        if params.get("tag_id") is not None:
+            conditions.append(Task.id.in_(
+                select(task_tags.c.task_id).where(task_tags.c.tag_id == params["tag_id"])
+            ))
+        if params.get("root_only", False):
+            conditions.append(Task.parent_task_id.is_(None))
+        
+        if not conditions:
+            raise ValueError("At least one filter is required")
+        
+        # 変更前の優先度ごとの件数を同じトランザクションで集計カウンタに反映
+        groups = self.db.query(Task.priority, func.count(Task.id), func.sum(Task.progress)) \
+            .filter(*conditions).group_by(Task.priority).all()
+        record_priority_change(self.db, groups, priority)
+        
+        updated = self.db.query(Task).filter(*conditions).update(
+            {Task.priority: priority, Task.updated_at: datetime.utcnow()},
+            synchronize_session=False
+        )
+        self.db.commit()
+        
+        module_manager.publish("tasks_bulk_updated", {"count": updated})
+        
+        return updated
@@ -0,0 +1,272 @@
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, FrozenSet, Iterable, Optional, List, Tuple
+from sqlalchemy import Date, func, literal, select
+from sqlalchemy.orm import Session
+from backend.config import settings
+from backend.core.base_module import BaseModule
+from backend.database.database import upsert
+from backend.database.models import ProgressHistory, ProgressSnapshot
+
+INTERVALS = ("day", "week", "month")
+
+Scope = Tuple[str, int]
+# {(スコープ, 日): その日の終わり時点の累積値 (タスク数, 進捗合計, 完了数)}
+Buckets = Dict[Tuple[Scope, datetime], Tuple[int, int, int]]
+
+
+def _day(moment: datetime) -> datetime:
+    """日の開始時刻"""
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _interval_start(moment: datetime, interval: str) -> datetime:
+    """区間の開始時刻（週は月曜始まり）"""
+    day = _day(moment)
+    if interval == "week":
+        return day - timedelta(days=day.weekday())
+    if interval == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _next_interval(start: datetime, interval: str) -> datetime:
+    """次の区間の開始時刻"""
+    if interval == "week":
+        return start + timedelta(weeks=1)
+    if interval == "month":
+        return start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+    return start + timedelta(days=1)
+
+
+class ProgressHistoryModule(BaseModule):
+    """進捗の履歴を日ごとのバケットに集約し、バーンダウン・バーンアップを返すモジュール
+
+    履歴（progress_history）はタスクの変更と同じトランザクションで追記され、
+    未反映の分だけをスコープ（全体・プロジェクト・カテゴリ）と日ごとの累積値に反映する。
+    チャートは期間内のバケットだけを読むので、履歴の件数によらず数百行で描ける。
+    バケットへの反映（snapshot）は書き込みアクションとして定期的に行い、チャートの取得では
+    未反映の履歴をその場で重ねるだけで書き込まない。
+    """
+
+    write_actions: FrozenSet[str] = frozenset({"snapshot"})
+
+    def __init__(self):
+        super().__init__("progress_history")
+        self.db: Optional[Session] = None
+        self._lock = threading.Lock()
+
+    def initialize(self) -> bool:
+        """モジュールの初期化"""
+        return True
+
+    def set_db(self, db: Session):
+        """データベースセッションを設定"""
+        self.db = db
+
+    def execute(self, action: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """アクションの実行"""
+        if not self.db:
+            raise RuntimeError("Database session not set")
+
+        params = params or {}
+
+        actions = {
+            "snapshot": self._snapshot,
+            "burndown": self._get_burndown,
+        }
+
+        if action not in actions:
+            raise ValueError(f"Unknown action: {action}")
+
+        return actions[action](params)
+
+    def _latest(self, scope: Scope) -> List[Any]:
+        """スコープの最新バケットの [日, タスク数, 進捗合計, 完了数]"""
+        row = self.db.execute(
+            select(ProgressSnapshot.bucket, ProgressSnapshot.task_count,
+                   ProgressSnapshot.progress_sum, ProgressSnapshot.completed_count)
+            .where(ProgressSnapshot.scope == scope[0], ProgressSnapshot.scope_id == scope[1])
+            .order_by(ProgressSnapshot.bucket.desc()).limit(1)
+        ).first()
+        return list(row) if row else [None, 0, 0, 0]
+
+    def _cursor(self) -> int:
+        """バケットに反映済みの最後の履歴ID"""
+        return self.db.execute(select(func.max(ProgressSnapshot.history_id))).scalar() or 0
+
+    @staticmethod
+    def _scopes(row: ProgressHistory) -> List[Scope]:
+        """履歴の行を反映するスコープ"""
+        scopes = [("category", int(category_id))
+                  for category_id in (row.category_ids or "").split(",") if category_id]
+        if row.root_task_id is not None:
+            # カテゴリの割り当て変更の行はカテゴリだけに反映する
+            scopes += [("all", 0), ("root", row.root_task_id)]
+        return scopes
+
+    def _accumulate(self, rows: Iterable[ProgressHistory]) -> Buckets:
+        """履歴を最新のバケットの値に積み上げ、スコープ・日ごとの累積値にする"""
+        states: Dict[Scope, List[Any]] = {}
+        buckets: Buckets = {}
+        for row in rows:
+            day = _day(row.recorded_at)
+            for scope in self._scopes(row):
+                state = states.get(scope)
+                if state is None:
+                    state = states[scope] = self._latest(scope)
+                # 日付が前後した行も最新のバケットに入れ、累積値を単調に保つ
+                if state[0] is None or day > state[0]:
+                    state[0] = day
+                state[1] += row.task_delta
+                state[2] += row.progress_delta
+                state[3] += row.completed_delta
+                buckets[(scope, state[0])] = tuple(state[1:])
+        return buckets
+
+    def _snapshot(self, params: Dict[str, Any]) -> int:
+        """未反映の履歴を日ごとのバケットに反映（反映した履歴の件数を返す）
+
+        複数のワーカープロセスが同時に反映しても主キーで衝突しないよう、バケットは
+        INSERT ... ON CONFLICT DO UPDATE で書く（同じ履歴から計算した値は同じになる）。
+        """
+        batch_size = settings.PROGRESS_SNAPSHOT_BATCH_SIZE
+        applied = 0
+
+        with self._lock:
+            while True:
+                rows = self.db.execute(
+                    select(ProgressHistory).where(ProgressHistory.id > self._cursor())
+                    .order_by(ProgressHistory.id).limit(batch_size)
+                ).scalars().all()
+
+                # IDの採番順とコミット順が前後しうるので、直近の行は少し待ってから反映する
+                cutoff = datetime.utcnow() - timedelta(seconds=settings.PROGRESS_SNAPSHOT_GRACE_SECONDS)
+                for index, row in enumerate(rows):
+                    if row.recorded_at > cutoff:
+                        rows = rows[:index]
+                        break
+                if not rows:
+                    return applied
+
+                last_id = rows[-1].id
+                self.db.execute(
+                    upsert(ProgressSnapshot.__table__,
+                           ("task_count", "progress_sum", "completed_count", "history_id")),
+                    [
+                        {"scope": scope[0], "scope_id": scope[1], "bucket": bucket,
+                         "task_count": task_count, "progress_sum": progress_sum,
+                         "completed_count": completed_count, "history_id": last_id}
+                        for (scope, bucket), (task_count, progress_sum, completed_count)
+                        in self._accumulate(rows).items()
+                    ]
+                )
+                self.db.commit()
+                applied += len(rows)
+
+    def _pending(self, scope: Scope) -> Dict[datetime, Tuple[int, int, int]]:
+        """まだバケットに反映されていない履歴から計算したスコープのバケット（保存しない）
+
+        履歴の行は読まず、スコープの行をSQLで日ごとに集計してから最新のバケットの値に積み上げる。
+        """
+        day = func.date(ProgressHistory.recorded_at, type_=Date)
+        query = select(
+            day,
+            func.sum(ProgressHistory.task_delta),
+            func.sum(ProgressHistory.progress_delta),
+            func.sum(ProgressHistory.completed_delta),
+        ).where(ProgressHistory.id > self._cursor())
+        if scope[0] == "root":
+            query = query.where(ProgressHistory.root_task_id == scope[1])
+        elif scope[0] == "all":
+            query = query.where(ProgressHistory.root_task_id.is_not(None))
+        else:
+            # カンマ区切りのカテゴリIDに含まれる行（前後にカンマを付けて部分一致させる）
+            query = query.where(
+                (literal(",") + ProgressHistory.category_ids + literal(",")).like(f"%,{int(scope[1])},%")
+            )
+        rows = self.db.execute(query.group_by(day).order_by(day)).all()
+        if not rows:
+            return {}
+
+        state = self._latest(scope)
+        buckets = {}
+        for recorded_on, task_delta, progress_delta, completed_delta in rows:
+            bucket = datetime.combine(recorded_on, datetime.min.time())
+            # 日付が前後した行も最新のバケットに入れ、累積値を単調に保つ
+            if state[0] is None or bucket > state[0]:
+                state[0] = bucket
+            state[1] += task_delta
+            state[2] += progress_delta
+            state[3] += completed_delta
+            buckets[state[0]] = tuple(state[1:])
+        return buckets
+
+    def _get_burndown(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """スコープの残作業・完了量を区間ごとに取得"""
+        interval = params.get("interval") or "day"
+        if interval not in INTERVALS:
+            raise ValueError(f"interval must be one of: {', '.join(INTERVALS)}")
+
+        if params.get("root") is not None:
+            scope = ("root", params["root"])
+        elif params.get("category") is not None:
+            scope = ("category", params["category"])
+        else:
+            scope = ("all", 0)
+
+        end = params.get("to") or datetime.utcnow()
+        start = params.get("from") or end - timedelta(days=30)
+        if end < start:
+            raise ValueError("to must be after from")
+
+        starts = [_interval_start(start, interval)]
+        while _next_interval(starts[-1], interval) <= end:
+            starts.append(_next_interval(starts[-1], interval))
+        if len(starts) > settings.BURNDOWN_MAX_POINTS:
+            raise ValueError(f"Too many points ({len(starts)}); use a wider interval or a shorter range")
+
+        columns = (ProgressSnapshot.bucket, ProgressSnapshot.task_count,
+                   ProgressSnapshot.progress_sum, ProgressSnapshot.completed_count)
+        in_scope = (ProgressSnapshot.scope == scope[0], ProgressSnapshot.scope_id == scope[1])
+
+        # 期間の開始時点の値（開始より前の最後のバケット）
+        initial = self.db.execute(
+            select(*columns).where(*in_scope, ProgressSnapshot.bucket < starts[0])
+            .order_by(ProgressSnapshot.bucket.desc()).limit(1)
+        ).first()
+        saved = self.db.execute(
+            select(*columns).where(*in_scope, ProgressSnapshot.bucket >= starts[0],
+                                   ProgressSnapshot.bucket <= end)
+            .order_by(ProgressSnapshot.bucket)
+        ).all()
+
+        # 未反映の履歴の分を重ねる（保存済みのバケット以降の日にだけ現れる）
+        current = tuple(initial[1:]) if initial else (0, 0, 0)
+        merged = {row[0]: tuple(row[1:]) for row in saved}
+        for bucket, values in sorted(self._pending(scope).items()):
+            if bucket < starts[0]:
+                current = values
+            elif bucket <= end:
+                merged[bucket] = values
+        buckets = [(bucket, *values) for bucket, values in sorted(merged.items())]
+
+        points = []
+        index = 0
+        for interval_start in starts:
+            interval_end = _next_interval(interval_start, interval)
+            # 区間内の最後のバケットの累積値（なければ前の区間の値を引き継ぐ）
+            while index < len(buckets) and buckets[index][0] < interval_end:
+                current = tuple(buckets[index][1:])
+                index += 1
+            task_count, progress_sum, completed_count = current
+            points.append({
+                "bucket": interval_start,
+                "task_count": task_count,
+                "completed_count": completed_count,
+                "done": progress_sum,
+                # 1タスクを100とした残作業量
+                "remaining": task_count * 100 - progress_sum,
+            })
+
+        return points
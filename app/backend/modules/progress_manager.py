@@ -1,19 +1,33 @@
-from typing import Any, Dict, Optional, List
-from sqlalchemy.orm import Session
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, List, Tuple
+from sqlalchemy import case, func, tuple_
+from sqlalchemy.orm import Session, aliased
 from backend.core.base_module import BaseModule
-from backend.database.models import Task
+from backend.core.module_manager import module_manager
+from backend.database.counters import read_counters
+from backend.database.models import Task, Category, Tag, task_categories, task_tags
+from backend.modules.task_crud import complete_occurrence
 
 
 class ProgressManagerModule(BaseModule):
     """進捗管理モジュール"""
 
+    write_actions = frozenset({"set_progress", "increment_progress"})
+
+    # 進捗範囲の取得で指定できる並び順
+    SORT_COLUMNS = {
+        "progress": Task.progress,
+        "updated_at": Task.updated_at,
+    }
+
     def __init__(self):
         super().__init__("progress_manager")
         self.db: Optional[Session] = None
 
     def initialize(self) -> bool:
         """モジュールの初期化"""
-        print(f"[{self.name}] Module initialized")
         return True
 
     def set_db(self, db: Session):
@@ -33,6 +47,7 @@ class ProgressManagerModule(BaseModule):
             "increment_progress": self._increment_progress,
             "get_tasks_by_progress": self._get_tasks_by_progress,
             "calculate_overall_progress": self._calculate_overall_progress,
+            "get_breakdown": self._get_progress_breakdown,
         }
 
         if action not in actions:
@@ -60,9 +75,10 @@ class ProgressManagerModule(BaseModule):
 
         task.progress = progress
 
-        # 進捗が100%になった場合、ステータスを完了に変更
+        # 進捗が100%になった場合、ステータスを完了に変更（繰り返しタスクは次の回に進める）
         if progress == 100 and task.status != "completed":
             task.status = "completed"
+            complete_occurrence(task)
         # 進捗が0%より大きく100%未満の場合、ステータスを進行中に変更
         elif 0 < progress < 100 and task.status == "pending":
             task.status = "in_progress"
@@ -70,6 +86,8 @@ class ProgressManagerModule(BaseModule):
         self.db.commit()
         self.db.refresh(task)
 
+        module_manager.publish("task_updated", {"task": task})
+
         return task
 
     def _get_progress(self, params: Dict[str, Any]) -> Optional[int]:
@@ -92,53 +110,166 @@ class ProgressManagerModule(BaseModule):
         if not task_id:
             raise ValueError("task_id is required")
 
-        task = self.db.query(Task).filter(Task.id == task_id).first()
-        if not task:
+        # 読む前に行を更新して書き込みロックを取る（読んでから書くと、同時の増加が互いを上書きして失われる）。
+        # 進捗自体はORMで変更するので、集計カウンタと進捗履歴はflush時にこれまでどおり記録される
+        locked = self.db.query(Task).filter(Task.id == task_id).update(
+            {Task.updated_at: datetime.utcnow()},
+            synchronize_session=False
+        )
+        if not locked:
             return None
 
+        # ロック後の値を読み直す（セッションに古い値が残っていても上書きする）
+        task = self.db.query(Task).filter(Task.id == task_id).populate_existing().first()
+
         # 新しい進捗値を計算（最大100）
         new_progress = min(task.progress + increment, 100)
 
         return self._set_progress({"task_id": task_id, "progress": new_progress})
 
-    def _get_tasks_by_progress(self, params: Dict[str, Any]) -> List[Task]:
-        """進捗範囲でタスクを取得"""
+    def _get_tasks_by_progress(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """進捗範囲でタスクを取得（並び順を指定したキーセットページング）
+
+        (並び替えの列, id) の組をカーソルにして次のページを続きから読むため、
+        ページが深くなってもOFFSETのように読み飛ばす行が増えない。
+        """
         min_progress = params.get("min_progress", 0)
         max_progress = params.get("max_progress", 100)
+        order_by = params.get("order_by", "progress")
+        descending = params.get("direction", "asc") == "desc"
+        limit = params.get("limit", 100)
+
+        if order_by not in self.SORT_COLUMNS:
+            raise ValueError(f"order_by must be one of: {', '.join(self.SORT_COLUMNS)}")
 
-        return self.db.query(Task).filter(
+        column = self.SORT_COLUMNS[order_by]
+        query = self.db.query(Task).filter(
             Task.progress >= min_progress,
             Task.progress <= max_progress
-        ).all()
+        )
+
+        if params.get("status") is not None:
+            query = query.filter(Task.status == params["status"])
+        if params.get("priority") is not None:
+            query = query.filter(Task.priority == params["priority"])
+
+        if params.get("cursor"):
+            value, task_id = self._decode_cursor(params["cursor"], order_by)
+            key = tuple_(column, Task.id)
+            query = query.filter(key < (value, task_id) if descending else key > (value, task_id))
+
+        if descending:
+            query = query.order_by(column.desc(), Task.id.desc())
+        else:
+            query = query.order_by(column, Task.id)
+
+        # 次のページがあるかを知るため1件多く読む
+        tasks = query.limit(limit + 1).all()
+        next_cursor = None
+        if len(tasks) > limit:
+            tasks = tasks[:limit]
+            next_cursor = self._encode_cursor(getattr(tasks[-1], order_by), tasks[-1].id)
+
+        return {"tasks": tasks, "next_cursor": next_cursor}
+
+    @staticmethod
+    def _encode_cursor(value: Any, task_id: int) -> str:
+        """ページの最後の行の (並び替えの値, id) をカーソル文字列にする"""
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        body = json.dumps([value, task_id]).encode()
+        return base64.urlsafe_b64encode(body).decode().rstrip("=")
+
+    @staticmethod
+    def _decode_cursor(cursor: str, order_by: str) -> Tuple[Any, int]:
+        """カーソル文字列を (並び替えの値, id) に戻す"""
+        try:
+            body = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            value, task_id = json.loads(body)
+            if order_by == "updated_at":
+                value = datetime.fromisoformat(value)
+            return value, int(task_id)
+        except (ValueError, TypeError):
+            raise ValueError("Invalid cursor")
+
+    @staticmethod
+    def _summarize(rows: Iterable[Tuple[str, int, Optional[int]]]) -> Dict[str, Any]:
+        """ステータスごとの (件数, 進捗合計) から統計を組み立てる"""
+        counts: Dict[str, int] = {}
+        total_tasks = 0
+        total_progress = 0
+        for status, count, progress_sum in rows:
+            counts[status] = counts.get(status, 0) + count
+            total_tasks += count
+            total_progress += progress_sum or 0
+
+        return {
+            "total_tasks": total_tasks,
+            "average_progress": total_progress / total_tasks if total_tasks else 0,
+            "completed_tasks": counts.get("completed", 0),
+            "in_progress_tasks": counts.get("in_progress", 0),
+            "pending_tasks": counts.get("pending", 0)
+        }
 
     def _calculate_overall_progress(self, params: Dict[str, Any]) -> Dict[str, Any]:
-        """全体的な進捗統計を計算"""
+        """全体的な進捗統計を集計カウンタ（task_stats）のステータス別の行から計算"""
+        counters = read_counters(self.db, "status")
+
         # フィルタリング条件
-        query = self.db.query(Task)
+        if "status" in params:
+            counters = {key: value for key, value in counters.items() if key[1] == params["status"]}
+
+        return self._summarize(
+            (status, count, progress_sum) for (_, status), (count, progress_sum) in counters.items()
+        )
+
+    def _get_progress_breakdown(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """カテゴリ・タグ・親タスクごとの進捗統計を集計（タスク数の多い順、ページングもSQLで行う）"""
+        group_by = params.get("group_by")
+        limit = params.get("limit", 100)
+        offset = params.get("offset", 0)
+
+        task_count = func.count(Task.id)
+        columns = (
+            task_count,
+            func.sum(Task.progress),
+            *(func.sum(case((Task.status == status, 1), else_=0))
+              for status in ("completed", "in_progress", "pending")),
+        )
+        if group_by == "category":
+            group_id = Category.id
+            query = self.db.query(Category.id, Category.name, *columns) \
+                .join(task_categories, task_categories.c.category_id == Category.id) \
+                .join(Task, Task.id == task_categories.c.task_id) \
+                .group_by(Category.id, Category.name)
+        elif group_by == "tag":
+            group_id = Tag.id
+            query = self.db.query(Tag.id, Tag.name, *columns) \
+                .join(task_tags, task_tags.c.tag_id == Tag.id) \
+                .join(Task, Task.id == task_tags.c.task_id) \
+                .group_by(Tag.id, Tag.name)
+        elif group_by == "parent":
+            parent = aliased(Task)
+            group_id = parent.id
+            query = self.db.query(parent.id, parent.title, *columns) \
+                .join(Task, Task.parent_task_id == parent.id) \
+                .group_by(parent.id, parent.title)
+        else:
+            raise ValueError("group_by must be one of: category, tag, parent")
 
         if "status" in params:
             query = query.filter(Task.status == params["status"])
 
-        tasks = query.all()
-
-        if not tasks:
-            return {
-                "total_tasks": 0,
-                "average_progress": 0,
-                "completed_tasks": 0,
-                "in_progress_tasks": 0,
-                "pending_tasks": 0
+        query = query.order_by(task_count.desc(), group_id).offset(offset).limit(limit)
+        return [
+            {
+                "id": group_id_value,
+                "name": name,
+                "total_tasks": total,
+                "average_progress": (progress_sum or 0) / total if total else 0,
+                "completed_tasks": completed or 0,
+                "in_progress_tasks": in_progress or 0,
+                "pending_tasks": pending or 0,
             }
-
-        total_progress = sum(task.progress for task in tasks)
-        completed = sum(1 for task in tasks if task.status == "completed")
-        in_progress = sum(1 for task in tasks if task.status == "in_progress")
-        pending = sum(1 for task in tasks if task.status == "pending")
-
-        return {
-            "total_tasks": len(tasks),
-            "average_progress": total_progress / len(tasks) if tasks else 0,
-            "completed_tasks": completed,
-            "in_progress_tasks": in_progress,
-            "pending_tasks": pending
-        }
+            for group_id_value, name, total, progress_sum, completed, in_progress, pending in query
+        ]
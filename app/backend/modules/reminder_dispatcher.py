@@ -0,0 +1,261 @@
+import asyncio
+import json
+import os
+import socket
+import urllib.request
+import uuid
+from typing import Any, Dict, Optional, List, Tuple
+from datetime import datetime
+from backend.config import settings
+from backend.core.base_module import BaseModule
+from backend.core.module_manager import module_manager
+from backend.database.database import SessionLocal
+
+
+class ReminderSink:
+    """リマインダーの通知先の基底クラス"""
+
+    def send(self, reminders: List[Dict[str, Any]]):
+        """リマインダーのバッチを通知（失敗時は例外を送出）
+
+        リースが切れると同じリマインダーが再配信されることがあるため、
+        受信側は idempotency_key で重複を除く。
+        """
+        raise NotImplementedError
+
+
+class LogSink(ReminderSink):
+    """標準出力に通知"""
+
+    def send(self, reminders: List[Dict[str, Any]]):
+        for reminder in reminders:
+            print(f"[reminder] task={reminder['task_id']} remind_at={reminder['remind_at']} "
+                  f"key={reminder['idempotency_key']}")
+
+
+class FileSink(ReminderSink):
+    """JSON Lines形式でファイルに追記"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def send(self, reminders: List[Dict[str, Any]]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            for reminder in reminders:
+                f.write(json.dumps(reminder, default=str) + "\n")
+
+
+class WebhookSink(ReminderSink):
+    """バッチをJSONでWebhookにPOST"""
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, reminders: List[Dict[str, Any]]):
+        body = json.dumps({"reminders": reminders}, default=str).encode()
+        # バッチ単位の再送判定用に、含まれるキーをヘッダーにも載せる
+        batch_key = ",".join(reminder["idempotency_key"] for reminder in reminders)
+        headers = {
+            "Content-Type": "application/json",
+            "Idempotency-Key": str(uuid.uuid5(uuid.NAMESPACE_URL, batch_key)),
+        }
+        request = urllib.request.Request(self.url, data=body, headers=headers, method="POST")
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            if response.status >= 300:
+                raise RuntimeError(f"Webhook returned {response.status}")
+
+
+SINKS = {
+    "log": LogSink,
+    "file": FileSink,
+    "webhook": WebhookSink,
+}
+
+
+def create_sink(kind: str, target: str = "") -> ReminderSink:
+    """設定値から通知先を作成"""
+    if kind not in SINKS:
+        raise ValueError(f"Unknown reminder sink: {kind}")
+    if kind == "log":
+        return LogSink()
+    if not target:
+        raise ValueError(f"REMINDER_SINK_TARGET is required for '{kind}' sink")
+    return SINKS[kind](target)
+
+
+class ReminderDispatcherModule(BaseModule):
+    """期限の来たリマインダーをバッチで通知先に配信するモジュール
+
+    次のremind_atまで眠り、リマインダーの作成・更新イベントで早めに起きる。
+    DBアクセスは専用のセッションでスレッドに逃がして行う。
+    複数プロセスで動かしてもリースにより同じリマインダーを同時に取得しない。
+    配信後に通知済みにするため、配信中に落ちてもリース切れ後に再配信される（at-least-once）。
+    """
+
+    def __init__(self, sink: Optional[ReminderSink] = None, worker_id: Optional[str] = None):
+        super().__init__("reminder_dispatcher")
+        self.sink = sink
+        self.worker_id = worker_id or self._new_worker_id()
+        # 自動採番したIDの採番元プロセス（forkで引き継いだ場合の判定用）
+        self._worker_pid: Optional[int] = None if worker_id else os.getpid()
+        self.dispatched = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.next_due_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._running = False
+        self._stopping = False
+
+    def initialize(self) -> bool:
+        """モジュールの初期化"""
+        module_manager.subscribe("reminder_created", self._on_reminder_changed)
+        module_manager.subscribe("reminder_updated", self._on_reminder_changed)
+        return True
+
+    def execute(self, action: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """アクションの実行"""
+        params = params or {}
+
+        actions = {
+            "dispatch_once": self._dispatch_once,
+            "status": self._get_status,
+        }
+
+        if action not in actions:
+            raise ValueError(f"Unknown action: {action}")
+
+        return actions[action](params)
+
+    def _get_sink(self) -> ReminderSink:
+        """通知先を取得（未指定なら設定から作成）"""
+        if self.sink is None:
+            self.sink = create_sink(settings.REMINDER_SINK, settings.REMINDER_SINK_TARGET)
+        return self.sink
+
+    def _on_reminder_changed(self, payload: Dict[str, Any]):
+        """次の予定より早いリマインダーが入ったら配信ループを起こす"""
+        reminder = payload.get("reminder")
+        if reminder is None or reminder.is_notified:
+            return
+        if self.next_due_at is None or reminder.remind_at < self.next_due_at:
+            self.wake()
+
+    def wake(self):
+        """配信ループを起こす（任意のスレッドから呼べる）"""
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _dispatch_batch(self) -> Tuple[int, Optional[datetime]]:
+        """1バッチを取得・配信し、件数と次の期限を返す"""
+        db = SessionLocal()
+        try:
+            # 他の呼び出し元と同じくモジュールマネージャーを通す（書き込みキュー・メトリクス・イベントの通知）
+            module_manager.get_module("reminder_manager").set_db(db)
+
+            reminders = module_manager.call_module("reminder_manager", "claim_due", {
+                "worker_id": self.worker_id,
+                "limit": settings.REMINDER_BATCH_SIZE,
+                "lease_seconds": settings.REMINDER_LEASE_SECONDS,
+            })
+            if reminders:
+                claimed = {"worker_id": self.worker_id, "reminder_ids": [r["id"] for r in reminders]}
+                try:
+                    self._get_sink().send(reminders)
+                except Exception:
+                    module_manager.call_module("reminder_manager", "release", claimed)
+                    raise
+                module_manager.call_module("reminder_manager", "ack", claimed)
+                self.dispatched += len(reminders)
+
+            self.next_due_at = module_manager.call_module("reminder_manager", "get_next_due_at", {})
+            return len(reminders), self.next_due_at
+        finally:
+            db.close()
+
+    def _dispatch_once(self, params: Dict[str, Any]) -> int:
+        """期限の来たリマインダーがなくなるまで配信（同期実行）"""
+        total = 0
+        while True:
+            count, _ = self._dispatch_batch()
+            total += count
+            if count < settings.REMINDER_BATCH_SIZE:
+                return total
+
+    def _get_status(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """配信状況を取得"""
+        return {
+            "worker_id": self.worker_id,
+            "running": self._running,
+            "dispatched": self.dispatched,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "next_due_at": self.next_due_at,
+        }
+
+    async def run(self):
+        """配信ループ"""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._running = True
+
+        try:
+            await self._run_loop()
+        finally:
+            self._running = False
+
+    async def _run_loop(self):
+        """停止が要求されるまで配信と待機を繰り返す"""
+        while not self._stopping:
+            self._wakeup.clear()
+            try:
+                count, next_due_at = await asyncio.to_thread(self._dispatch_batch)
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                print(f"[{self.name}] Dispatch failed: {e}")
+                delay = settings.REMINDER_RETRY_SECONDS
+            else:
+                # バッチが満杯ならまだ残っているのですぐ続ける
+                if count >= settings.REMINDER_BATCH_SIZE:
+                    continue
+                delay = settings.REMINDER_MAX_SLEEP_SECONDS
+                if next_due_at is not None:
+                    until_due = (next_due_at - datetime.utcnow()).total_seconds()
+                    delay = min(max(until_due, 0.0), delay)
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    @staticmethod
+    def _new_worker_id() -> str:
+        """ホスト名・プロセスID・乱数からワーカーIDを作成"""
+        return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def start(self):
+        """実行中のイベントループで配信ループを開始"""
+        if self._worker_pid is not None and self._worker_pid != os.getpid():
+            # 読み込み済みのアプリをforkしたワーカー（serveのプリロード）は別のIDで取得する
+            self.worker_id = self._new_worker_id()
+            self._worker_pid = os.getpid()
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    def request_stop(self):
+        """配信ループに停止を要求（任意のスレッドから呼べる）"""
+        self._stopping = True
+        self.wake()
+
+    async def stop(self):
+        """配信ループを停止し、処理中のバッチの完了を待つ"""
+        self._stopping = True
+        if self._task is None:
+            return
+        self.wake()
+        await self._task
+        self._task = None
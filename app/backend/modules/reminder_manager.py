@@ -1,20 +1,48 @@
 from typing import Any, Dict, Optional, List
+from sqlalchemy import and_, case, func, or_, select, update
 from sqlalchemy.orm import Session
-from datetime import datetime
+from datetime import datetime, timedelta
+from backend.config import settings
 from backend.core.base_module import BaseModule
+from backend.core.module_manager import module_manager
+from backend.core.recurrence import RecurrenceRule, parse_recurrence
 from backend.database.models import Reminder, Task
 
 
+def complete_reminder_occurrence(reminder: Reminder, now: datetime) -> bool:
+    """繰り返しリマインダーの今回分を通知済みにし、同じ行を次の回に進める
+
+    停止中に過ぎた回はまとめて飛ばし、現在時刻より後の回に進める。
+    次の回がなければ通知済みにする。進めた場合はTrueを返す。
+    """
+    following = None
+    if reminder.recurrence:
+        following = RecurrenceRule.parse(reminder.recurrence).advance(reminder.remind_at, now)
+
+    reminder.claimed_by = None
+    reminder.lease_until = None
+    if following is None:
+        reminder.is_notified = True
+        reminder.recurrence = None
+        return False
+
+    reminder.remind_at, rule = following
+    reminder.recurrence = str(rule)
+    reminder.attempts = 0
+    return True
+
+
 class ReminderManagerModule(BaseModule):
     """リマインダー管理モジュール"""
 
+    write_actions = frozenset({"create", "update", "delete", "mark_notified", "claim_due", "ack", "release"})
+
     def __init__(self):
         super().__init__("reminder_manager")
         self.db: Optional[Session] = None
 
     def initialize(self) -> bool:
         """モジュールの初期化"""
-        print(f"[{self.name}] Module initialized")
         return True
 
     def set_db(self, db: Session):
@@ -37,6 +65,11 @@ class ReminderManagerModule(BaseModule):
             "get_by_task": self._get_reminders_by_task,
             "get_pending": self._get_pending_reminders,
             "mark_notified": self._mark_as_notified,
+            "claim_due": self._claim_due_reminders,
+            "ack": self._ack_reminders,
+            "release": self._release_reminders,
+            "get_next_due_at": self._get_next_due_at,
+            "get_occurrences": self._get_occurrences,
         }
 
         if action not in actions:
@@ -62,13 +95,16 @@ class ReminderManagerModule(BaseModule):
         reminder = Reminder(
             task_id=task_id,
             remind_at=remind_at,
-            is_notified=False
+            is_notified=False,
+            recurrence=parse_recurrence(params.get("recurrence"), remind_at)
         )
 
         self.db.add(reminder)
         self.db.commit()
         self.db.refresh(reminder)
 
+        module_manager.publish("reminder_created", {"reminder": reminder})
+
         return reminder
 
     def _read_reminder(self, params: Dict[str, Any]) -> Optional[Reminder]:
@@ -98,10 +134,16 @@ class ReminderManagerModule(BaseModule):
             reminder.remind_at = params["remind_at"]
         if "is_notified" in params:
             reminder.is_notified = params["is_notified"]
+        if "recurrence" in params or ("remind_at" in params and reminder.recurrence):
+            reminder.recurrence = parse_recurrence(
+                params.get("recurrence", reminder.recurrence), reminder.remind_at
+            )
 
         self.db.commit()
         self.db.refresh(reminder)
 
+        module_manager.publish("reminder_updated", {"reminder": reminder})
+
         return reminder
 
     def _delete_reminder(self, params: Dict[str, Any]) -> bool:
@@ -117,6 +159,8 @@ class ReminderManagerModule(BaseModule):
         self.db.delete(reminder)
         self.db.commit()
 
+        module_manager.publish("reminder_deleted", {"reminder_id": reminder_id})
+
         return True
 
     def _get_reminders_by_task(self, params: Dict[str, Any]) -> List[Reminder]:
@@ -128,12 +172,16 @@ class ReminderManagerModule(BaseModule):
         return self.db.query(Reminder).filter(Reminder.task_id == task_id).all()
 
     def _get_pending_reminders(self, params: Dict[str, Any]) -> List[Reminder]:
-        """未通知のリマインダーを取得（現在時刻より前のもの）"""
+        """未通知のリマインダーを取得（現在時刻より前のもの、limitがあれば古い順に最大limit件）"""
         now = datetime.utcnow()
-        return self.db.query(Reminder).filter(
+        query = self.db.query(Reminder).filter(
             Reminder.is_notified == False,
             Reminder.remind_at <= now
-        ).all()
+        )
+        limit = params.get("limit")
+        if limit is not None:
+            query = query.order_by(Reminder.remind_at, Reminder.id).limit(limit)
+        return query.all()
 
     def _mark_as_notified(self, params: Dict[str, Any]) -> bool:
         """リマインダーを通知済みとしてマーク"""
@@ -145,7 +193,158 @@ class ReminderManagerModule(BaseModule):
         if not reminder:
             return False
 
-        reminder.is_notified = True
+        # 繰り返しリマインダーは次の回に進める
+        complete_reminder_occurrence(reminder, datetime.utcnow())
         self.db.commit()
 
+        module_manager.publish("reminder_updated", {"reminder": reminder})
+
         return True
+
+    def _claim_due_reminders(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """期限の来たリマインダーを最大limit件、1文の条件付きUPDATEでリース付きで取得
+
+        未通知かつ未リース（またはリース切れ）の行だけを対象にするため、
+        複数のワーカーが同時に取得しても同じ行を二重に受け取らない。
+        """
+        worker_id = params.get("worker_id")
+        lease_seconds = params.get("lease_seconds", 60)
+        limit = params.get("limit", 100)
+        now = params.get("now") or datetime.utcnow()
+
+        if not worker_id:
+            raise ValueError("worker_id is required")
+
+        claimable = and_(
+            Reminder.is_notified == False,
+            Reminder.remind_at <= now,
+            or_(Reminder.lease_until.is_(None), Reminder.lease_until < now)
+        )
+        due = select(Reminder.id).where(claimable) \
+            .order_by(Reminder.remind_at).limit(limit).with_for_update(skip_locked=True)
+
+        statement = update(Reminder).where(Reminder.id.in_(due), claimable).values(
+            claimed_by=worker_id,
+            lease_until=now + timedelta(seconds=lease_seconds),
+            attempts=func.coalesce(Reminder.attempts, 0) + 1
+        )
+
+        columns = (Reminder.id, Reminder.task_id, Reminder.remind_at, Reminder.attempts)
+        if self.db.bind.dialect.update_returning:
+            rows = self.db.execute(statement.returning(*columns)).all()
+        else:
+            self.db.execute(statement)
+            rows = self.db.execute(
+                select(*columns).where(
+                    Reminder.claimed_by == worker_id,
+                    Reminder.lease_until == now + timedelta(seconds=lease_seconds)
+                )
+            ).all()
+
+        self.db.commit()
+
+        return [
+            {
+                "id": row.id,
+                "task_id": row.task_id,
+                "remind_at": row.remind_at,
+                "attempt": row.attempts,
+                # 再配信されても同じ値になるため、受信側で重複を除ける
+                "idempotency_key": f"reminder-{row.id}-{row.remind_at.isoformat()}",
+            }
+            for row in sorted(rows, key=lambda row: row.remind_at)
+        ]
+
+    def _ack_reminders(self, params: Dict[str, Any]) -> int:
+        """配信済みのリマインダーをまとめて通知済みにする（リースを持つものだけ）"""
+        worker_id = params.get("worker_id")
+        reminder_ids = params.get("reminder_ids")
+        if not worker_id or not reminder_ids:
+            raise ValueError("worker_id and reminder_ids are required")
+
+        acked = self.db.execute(
+            update(Reminder).where(
+                Reminder.id.in_(reminder_ids),
+                Reminder.claimed_by == worker_id,
+                Reminder.recurrence.is_(None)
+            ).values(is_notified=True, claimed_by=None, lease_until=None)
+        ).rowcount
+
+        # 繰り返しリマインダーは行ごとに次の回へ進める
+        now = datetime.utcnow()
+        recurring = self.db.query(Reminder).filter(
+            Reminder.id.in_(reminder_ids),
+            Reminder.claimed_by == worker_id,
+            Reminder.recurrence.isnot(None)
+        ).all()
+        advanced = [reminder for reminder in recurring if complete_reminder_occurrence(reminder, now)]
+        self.db.commit()
+
+        if acked:
+            module_manager.publish("reminders_acked", {"reminder_ids": reminder_ids})
+        for reminder in advanced:
+            module_manager.publish("reminder_updated", {"reminder": reminder})
+
+        return acked + len(recurring)
+
+    def _release_reminders(self, params: Dict[str, Any]) -> int:
+        """取得したリマインダーのリースを解放（配信失敗時）"""
+        worker_id = params.get("worker_id")
+        reminder_ids = params.get("reminder_ids")
+        if not worker_id or not reminder_ids:
+            raise ValueError("worker_id and reminder_ids are required")
+
+        released = self.db.execute(
+            update(Reminder).where(
+                Reminder.id.in_(reminder_ids),
+                Reminder.claimed_by == worker_id
+            ).values(claimed_by=None, lease_until=None)
+        ).rowcount
+        self.db.commit()
+
+        return released
+
+    def _get_next_due_at(self, params: Dict[str, Any]) -> Optional[datetime]:
+        """次に取得可能になる未通知リマインダーの時刻を取得（リース中ならリース切れの時刻）"""
+        now = datetime.utcnow()
+        available_at = case(
+            (Reminder.lease_until > now, Reminder.lease_until),
+            else_=Reminder.remind_at
+        )
+        return self.db.query(func.min(available_at)).filter(
+            Reminder.is_notified == False
+        ).scalar()
+
+    def _get_occurrences(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """期間内の未通知リマインダーを取得（繰り返しは期間内の回をその場で展開）"""
+        start = params.get("start") or datetime.utcnow()
+        end = params.get("end") or start + timedelta(days=7)
+        limit = min(params.get("limit", settings.RECURRENCE_MAX_OCCURRENCES),
+                    settings.RECURRENCE_MAX_OCCURRENCES)
+
+        if end < start:
+            raise ValueError("end must be after start")
+
+        query = self.db.query(Reminder).filter(
+            Reminder.is_notified == False,
+            Reminder.remind_at <= end,
+            or_(Reminder.remind_at >= start, Reminder.recurrence.isnot(None))
+        )
+        if params.get("task_id"):
+            query = query.filter(Reminder.task_id == params["task_id"])
+
+        occurrences = []
+        for reminder in query:
+            if not reminder.recurrence:
+                occurrences.append({"reminder": reminder, "remind_at": reminder.remind_at, "is_virtual": False})
+                continue
+            rule = RecurrenceRule.parse(reminder.recurrence)
+            for remind_at in rule.occurrences(reminder.remind_at, start, end, limit):
+                occurrences.append({
+                    "reminder": reminder,
+                    "remind_at": remind_at,
+                    "is_virtual": remind_at != reminder.remind_at,
+                })
+
+        occurrences.sort(key=lambda occurrence: (occurrence["remind_at"], occurrence["reminder"].id))
+        return occurrences[:limit]
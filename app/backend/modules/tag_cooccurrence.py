@@ -0,0 +1,204 @@
+import heapq
+import threading
+import time
+from typing import Any, Dict, Optional, List, Set, Tuple
+from sqlalchemy import BigInteger, cast, func, select
+from sqlalchemy.orm import Session
+from backend.config import settings
+from backend.core.base_module import BaseModule
+from backend.core.module_manager import module_manager
+from backend.database.models import task_tags
+from backend.database.versions import VersionWatch
+
+# 関連のチェックサム: SUM(tag_id * (task_id + CHECKSUM_OFFSET))
+# 件数が同じまま関連を付け替えても（同じタスクで別のタグ・2つのタスクでタグを交換）値が変わる
+CHECKSUM_OFFSET = 1 << 20
+
+
+class TagCooccurrenceModule(BaseModule):
+    """タグの共起回数を差分更新し、関連タグを提案するモジュール"""
+
+    # タグごとにキャッシュしておく上位件数
+    TOP_CACHE_SIZE = 50
+
+    def __init__(self):
+        super().__init__("tag_cooccurrence")
+        self.db: Optional[Session] = None
+        # 疎行列 {タグID: {共起タグID: 回数}}
+        self._matrix: Dict[int, Dict[int, int]] = {}
+        self._task_tags: Dict[int, Set[int]] = {}
+        self._link_count = 0
+        self._checksum = 0
+        # 変更のあったタグは上位リストを破棄し、次回の取得時に作り直す
+        self._top: Dict[int, List[Tuple[int, int]]] = {}
+        self._checked_at: Optional[float] = None
+        self._versions = VersionWatch(task_tags.name)
+        self._lock = threading.Lock()
+
+    def initialize(self) -> bool:
+        """モジュールの初期化"""
+        module_manager.subscribe("tags_assigned", self._on_tags_assigned)
+        module_manager.subscribe("tags_unassigned", self._on_tags_unassigned)
+        return True
+
+    def set_db(self, db: Session):
+        """データベースセッションを設定"""
+        self.db = db
+
+    def execute(self, action: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """アクションの実行"""
+        if not self.db:
+            raise RuntimeError("Database session not set")
+
+        params = params or {}
+
+        actions = {
+            "get_related": self._get_related_tags,
+            "rebuild": self._rebuild,
+        }
+
+        if action not in actions:
+            raise ValueError(f"Unknown action: {action}")
+
+        return actions[action](params)
+
+    def _add(self, tag_id: int, other_id: int, delta: int):
+        """共起回数を加算（ロック取得済みで呼ぶ）"""
+        row = self._matrix.setdefault(tag_id, {})
+        count = row.get(other_id, 0) + delta
+        if count > 0:
+            row[other_id] = count
+        else:
+            row.pop(other_id, None)
+            if not row:
+                del self._matrix[tag_id]
+        self._top.pop(tag_id, None)
+
+    def _on_tags_assigned(self, payload: Dict[str, Any]):
+        """割り当てられたタグとタスクの既存タグの共起を加算"""
+        with self._lock:
+            for task_id, tag_id in payload["pairs"]:
+                tags = self._task_tags.setdefault(task_id, set())
+                if tag_id in tags:
+                    continue
+                for other_id in tags:
+                    self._add(tag_id, other_id, 1)
+                    self._add(other_id, tag_id, 1)
+                tags.add(tag_id)
+                self._link_count += 1
+                self._checksum += self._link_checksum(task_id, tag_id)
+
+    def _on_tags_unassigned(self, payload: Dict[str, Any]):
+        """解除されたタグとタスクの残りのタグの共起を減算"""
+        with self._lock:
+            for task_id, tag_id in payload["pairs"]:
+                tags = self._task_tags.get(task_id)
+                if not tags or tag_id not in tags:
+                    continue
+                tags.discard(tag_id)
+                for other_id in tags:
+                    self._add(tag_id, other_id, -1)
+                    self._add(other_id, tag_id, -1)
+                if not tags:
+                    del self._task_tags[task_id]
+                self._link_count -= 1
+                self._checksum -= self._link_checksum(task_id, tag_id)
+
+    @staticmethod
+    def _link_checksum(task_id: int, tag_id: int) -> int:
+        """関連1件分のチェックサム"""
+        return tag_id * (task_id + CHECKSUM_OFFSET)
+
+    def _rebuild(self, params: Dict[str, Any]) -> Dict[str, int]:
+        """task_tagsをタスク順に1回走査して共起行列を作り直す"""
+        self._versions.sync(self.db)
+        matrix: Dict[int, Dict[int, int]] = {}
+        task_tag_sets: Dict[int, Set[int]] = {}
+        link_count = 0
+        checksum = 0
+
+        rows = self.db.execute(
+            select(task_tags.c.task_id, task_tags.c.tag_id)
+            .order_by(task_tags.c.task_id)
+            .execution_options(yield_per=10000)
+        )
+
+        current_task: Optional[int] = None
+        current_tags: Set[int] = set()
+        for task_id, tag_id in rows:
+            if task_id != current_task:
+                current_task = task_id
+                current_tags = task_tag_sets.setdefault(task_id, set())
+            for other_id in current_tags:
+                row = matrix.setdefault(tag_id, {})
+                row[other_id] = row.get(other_id, 0) + 1
+                row = matrix.setdefault(other_id, {})
+                row[tag_id] = row.get(tag_id, 0) + 1
+            current_tags.add(tag_id)
+            link_count += 1
+            checksum += self._link_checksum(task_id, tag_id)
+
+        with self._lock:
+            self._matrix = matrix
+            self._task_tags = task_tag_sets
+            self._link_count = link_count
+            self._checksum = checksum
+            self._top = {}
+            self._checked_at = time.monotonic()
+
+        return {"links": link_count, "tags": len(matrix)}
+
+    def _check_drift(self):
+        """他のワーカープロセスで関連が変更されたか、関連の件数・チェックサムがDBと一致しなければ再構築
+
+        件数・チェックサムは一定間隔でのみ確認する。
+        """
+        if self._checked_at is None or self._versions.changed(self.db):
+            self._rebuild({})
+            return
+
+        if time.monotonic() - self._checked_at < settings.TAG_COOCCURRENCE_CHECK_SECONDS:
+            return
+
+        link_count, checksum = self.db.execute(
+            select(
+                func.count(),
+                func.coalesce(func.sum(cast(task_tags.c.tag_id, BigInteger) * (task_tags.c.task_id + CHECKSUM_OFFSET)), 0)
+            ).select_from(task_tags)
+        ).one()
+        if link_count != self._link_count or checksum != self._checksum:
+            self._rebuild({})
+        else:
+            self._checked_at = time.monotonic()
+
+    def _get_related_tags(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """共起回数の多い関連タグを上位k件取得"""
+        tag_id = params.get("tag_id")
+        k = params.get("k", 10)
+
+        if not tag_id:
+            raise ValueError("tag_id is required")
+
+        self._check_drift()
+
+        with self._lock:
+            top = self._top.get(tag_id)
+            if top is None:
+                row = self._matrix.get(tag_id, {})
+                top = heapq.nsmallest(
+                    self.TOP_CACHE_SIZE, row.items(), key=lambda item: (-item[1], item[0])
+                )
+                self._top[tag_id] = top
+
+        if k > len(top) and len(top) == self.TOP_CACHE_SIZE:
+            with self._lock:
+                row = dict(self._matrix.get(tag_id, {}))
+            top = heapq.nsmallest(k, row.items(), key=lambda item: (-item[1], item[0]))
+
+        related = []
+        for other_id, count in top[:k]:
+            tag = module_manager.call_module("tag_manager", "read", {"tag_id": other_id})
+            if tag:
+                related.append({"id": other_id, "name": tag["name"], "count": count})
+
+        return related
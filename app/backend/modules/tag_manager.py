@@ -1,19 +1,30 @@
-from typing import Any, Dict, Optional, List
+from typing import Any, Dict, Optional, List, Tuple
+from sqlalchemy import select, delete, true
 from sqlalchemy.orm import Session
+from backend.config import settings
 from backend.core.base_module import BaseModule
-from backend.database.models import Tag, Task
+from backend.core.module_manager import module_manager
+from backend.core.reference_cache import ReferenceCache, ReferenceSnapshot
+from backend.database.counters import record_links
+from backend.database.database import insert_ignore
+from backend.database.models import Tag, Task, task_tags
 
 
 class TagManagerModule(BaseModule):
     """タグ管理モジュール"""
 
+    write_actions = frozenset({
+        "create", "update", "delete", "assign_to_task",
+        "unassign_from_task", "bulk_assign", "bulk_unassign"
+    })
+
     def __init__(self):
         super().__init__("tag_manager")
         self.db: Optional[Session] = None
+        self._cache = ReferenceCache("tags", settings.REFERENCE_CACHE_TTL_SECONDS)
 
     def initialize(self) -> bool:
         """モジュールの初期化"""
-        print(f"[{self.name}] Module initialized")
         return True
 
     def set_db(self, db: Session):
@@ -31,10 +42,15 @@ class TagManagerModule(BaseModule):
             "create": self._create_tag,
             "read": self._read_tag,
             "read_all": self._read_all_tags,
+            "read_by_name": self._read_tag_by_name,
+            "get_etag": self._get_etag,
+            "cache_stats": self._get_cache_stats,
             "update": self._update_tag,
             "delete": self._delete_tag,
             "assign_to_task": self._assign_to_task,
             "unassign_from_task": self._unassign_from_task,
+            "bulk_assign": self._bulk_assign,
+            "bulk_unassign": self._bulk_unassign,
             "get_tasks": self._get_tasks_by_tag,
         }
 
@@ -51,19 +67,47 @@ class TagManagerModule(BaseModule):
         self.db.commit()
         self.db.refresh(tag)
 
+        module_manager.after_commit(self._cache.invalidate)
+        module_manager.publish("tag_created", {"tag_id": tag.id, "name": tag.name})
+
         return tag
 
-    def _read_tag(self, params: Dict[str, Any]) -> Optional[Tag]:
-        """タグを取得"""
+    def _read_tag(self, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """タグを取得（キャッシュから）"""
         tag_id = params.get("tag_id")
         if not tag_id:
             raise ValueError("tag_id is required")
 
-        return self.db.query(Tag).filter(Tag.id == tag_id).first()
+        return self._snapshot().by_id.get(tag_id)
+
+    def _read_tag_by_name(self, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """名前でタグを取得（キャッシュから）"""
+        name = params.get("name")
+        if not name:
+            raise ValueError("name is required")
+
+        return self._snapshot().by_name.get(name)
+
+    def _read_all_tags(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """すべてのタグを取得（キャッシュから）"""
+        return self._snapshot().items
 
-    def _read_all_tags(self, params: Dict[str, Any]) -> List[Tag]:
-        """すべてのタグを取得"""
-        return self.db.query(Tag).all()
+    def _get_etag(self, params: Dict[str, Any]) -> str:
+        """タグ一覧のETagを取得"""
+        return self._snapshot().etag
+
+    def _get_cache_stats(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """キャッシュの統計を取得"""
+        return self._cache.stats()
+
+    def _snapshot(self) -> ReferenceSnapshot:
+        """キャッシュ済みのタグ一覧を取得（無効ならDBから読み込む）"""
+        return self._cache.get(self._load_tags)
+
+    def _load_tags(self) -> List[Dict[str, Any]]:
+        """DBからタグ一覧を読み込む"""
+        rows = self.db.query(Tag.id, Tag.name).order_by(Tag.id).all()
+        return [{"id": row.id, "name": row.name} for row in rows]
 
     def _update_tag(self, params: Dict[str, Any]) -> Optional[Tag]:
         """タグを更新"""
@@ -82,6 +126,9 @@ class TagManagerModule(BaseModule):
         self.db.commit()
         self.db.refresh(tag)
 
+        module_manager.after_commit(self._cache.invalidate)
+        module_manager.publish("tag_updated", {"tag_id": tag.id, "name": tag.name})
+
         return tag
 
     def _delete_tag(self, params: Dict[str, Any]) -> bool:
@@ -94,9 +141,20 @@ class TagManagerModule(BaseModule):
         if not tag:
             return False
 
+        # 削除で一緒に消える関連を通知用に控えておく
+        pairs = [
+            (task_id, tag_id) for (task_id,) in
+            self.db.query(task_tags.c.task_id).filter(task_tags.c.tag_id == tag_id)
+        ]
+
         self.db.delete(tag)
         self.db.commit()
 
+        module_manager.after_commit(self._cache.invalidate)
+        if pairs:
+            module_manager.publish("tags_unassigned", {"pairs": pairs})
+        module_manager.publish("tag_deleted", {"tag_id": tag_id})
+
         return True
 
     def _assign_to_task(self, params: Dict[str, Any]) -> bool:
@@ -107,17 +165,11 @@ class TagManagerModule(BaseModule):
         if not task_id or not tag_id:
             raise ValueError("task_id and tag_id are required")
 
-        task = self.db.query(Task).filter(Task.id == task_id).first()
-        tag = self.db.query(Tag).filter(Tag.id == tag_id).first()
-
-        if not task or not tag:
-            return False
-
-        if tag not in task.tags:
-            task.tags.append(tag)
-            self.db.commit()
+        if self._insert_links([task_id], [tag_id]):
+            return True
 
-        return True
+        # 既に割り当て済み、またはタスク・タグが存在しない
+        return self._both_exist(task_id, tag_id)
 
     def _unassign_from_task(self, params: Dict[str, Any]) -> bool:
         """タスクからタグを解除"""
@@ -127,17 +179,92 @@ class TagManagerModule(BaseModule):
         if not task_id or not tag_id:
             raise ValueError("task_id and tag_id are required")
 
-        task = self.db.query(Task).filter(Task.id == task_id).first()
-        tag = self.db.query(Tag).filter(Tag.id == tag_id).first()
+        if self._delete_links([task_id], [tag_id]):
+            return True
 
-        if not task or not tag:
-            return False
+        # 割り当てられていない、またはタスク・タグが存在しない
+        return self._both_exist(task_id, tag_id)
 
-        if tag in task.tags:
-            task.tags.remove(tag)
-            self.db.commit()
+    def _bulk_assign(self, params: Dict[str, Any]) -> int:
+        """複数のタグを複数のタスクに1文で割り当て（追加された件数を返す）"""
+        task_ids = params.get("task_ids")
+        tag_ids = params.get("tag_ids")
 
-        return True
+        if not task_ids or not tag_ids:
+            raise ValueError("task_ids and tag_ids are required")
+
+        return len(self._insert_links(task_ids, tag_ids))
+
+    def _bulk_unassign(self, params: Dict[str, Any]) -> int:
+        """複数のタグを複数のタスクから1文で解除（削除された件数を返す）"""
+        task_ids = params.get("task_ids")
+        tag_ids = params.get("tag_ids")
+
+        if not task_ids or not tag_ids:
+            raise ValueError("task_ids and tag_ids are required")
+
+        return len(self._delete_links(task_ids, tag_ids))
+
+    def _insert_links(self, task_ids: List[int], tag_ids: List[int]) -> List[Tuple[int, int]]:
+        """存在するタスクとタグの組み合わせをtask_tagsに追加してコミット（追加された組を返す）"""
+        source = select(Task.id, Tag.id) \
+            .join_from(Task, Tag, true()) \
+            .where(Task.id.in_(task_ids), Tag.id.in_(tag_ids))
+        statement = insert_ignore(task_tags).from_select(["task_id", "tag_id"], source)
+
+        if self.db.bind.dialect.insert_returning:
+            statement = statement.returning(task_tags.c.task_id, task_tags.c.tag_id)
+            pairs = [tuple(row) for row in self.db.execute(statement)]
+        else:
+            existing = set(self._select_links(task_ids, tag_ids))
+            self.db.execute(statement)
+            pairs = [pair for pair in self._select_links(task_ids, tag_ids) if pair not in existing]
+
+        record_links(self.db, "tag", pairs, 1)
+        self.db.commit()
+
+        if pairs:
+            module_manager.publish("tags_assigned", {"pairs": pairs})
+
+        return pairs
+
+    def _delete_links(self, task_ids: List[int], tag_ids: List[int]) -> List[Tuple[int, int]]:
+        """task_tagsから組み合わせを削除してコミット（削除された組を返す）"""
+        statement = delete(task_tags).where(
+            task_tags.c.task_id.in_(task_ids),
+            task_tags.c.tag_id.in_(tag_ids)
+        )
+
+        if self.db.bind.dialect.delete_returning:
+            statement = statement.returning(task_tags.c.task_id, task_tags.c.tag_id)
+            pairs = [tuple(row) for row in self.db.execute(statement)]
+        else:
+            pairs = self._select_links(task_ids, tag_ids)
+            self.db.execute(statement)
+
+        record_links(self.db, "tag", pairs, -1)
+        self.db.commit()
+
+        if pairs:
+            module_manager.publish("tags_unassigned", {"pairs": pairs})
+
+        return pairs
+
+    def _select_links(self, task_ids: List[int], tag_ids: List[int]) -> List[Tuple[int, int]]:
+        """task_tagsに存在する組み合わせを取得"""
+        rows = self.db.execute(
+            select(task_tags.c.task_id, task_tags.c.tag_id).where(
+                task_tags.c.task_id.in_(task_ids),
+                task_tags.c.tag_id.in_(tag_ids)
+            )
+        )
+        return [tuple(row) for row in rows]
+
+    def _both_exist(self, task_id: int, tag_id: int) -> bool:
+        """タスクとタグが両方存在するかを確認"""
+        task_exists = self.db.query(Task.id).filter(Task.id == task_id).first() is not None
+        tag_exists = self.db.query(Tag.id).filter(Tag.id == tag_id).first() is not None
+        return task_exists and tag_exists
 
     def _get_tasks_by_tag(self, params: Dict[str, Any]) -> List[Task]:
         """タグに属するタスクを取得"""
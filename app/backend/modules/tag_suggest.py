@@ -0,0 +1,196 @@
+import bisect
+import heapq
+import threading
+import time
+from typing import Any, Dict, Optional, List, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from backend.config import settings
+from backend.core.base_module import BaseModule
+from backend.core.module_manager import module_manager
+from backend.database.models import Tag, task_tags
+from backend.database.versions import VersionWatch
+
+
+# この長さ以下の接頭辞（空と1文字）は使用回数順の一覧を保持し、範囲を走査せずに先頭を返す
+RANKED_PREFIX_LENGTH = 1
+
+# 使用回数順の一覧の要素（-使用回数, 小文字化した名前, タグID）。昇順で使用回数の多い順になる
+RankEntry = Tuple[int, str, int]
+
+
+class TagSuggestModule(BaseModule):
+    """タグ名の前方一致候補を使用回数順に返すモジュール
+
+    入力し始めの短い接頭辞は一致するタグが多いので、接頭辞ごとに使用回数順の一覧を保持する。
+    それより長い接頭辞は一致する範囲をbisectで求め、その中から上位を選ぶ。
+    """
+
+    def __init__(self):
+        super().__init__("tag_suggest")
+        self.db: Optional[Session] = None
+        # (小文字化した名前, タグID) の昇順配列。前方一致の範囲をbisectで求める
+        self._keys: List[Tuple[str, int]] = []
+        self._names: Dict[int, str] = {}
+        self._usage: Dict[int, int] = {}
+        # {短い接頭辞: 使用回数順の一覧}（タグの作成・削除・名前変更と割り当ての増減で更新）
+        self._ranked: Dict[str, List[RankEntry]] = {}
+        self._loaded_at: Optional[float] = None
+        self._versions = VersionWatch(Tag.__tablename__, task_tags.name)
+        self._lock = threading.Lock()
+
+    def initialize(self) -> bool:
+        """モジュールの初期化"""
+        module_manager.subscribe("tag_created", self._on_tag_saved)
+        module_manager.subscribe("tag_updated", self._on_tag_saved)
+        module_manager.subscribe("tag_deleted", self._on_tag_deleted)
+        module_manager.subscribe("tags_assigned", self._on_tags_assigned)
+        module_manager.subscribe("tags_unassigned", self._on_tags_unassigned)
+        return True
+
+    def set_db(self, db: Session):
+        """データベースセッションを設定"""
+        self.db = db
+
+    def execute(self, action: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """アクションの実行"""
+        if not self.db:
+            raise RuntimeError("Database session not set")
+
+        params = params or {}
+
+        actions = {
+            "suggest": self._suggest,
+            "rebuild": self._rebuild,
+        }
+
+        if action not in actions:
+            raise ValueError(f"Unknown action: {action}")
+
+        return actions[action](params)
+
+    @staticmethod
+    def _short_prefixes(key: str) -> List[str]:
+        """使用回数順の一覧を保持する、名前の短い接頭辞"""
+        return [key[:length] for length in range(min(len(key), RANKED_PREFIX_LENGTH) + 1)]
+
+    def _rank_entry(self, tag_id: int) -> RankEntry:
+        """使用回数順の一覧の要素（ロック取得済みで呼ぶ）"""
+        return -self._usage.get(tag_id, 0), self._names[tag_id].casefold(), tag_id
+
+    def _rank(self, tag_id: int):
+        """短い接頭辞の一覧にタグを入れる（ロック取得済みで呼ぶ）"""
+        entry = self._rank_entry(tag_id)
+        for prefix in self._short_prefixes(entry[1]):
+            bisect.insort(self._ranked.setdefault(prefix, []), entry)
+
+    def _unrank(self, tag_id: int):
+        """短い接頭辞の一覧からタグを取り除く（ロック取得済みで呼ぶ）"""
+        if tag_id not in self._names:
+            return
+        entry = self._rank_entry(tag_id)
+        for prefix in self._short_prefixes(entry[1]):
+            ranked = self._ranked.get(prefix, [])
+            index = bisect.bisect_left(ranked, entry)
+            if index < len(ranked) and ranked[index] == entry:
+                del ranked[index]
+
+    def _remove_key(self, tag_id: int):
+        """配列と一覧からタグを取り除く（ロック取得済みで呼ぶ）"""
+        self._unrank(tag_id)
+        name = self._names.pop(tag_id, None)
+        if name is None:
+            return
+        key = (name.casefold(), tag_id)
+        index = bisect.bisect_left(self._keys, key)
+        if index < len(self._keys) and self._keys[index] == key:
+            del self._keys[index]
+
+    def _on_tag_saved(self, payload: Dict[str, Any]):
+        """タグの作成・名前変更を反映"""
+        tag_id = payload["tag_id"]
+        with self._lock:
+            self._remove_key(tag_id)
+            self._names[tag_id] = payload["name"]
+            bisect.insort(self._keys, (payload["name"].casefold(), tag_id))
+            self._rank(tag_id)
+
+    def _on_tag_deleted(self, payload: Dict[str, Any]):
+        """タグの削除を反映"""
+        with self._lock:
+            self._remove_key(payload["tag_id"])
+            self._usage.pop(payload["tag_id"], None)
+
+    def _add_usage(self, tag_id: int, delta: int):
+        """使用回数を増減し、一覧での位置を更新（ロック取得済みで呼ぶ）"""
+        count = self._usage.get(tag_id, 0)
+        if count + delta < 0:
+            return
+        self._unrank(tag_id)
+        self._usage[tag_id] = count + delta
+        if tag_id in self._names:
+            self._rank(tag_id)
+
+    def _on_tags_assigned(self, payload: Dict[str, Any]):
+        """割り当てられたタグの使用回数を増やす"""
+        with self._lock:
+            for _, tag_id in payload["pairs"]:
+                self._add_usage(tag_id, 1)
+
+    def _on_tags_unassigned(self, payload: Dict[str, Any]):
+        """解除されたタグの使用回数を減らす"""
+        with self._lock:
+            for _, tag_id in payload["pairs"]:
+                self._add_usage(tag_id, -1)
+
+    def _rebuild(self, params: Dict[str, Any]) -> int:
+        """tags.name と使用回数から索引を再構築"""
+        self._versions.sync(self.db)
+        names = {tag_id: name for tag_id, name in self.db.query(Tag.id, Tag.name)}
+        usage = {
+            tag_id: count for tag_id, count in
+            self.db.query(task_tags.c.tag_id, func.count()).group_by(task_tags.c.tag_id)
+        }
+        keys = sorted((name.casefold(), tag_id) for tag_id, name in names.items())
+        ranked: Dict[str, List[RankEntry]] = {}
+        for entry in sorted((-usage.get(tag_id, 0), key, tag_id) for key, tag_id in keys):
+            for prefix in self._short_prefixes(entry[1]):
+                ranked.setdefault(prefix, []).append(entry)
+
+        with self._lock:
+            self._names = names
+            self._usage = usage
+            self._keys = keys
+            self._ranked = ranked
+            self._loaded_at = time.monotonic()
+
+        return len(keys)
+
+    def _suggest(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """前方一致するタグを使用回数の多い順に取得"""
+        prefix = (params.get("prefix") or "").casefold()
+        limit = params.get("limit", 10)
+
+        if self._loaded_at is None or \
+                time.monotonic() - self._loaded_at > settings.TAG_SUGGEST_REFRESH_SECONDS or \
+                self._versions.changed(self.db):
+            self._rebuild({})
+
+        with self._lock:
+            if len(prefix) <= RANKED_PREFIX_LENGTH:
+                # 短い接頭辞は一致するタグが多いので、保持している使用回数順の一覧の先頭を返す
+                tag_ids = [tag_id for _, _, tag_id in self._ranked.get(prefix, [])[:limit]]
+            else:
+                start = bisect.bisect_left(self._keys, (prefix,))
+                # 前方一致する範囲の終端（prefixの直後の文字列）
+                end = bisect.bisect_left(self._keys, (prefix + "\U0010ffff",))
+                top = heapq.nsmallest(
+                    limit,
+                    self._keys[start:end],
+                    key=lambda key: (-self._usage.get(key[1], 0), key[0])
+                )
+                tag_ids = [tag_id for _, tag_id in top]
+            return [
+                {"id": tag_id, "name": self._names[tag_id], "usage_count": self._usage.get(tag_id, 0)}
+                for tag_id in tag_ids
+            ]
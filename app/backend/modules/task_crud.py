@@ -1,20 +1,45 @@
 from typing import Any, Dict, Optional, List
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from datetime import datetime
 from backend.core.base_module import BaseModule
-from backend.database.models import Task, Category, Tag
+from backend.core.module_manager import module_manager
+from backend.core.recurrence import RecurrenceRule, parse_recurrence
+from backend.database.counters import read_counters
+from backend.database.models import Task, Category, Tag, task_tags, task_categories
+
+
+def complete_occurrence(task: Task) -> bool:
+    """繰り返しタスクの今回分を完了し、同じ行を次の回に進める
+
+    次の回がなければ通常のタスクとして完了のままにする。進めた場合はTrueを返す。
+    """
+    if not task.recurrence or task.due_date is None:
+        return False
+    
+    following = RecurrenceRule.parse(task.recurrence).advance(task.due_date)
+    if following is None:
+        task.recurrence = None
+        return False
+    
+    task.due_date, rule = following
+    task.recurrence = str(rule)
+    task.status = "pending"
+    task.progress = 0
+    return True
 
 
 class TaskCRUDModule(BaseModule):
     """タスクのCRUD操作を管理するモジュール"""
     
+    write_actions = frozenset({"create", "update", "delete", "add_subtask"})
+    
     def __init__(self):
         super().__init__("task_crud")
         self.db: Optional[Session] = None
     
     def initialize(self) -> bool:
         """モジュールの初期化"""
-        print(f"[{self.name}] Module initialized")
         return True
     
     def set_db(self, db: Session):
@@ -36,6 +61,7 @@ class TaskCRUDModule(BaseModule):
             "delete": self._delete_task,
             "add_subtask": self._add_subtask,
             "get_subtasks": self._get_subtasks,
+            "get_facets": self._get_facets,
         }
         
         if action not in actions:
@@ -52,13 +78,16 @@ class TaskCRUDModule(BaseModule):
             due_date=params.get("due_date"),
             status=params.get("status", "pending"),
             progress=params.get("progress", 0),
-            parent_task_id=params.get("parent_task_id")
+            parent_task_id=params.get("parent_task_id"),
+            recurrence=parse_recurrence(params.get("recurrence"), params.get("due_date"))
         )
         
         self.db.add(task)
         self.db.commit()
         self.db.refresh(task)
         
+        module_manager.publish("task_created", {"task": task})
+        
         return task
     
     def _read_task(self, params: Dict[str, Any]) -> Optional[Task]:
@@ -71,8 +100,16 @@ class TaskCRUDModule(BaseModule):
     
     def _read_all_tasks(self, params: Dict[str, Any]) -> List[Task]:
         """すべてのタスクを取得（フィルタリングオプション付き）"""
-        query = self.db.query(Task)
+        query = self._apply_filters(self.db.query(Task), params)
+        
+        # ページング
+        if params.get("limit") is not None:
+            query = query.order_by(Task.id).offset(params.get("offset", 0)).limit(params["limit"])
         
+        return query.all()
+    
+    def _apply_filters(self, query, params: Dict[str, Any]):
+        """一覧取得と同じフィルタ条件をクエリに適用"""
         # ステータスフィルタ
         if "status" in params:
             query = query.filter(Task.status == params["status"])
@@ -85,7 +122,41 @@ class TaskCRUDModule(BaseModule):
         if params.get("root_only", False):
             query = query.filter(Task.parent_task_id.is_(None))
         
-        return query.all()
+        return query
+    
+    def _get_facets(self, params: Dict[str, Any]) -> Dict[str, Dict[Any, int]]:
+        """フィルタ条件下でのステータス・優先度・タグ・カテゴリ別のタスク数を集計"""
+        facets = {"status": {}, "priority": {}, "tags": {}, "categories": {}}
+        
+        # 絞り込みがなければ集計カウンタ（task_stats）から読む
+        if not any(params.get(key) for key in ("status", "priority", "root_only")):
+            names = {"status": "status", "priority": "priority", "tag": "tags", "category": "categories"}
+            for (dimension, key), (count, _) in read_counters(self.db, *names).items():
+                if count:
+                    facets[names[dimension]][key if dimension == "status" else int(key)] = count
+            return facets
+        
+        # ステータスと優先度は1回のGROUP BYから両方を求める
+        rows = self._apply_filters(
+            self.db.query(Task.status, Task.priority, func.count(Task.id)), params
+        ).group_by(Task.status, Task.priority).all()
+        for status, priority, count in rows:
+            facets["status"][status] = facets["status"].get(status, 0) + count
+            facets["priority"][priority] = facets["priority"].get(priority, 0) + count
+        
+        rows = self._apply_filters(
+            self.db.query(task_tags.c.tag_id, func.count(Task.id))
+            .join(Task, Task.id == task_tags.c.task_id), params
+        ).group_by(task_tags.c.tag_id).all()
+        facets["tags"] = {tag_id: count for tag_id, count in rows}
+        
+        rows = self._apply_filters(
+            self.db.query(task_categories.c.category_id, func.count(Task.id))
+            .join(Task, Task.id == task_categories.c.task_id), params
+        ).group_by(task_categories.c.category_id).all()
+        facets["categories"] = {category_id: count for category_id, count in rows}
+        
+        return facets
     
     def _update_task(self, params: Dict[str, Any]) -> Optional[Task]:
         """タスクを更新"""
@@ -107,10 +178,19 @@ class TaskCRUDModule(BaseModule):
             if field in params:
                 setattr(task, field, params[field])
         
+        if "recurrence" in params or ("due_date" in params and task.recurrence):
+            task.recurrence = parse_recurrence(params.get("recurrence", task.recurrence), task.due_date)
+        
+        # 繰り返しタスクを完了にしたら次の回に進める
+        if params.get("status") == "completed":
+            complete_occurrence(task)
+        
         task.updated_at = datetime.utcnow()
         self.db.commit()
         self.db.refresh(task)
         
+        module_manager.publish("task_updated", {"task": task})
+        
         return task
     
     def _delete_task(self, params: Dict[str, Any]) -> bool:
@@ -123,9 +203,25 @@ class TaskCRUDModule(BaseModule):
         if not task:
             return False
         
+        # 削除で一緒に消える関連を通知用に控えておく
+        tag_pairs = [
+            (task_id, tag_id) for (tag_id,) in
+            self.db.query(task_tags.c.tag_id).filter(task_tags.c.task_id == task_id)
+        ]
+        category_pairs = [
+            (task_id, category_id) for (category_id,) in
+            self.db.query(task_categories.c.category_id).filter(task_categories.c.task_id == task_id)
+        ]
+        
         self.db.delete(task)
         self.db.commit()
         
+        if tag_pairs:
+            module_manager.publish("tags_unassigned", {"pairs": tag_pairs})
+        if category_pairs:
+            module_manager.publish("categories_unassigned", {"pairs": category_pairs})
+        module_manager.publish("task_deleted", {"task_id": task_id})
+        
         return True
     
     def _add_subtask(self, params: Dict[str, Any]) -> Task:
@@ -0,0 +1,215 @@
+import threading
+import time
+from typing import Any, Dict, Optional, List, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from backend.config import settings
+from backend.core.base_module import BaseModule
+from backend.core.bitmap import Bitmap
+from backend.core.module_manager import module_manager
+from backend.database.models import Task, task_tags, task_categories
+from backend.database.versions import VersionWatch
+
+
+class TaskIndexModule(BaseModule):
+    """タグ・カテゴリのビットマップインデックスで論理式検索を行うモジュール"""
+
+    def __init__(self):
+        super().__init__("task_index")
+        self.db: Optional[Session] = None
+        self._all = Bitmap()
+        self._tags: Dict[int, Bitmap] = {}
+        self._categories: Dict[int, Bitmap] = {}
+        self._loaded_at: Optional[float] = None
+        self._versions = VersionWatch(Task.__tablename__, task_tags.name, task_categories.name)
+        self._lock = threading.Lock()
+
+    def initialize(self) -> bool:
+        """モジュールの初期化"""
+        module_manager.subscribe("task_created", self._on_task_created)
+        module_manager.subscribe("task_deleted", self._on_task_deleted)
+        module_manager.subscribe("tags_assigned", self._on_tags_assigned)
+        module_manager.subscribe("tags_unassigned", self._on_tags_unassigned)
+        module_manager.subscribe("categories_assigned", self._on_categories_assigned)
+        module_manager.subscribe("categories_unassigned", self._on_categories_unassigned)
+        module_manager.subscribe("tag_deleted", self._on_tag_deleted)
+        module_manager.subscribe("category_deleted", self._on_category_deleted)
+        return True
+
+    def set_db(self, db: Session):
+        """データベースセッションを設定"""
+        self.db = db
+
+    def execute(self, action: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """アクションの実行"""
+        if not self.db:
+            raise RuntimeError("Database session not set")
+
+        params = params or {}
+
+        actions = {
+            "query": self._query_tasks,
+            "rebuild": self._rebuild,
+        }
+
+        if action not in actions:
+            raise ValueError(f"Unknown action: {action}")
+
+        return actions[action](params)
+
+    def _on_task_created(self, payload: Dict[str, Any]):
+        """タスク作成時に全体集合へ追加"""
+        with self._lock:
+            self._all.add(payload["task"].id)
+
+    def _on_task_deleted(self, payload: Dict[str, Any]):
+        """タスク削除時に全体集合から除外（関連は解除イベントで反映済み）"""
+        with self._lock:
+            self._all.discard(payload["task_id"])
+
+    def _on_tags_assigned(self, payload: Dict[str, Any]):
+        """タグ割り当て時にビットを立てる"""
+        with self._lock:
+            for task_id, tag_id in payload["pairs"]:
+                self._tags.setdefault(tag_id, Bitmap()).add(task_id)
+
+    def _on_tags_unassigned(self, payload: Dict[str, Any]):
+        """タグ解除時にビットを落とす"""
+        with self._lock:
+            for task_id, tag_id in payload["pairs"]:
+                if tag_id in self._tags:
+                    self._tags[tag_id].discard(task_id)
+
+    def _on_categories_assigned(self, payload: Dict[str, Any]):
+        """カテゴリ割り当て時にビットを立てる"""
+        with self._lock:
+            for task_id, category_id in payload["pairs"]:
+                self._categories.setdefault(category_id, Bitmap()).add(task_id)
+
+    def _on_categories_unassigned(self, payload: Dict[str, Any]):
+        """カテゴリ解除時にビットを落とす"""
+        with self._lock:
+            for task_id, category_id in payload["pairs"]:
+                if category_id in self._categories:
+                    self._categories[category_id].discard(task_id)
+
+    def _on_tag_deleted(self, payload: Dict[str, Any]):
+        """タグ削除時にビットマップを破棄"""
+        with self._lock:
+            self._tags.pop(payload["tag_id"], None)
+
+    def _on_category_deleted(self, payload: Dict[str, Any]):
+        """カテゴリ削除時にビットマップを破棄"""
+        with self._lock:
+            self._categories.pop(payload["category_id"], None)
+
+    def _rebuild(self, params: Dict[str, Any]) -> Dict[str, int]:
+        """task_tags / task_categories を1回走査してビットマップを再構築"""
+        self._versions.sync(self.db)
+        all_tasks = Bitmap(row[0] for row in self.db.execute(select(Task.id)))
+
+        tags: Dict[int, Bitmap] = {}
+        for task_id, tag_id in self.db.execute(select(task_tags.c.task_id, task_tags.c.tag_id)):
+            tags.setdefault(tag_id, Bitmap()).add(task_id)
+
+        categories: Dict[int, Bitmap] = {}
+        rows = self.db.execute(select(task_categories.c.task_id, task_categories.c.category_id))
+        for task_id, category_id in rows:
+            categories.setdefault(category_id, Bitmap()).add(task_id)
+
+        with self._lock:
+            self._all = all_tasks
+            self._tags = tags
+            self._categories = categories
+            self._loaded_at = time.monotonic()
+
+        return {"tasks": len(all_tasks), "tags": len(tags), "categories": len(categories)}
+
+    def _ensure_loaded(self):
+        """未構築・古くなった・他のワーカープロセスで変更されたインデックスを再構築"""
+        if self._loaded_at is None or \
+                time.monotonic() - self._loaded_at > settings.TASK_INDEX_REFRESH_SECONDS or \
+                self._versions.changed(self.db):
+            self._rebuild({})
+
+    @staticmethod
+    def _split(expression: Any) -> Tuple[str, Any]:
+        """式を演算子と被演算子に分ける（演算子がちょうど1つの辞書でなければValueError）"""
+        if not isinstance(expression, dict) or len(expression) != 1:
+            raise ValueError("Each expression must be an object with exactly one operator")
+        return next(iter(expression.items()))
+
+    def evaluate(self, expression: Dict[str, Any], depth: int = 0) -> Bitmap:
+        """論理式を評価して一致するタスクIDのビットマップを返す
+
+        式の例: {"and": [{"tag": 1}, {"tag": 2}, {"not": {"tag": 3}}, {"category": 5}]}
+        """
+        if depth >= settings.TASK_QUERY_MAX_DEPTH:
+            raise ValueError(f"Expression is nested deeper than {settings.TASK_QUERY_MAX_DEPTH} levels")
+
+        operator, operand = self._split(expression)
+
+        if operator in ("tag", "category"):
+            # IDは整数だけ（"1"や[1]は一致するものがない・ハッシュできないので400にする、boolはintだが除く）
+            if not isinstance(operand, int) or isinstance(operand, bool):
+                raise ValueError(f"'{operator}' requires an integer id")
+            return (self._tags if operator == "tag" else self._categories).get(operand, Bitmap())
+        if operator == "not":
+            return self._all - self.evaluate(operand, depth + 1)
+        if operator in ("and", "or"):
+            if not isinstance(operand, list) or not operand:
+                raise ValueError(f"'{operator}' requires a non-empty list")
+            if operator == "or":
+                result = Bitmap()
+                for child in operand:
+                    result = result | self.evaluate(child, depth + 1)
+                return result
+            return self._evaluate_and(operand, depth)
+
+        raise ValueError(f"Unknown operator: {operator}")
+
+    def _evaluate_and(self, operands: List[Dict[str, Any]], depth: int) -> Bitmap:
+        """AND式を評価（NOTは全体集合との差ではなく直接差し引く）"""
+        negatives = []
+        positives = []
+        for child in operands:
+            # 振り分ける前に検証する（{"not": ..., "tag": ...} のような式をNOTとして扱わない）
+            operator, operand = self._split(child)
+            if operator == "not":
+                negatives.append(operand)
+            else:
+                positives.append(child)
+
+        if positives:
+            bitmaps = sorted((self.evaluate(child, depth + 1) for child in positives), key=len)
+            result = bitmaps[0]
+            for bitmap in bitmaps[1:]:
+                result = result & bitmap
+        else:
+            result = self._all
+
+        for child in negatives:
+            # NOTの中身はNOT式1段分だけ深い
+            result = result - self.evaluate(child, depth + 2)
+
+        return result
+
+    def _query_tasks(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """論理式に一致するタスクを取得"""
+        expression = params.get("filter")
+        if not expression:
+            raise ValueError("filter is required")
+
+        limit = params.get("limit", 100)
+        offset = params.get("offset", 0)
+
+        self._ensure_loaded()
+
+        with self._lock:
+            matched = self.evaluate(expression) & self._all
+            task_ids = matched.slice(offset, limit)
+
+        tasks = self.db.query(Task).filter(Task.id.in_(task_ids)).order_by(Task.id).all() \
+            if task_ids else []
+
+        return {"total": len(matched), "tasks": tasks}
@@ -0,0 +1,170 @@
+import heapq
+import threading
+import time
+from typing import Any, Dict, Optional, List, Tuple
+from datetime import datetime
+from sqlalchemy.orm import Session
+from backend.config import settings
+from backend.core.base_module import BaseModule
+from backend.core.module_manager import module_manager
+from backend.database.models import Task
+from backend.database.versions import VersionWatch
+from backend.modules.priority_manager import PriorityManagerModule
+
+# 候補セットの1行: (priority, due_date, progress, created_at)
+Candidate = Tuple[Optional[int], Optional[datetime], Optional[int], Optional[datetime]]
+
+
+class TaskRankerModule(BaseModule):
+    """「次にやるタスク」をスコア順に選ぶモジュール"""
+
+    def __init__(self):
+        super().__init__("task_ranker")
+        self.db: Optional[Session] = None
+        self._candidates: Dict[int, Candidate] = {}
+        self._loaded_at: Optional[float] = None
+        self._versions = VersionWatch(Task.__tablename__)
+        self._lock = threading.Lock()
+
+    def initialize(self) -> bool:
+        """モジュールの初期化"""
+        module_manager.subscribe("task_created", self._on_task_changed)
+        module_manager.subscribe("task_updated", self._on_task_changed)
+        module_manager.subscribe("task_deleted", self._on_task_deleted)
+        module_manager.subscribe("tasks_bulk_updated", self._on_tasks_bulk_updated)
+        return True
+
+    def set_db(self, db: Session):
+        """データベースセッションを設定"""
+        self.db = db
+
+    def execute(self, action: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """アクションの実行"""
+        if not self.db:
+            raise RuntimeError("Database session not set")
+
+        params = params or {}
+
+        actions = {
+            "get_next": self._get_next_tasks,
+            "rebuild": self._rebuild,
+        }
+
+        if action not in actions:
+            raise ValueError(f"Unknown action: {action}")
+
+        return actions[action](params)
+
+    def _on_task_changed(self, payload: Dict[str, Any]):
+        """タスクの作成・更新時に候補セットを更新"""
+        task = payload.get("task")
+        if task is None:
+            return
+
+        with self._lock:
+            if task.status == "completed":
+                self._candidates.pop(task.id, None)
+            else:
+                self._candidates[task.id] = (
+                    task.priority, task.due_date, task.progress, task.created_at
+                )
+
+    def _on_task_deleted(self, payload: Dict[str, Any]):
+        """タスクの削除時に候補セットから除外"""
+        with self._lock:
+            self._candidates.pop(payload.get("task_id"), None)
+
+    def _on_tasks_bulk_updated(self, payload: Dict[str, Any]):
+        """一括更新時は次回の取得で候補セットを再構築させる"""
+        with self._lock:
+            self._loaded_at = None
+
+    def _rebuild(self, params: Dict[str, Any]) -> int:
+        """未完了タスクの射影から候補セットを再構築"""
+        self._versions.sync(self.db)
+        rows = self.db.query(
+            Task.id, Task.priority, Task.due_date, Task.progress, Task.created_at
+        ).filter(Task.status != "completed").all()
+
+        with self._lock:
+            self._candidates = {row[0]: tuple(row[1:]) for row in rows}
+            self._loaded_at = time.monotonic()
+
+        return len(rows)
+
+    def _is_stale(self) -> bool:
+        """候補セットの再構築が必要かを判定（期限切れか、他のワーカープロセスでタスクが変更された）"""
+        if self._loaded_at is None:
+            return True
+        if time.monotonic() - self._loaded_at > settings.NEXT_UP_REFRESH_SECONDS:
+            return True
+        return self._versions.changed(self.db)
+
+    def _get_weights(self, params: Dict[str, Any]) -> Dict[str, float]:
+        """スコアの重みを取得（パラメータで上書き可能）"""
+        weights = {
+            "priority": settings.NEXT_UP_WEIGHT_PRIORITY,
+            "due": settings.NEXT_UP_WEIGHT_DUE,
+            "progress": settings.NEXT_UP_WEIGHT_PROGRESS,
+            "age": settings.NEXT_UP_WEIGHT_AGE,
+        }
+        for key, value in (params.get("weights") or {}).items():
+            if key not in weights:
+                raise ValueError(f"Unknown weight: {key}")
+            if value is not None:
+                weights[key] = value
+        return weights
+
+    def _score(self, candidate: Candidate, now: datetime, weights: Dict[str, float]) -> float:
+        """タスクのスコアを計算（大きいほど優先）"""
+        priority, due_date, progress, created_at = candidate
+
+        levels = PriorityManagerModule.PRIORITY_LEVELS
+        highest, lowest = min(levels), max(levels)
+        priority_score = (lowest - (priority or 3)) / (lowest - highest)
+
+        # 期限が近いほど1に近づき、期限切れは1
+        due_score = 0.0
+        if due_date:
+            days_left = (due_date - now).total_seconds() / 86400
+            due_score = 1.0 if days_left <= 0 else 1.0 / (1.0 + days_left)
+
+        progress_score = (progress or 0) / 100
+
+        age_score = 0.0
+        if created_at:
+            age_days = max((now - created_at).total_seconds() / 86400, 0.0)
+            age_score = min(age_days / settings.NEXT_UP_AGE_HORIZON_DAYS, 1.0)
+
+        return (
+            weights["priority"] * priority_score
+            + weights["due"] * due_score
+            + weights["progress"] * progress_score
+            + weights["age"] * age_score
+        )
+
+    def _get_next_tasks(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """スコア上位k件のタスクを取得"""
+        k = params.get("k", 20)
+        if k <= 0:
+            raise ValueError("k must be positive")
+
+        weights = self._get_weights(params)
+
+        if self._is_stale():
+            self._rebuild({})
+
+        now = datetime.utcnow()
+        with self._lock:
+            candidates = list(self._candidates.items())
+
+        # 上位k件のみをサイズkのヒープで保持する
+        top = heapq.nlargest(
+            k, ((self._score(candidate, now, weights), task_id) for task_id, candidate in candidates)
+        )
+        scores = {task_id: score for score, task_id in top}
+
+        tasks = self.db.query(Task).filter(Task.id.in_(list(scores))).all()
+        tasks.sort(key=lambda task: scores[task.id], reverse=True)
+
+        return [{"task": task, "score": round(scores[task.id], 4)} for task in tasks]
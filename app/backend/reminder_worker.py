@@ -0,0 +1,46 @@
+"""リマインダー配信ワーカー
+
+アプリとは別プロセスでリマインダーを配信する:
+    python -m backend.reminder_worker --sink file --target reminders.jsonl
+"""
+import argparse
+import asyncio
+import signal
+from backend.config import settings
+from backend.core.module_manager import module_manager
+from backend.modules.reminder_dispatcher import ReminderDispatcherModule, create_sink
+from backend.modules.reminder_manager import ReminderManagerModule
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ToDoApp reminder dispatcher")
+    parser.add_argument("--sink", default=settings.REMINDER_SINK, help="log, file, webhook")
+    parser.add_argument("--target", default=settings.REMINDER_SINK_TARGET, help="file path or webhook URL")
+    parser.add_argument("--once", action="store_true", help="dispatch due reminders once and exit")
+    args = parser.parse_args()
+
+    # 配信ループはモジュールマネージャー経由でリマインダーを取得・確定する
+    module_manager.register_module(ReminderManagerModule())
+    dispatcher = ReminderDispatcherModule(sink=create_sink(args.sink, args.target))
+
+    if args.once:
+        count = dispatcher.execute("dispatch_once")
+        print(f"[{dispatcher.name}] Dispatched {count} reminders")
+        return
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, dispatcher.request_stop)
+            except NotImplementedError:
+                # Windowsではシグナルハンドラを登録できない（Ctrl+Cで終了）
+                pass
+        await dispatcher.run()
+
+    print(f"[{dispatcher.name}] Worker started (sink={args.sink})")
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
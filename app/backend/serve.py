@@ -0,0 +1,190 @@
+"""本番用サーバー
+
+アプリを一度読み込んでから（プリロード）ワーカープロセスをforkし、同じソケットで受け付ける:
+    python -m backend.serve --workers 4 --port 8000
+
+--check-schema を付けると、スキーマの確認と集計カウンタの初期化を親プロセスで一度だけ行う。
+SIGTERM/SIGINTを受けると各ワーカーは新しい接続の受け付けをやめ、
+処理中のリクエストを終えてから終了する（SERVER_GRACEFUL_TIMEOUT_SECONDSまで待つ）。
+forkできない環境（Windows）では1プロセスで動かす。
+"""
+import argparse
+import os
+import signal
+import socket
+import time
+from typing import Set
+import uvicorn
+from backend.config import settings
+
+# ワーカーが異常終了したときに起動し直すまでの待ち時間（起動直後に落ち続ける場合の空回り防止）
+RESPAWN_DELAY_SECONDS = 1.0
+
+
+def _bind(host: str, port: int, backlog: int) -> socket.socket:
+    """ワーカーで共有する待ち受けソケットを作成"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _create_server(app, args: argparse.Namespace) -> uvicorn.Server:
+    """ワーカー1つ分のサーバーを作成"""
+    config = uvicorn.Config(
+        app,
+        backlog=args.backlog,
+        timeout_keep_alive=args.keep_alive,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        limit_concurrency=settings.SERVER_LIMIT_CONCURRENCY,
+        access_log=settings.DEBUG,
+    )
+    return uvicorn.Server(config)
+
+
+def _run_worker(app, sock: socket.socket, args: argparse.Namespace):
+    """forkしたワーカーでサーバーを実行（戻らない）"""
+    from backend.database import engine
+
+    # 親のシグナルハンドラを引き継がない（サーバーが自分のハンドラを登録する）
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    # 親プロセスの接続をワーカー間で共有しない（プールだけ捨て、接続は閉じない）
+    engine.dispose(close=False)
+
+    code = 0
+    try:
+        _create_server(app, args).run(sockets=[sock])
+    except BaseException as e:
+        print(f"[serve] Worker {os.getpid()} failed: {e}")
+        code = 1
+    os._exit(code)
+
+
+class Supervisor:
+    """ワーカープロセスを起動・監視し、終了時に順に止める"""
+
+    def __init__(self, app, sock: socket.socket, args: argparse.Namespace):
+        self.app = app
+        self.sock = sock
+        self.args = args
+        self.workers: Set[int] = set()
+        self.stopping = False
+
+    def spawn(self):
+        """ワーカーを1つ起動"""
+        pid = os.fork()
+        if pid == 0:
+            _run_worker(self.app, self.sock, self.args)
+        self.workers.add(pid)
+        print(f"[serve] Started worker {pid}")
+
+    def request_stop(self, signum, frame):
+        """シグナルハンドラ（停止を要求）"""
+        self.stopping = True
+
+    def run(self):
+        """ワーカーを起動し、停止が要求されるまで落ちたワーカーを起動し直す"""
+        signal.signal(signal.SIGINT, self.request_stop)
+        signal.signal(signal.SIGTERM, self.request_stop)
+
+        for _ in range(self.args.workers):
+            self.spawn()
+
+        while not self.stopping:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                pid, status = 0, 0
+            if pid == 0:
+                time.sleep(0.5)
+                continue
+            self.workers.discard(pid)
+            if not self.stopping:
+                print(f"[serve] Worker {pid} exited (status {status}), restarting")
+                time.sleep(RESPAWN_DELAY_SECONDS)
+                self.spawn()
+
+        self.shutdown()
+
+    def shutdown(self):
+        """ワーカーに終了を伝え、処理中のリクエストが終わるのを待つ"""
+        print(f"[serve] Shutting down {len(self.workers)} workers")
+        for pid in self.workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+        # ワーカー側の猶予に少し足した時間だけ待ち、残ったワーカーは強制終了する
+        deadline = time.monotonic() + self.args.graceful_timeout + 5
+        while self.workers and time.monotonic() < deadline:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid:
+                self.workers.discard(pid)
+            else:
+                time.sleep(0.1)
+
+        for pid in self.workers:
+            print(f"[serve] Killing worker {pid}")
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ToDoApp production server")
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=settings.SERVER_WORKERS,
+                        help="number of worker processes (0 = CPU count)")
+    parser.add_argument("--backlog", type=int, default=settings.SERVER_BACKLOG)
+    parser.add_argument("--keep-alive", type=int, default=settings.SERVER_KEEP_ALIVE_SECONDS,
+                        help="seconds to keep idle connections open")
+    parser.add_argument("--graceful-timeout", type=int, default=settings.SERVER_GRACEFUL_TIMEOUT_SECONDS,
+                        help="seconds to wait for in-flight requests on shutdown")
+    parser.add_argument("--check-schema", action="store_true", default=settings.SCHEMA_CHECK_ON_STARTUP,
+                        help="create missing tables, columns and counters before starting the workers")
+    args = parser.parse_args()
+    args.workers = args.workers or os.cpu_count() or 1
+
+    if settings.DEBUG:
+        print("[serve] Warning: DEBUG is enabled; set DEBUG=false for production")
+
+    # プリロード: アプリの読み込み（とデータベースの準備）をfork前に一度だけ行う
+    from backend.main import app, prepare_database, verify_schema
+    from backend.database import engine
+    if args.check_schema:
+        prepare_database()
+    else:
+        # 古いDBならワーカーを起動する前に止める
+        try:
+            verify_schema()
+        except RuntimeError as e:
+            raise SystemExit(f"[serve] {e}")
+    # ワーカーごとの起動処理では行わない
+    app.state.check_schema = False
+    engine.dispose()
+
+    sock = _bind(args.host, args.port, args.backlog)
+    print(f"[serve] Listening on {args.host}:{args.port} with {args.workers} workers")
+
+    try:
+        if args.workers == 1 or not hasattr(os, "fork"):
+            _create_server(app, args).run(sockets=[sock])
+        else:
+            Supervisor(app, sock, args).run()
+    finally:
+        sock.close()
+
+
+if __name__ == "__main__":
+    main()
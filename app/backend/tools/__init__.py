@@ -0,0 +1 @@
+"""開発・検証用のツール群（アプリ本体からはimportしない）"""
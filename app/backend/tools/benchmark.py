@@ -0,0 +1,325 @@
+"""APIのベンチマーク
+
+合成データセット（backend.tools.dataset）を投入し、各ルーターに固定のシナリオを
+アプリ内（TestClient）で実行して、スループットとp50/p99レイテンシをJSONに出力する:
+    python -m backend.tools.benchmark --tasks 10k --output bench.json
+    python -m backend.tools.benchmark --tasks 100k --requests 500 --only tasks. --only progress.
+    python -m backend.tools.benchmark --compare before.json after.json
+
+データベースを指定しなければ一時的なSQLiteファイルに投入する。件数と --seed が同じなら
+同じデータ・同じリクエストになるので、コミット間で結果を比較できる。
+書き込みのシナリオはデータを変更するため、読み取りのシナリオの後に実行する。
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+# {"tasks": (最小ID, 最大ID), "tags": ..., "categories": ...}
+Ids = Dict[str, Tuple[int, int]]
+
+
+class Scenario(NamedTuple):
+    """ベンチマークのシナリオ（1リクエスト分のパス・本文を乱数から作る）"""
+    name: str
+    method: str
+    path: Callable[[random.Random, Ids], str]
+    body: Optional[Callable[[random.Random, Ids], Any]] = None
+    # --requests に対する実行回数の比率（結果が大きいルートは少なめに実行する）
+    weight: float = 1.0
+    concurrency: int = 1
+    write: bool = False
+
+
+def _pick(rng: random.Random, ids: Ids, kind: str) -> int:
+    """ランダムなID"""
+    low, high = ids[kind]
+    return rng.randint(low, high)
+
+
+SCENARIOS = [
+    # タスク
+    Scenario("tasks.list", "GET", lambda rng, ids: f"/tasks/?limit=100&offset={rng.randrange(0, 1000)}"),
+    Scenario("tasks.filter", "GET",
+             lambda rng, ids: f"/tasks/?status={rng.choice(['pending', 'in_progress'])}"
+                              f"&priority={rng.randint(1, 5)}&limit=100"),
+    Scenario("tasks.facets", "GET", lambda rng, ids: "/tasks/?facets=true&limit=50"),
+    Scenario("tasks.get", "GET", lambda rng, ids: f"/tasks/{_pick(rng, ids, 'tasks')}"),
+    Scenario("tasks.subtasks", "GET", lambda rng, ids: f"/tasks/{_pick(rng, ids, 'tasks')}/subtasks"),
+    Scenario("tasks.next", "GET", lambda rng, ids: "/tasks/next?k=20"),
+    Scenario("tasks.query", "POST", lambda rng, ids: "/tasks/query",
+             lambda rng, ids: {"filter": {"and": [{"tag": _pick(rng, ids, "tags")},
+                                                  {"not": {"tag": _pick(rng, ids, "tags")}}]},
+                               "limit": 100}),
+    Scenario("tasks.calendar", "GET", lambda rng, ids: "/tasks/calendar"),
+    Scenario("tasks.priority_histogram", "GET", lambda rng, ids: "/tasks/priority/histogram"),
+    Scenario("tasks.overdue", "GET", lambda rng, ids: "/tasks/overdue/list", weight=0.05),
+    Scenario("tasks.upcoming", "GET", lambda rng, ids: "/tasks/upcoming/list?days=7", weight=0.2),
+    # タグ・カテゴリ
+    Scenario("tags.list", "GET", lambda rng, ids: "/tags/"),
+    Scenario("tags.tasks", "GET", lambda rng, ids: f"/tags/{_pick(rng, ids, 'tags')}/tasks", weight=0.2),
+    Scenario("tags.related", "GET", lambda rng, ids: f"/tags/{_pick(rng, ids, 'tags')}/related"),
+    # 前方一致の候補: 入力し始めの短い接頭辞（ほぼ全件が一致）と、数件に絞り込まれる接頭辞
+    Scenario("tags.suggest_short", "GET", lambda rng, ids: f"/tags/suggest?prefix={rng.choice(['', 't'])}"),
+    Scenario("tags.suggest", "GET",
+             lambda rng, ids: f"/tags/suggest?prefix=tag-{_pick(rng, ids, 'tags') // 10:04d}"),
+    Scenario("categories.list", "GET", lambda rng, ids: "/categories/"),
+    Scenario("categories.tasks", "GET",
+             lambda rng, ids: f"/categories/{_pick(rng, ids, 'categories')}/tasks", weight=0.05),
+    # リマインダー
+    Scenario("reminders.pending", "GET", lambda rng, ids: "/reminders/pending", weight=0.2),
+    Scenario("reminders.calendar", "GET", lambda rng, ids: "/reminders/calendar"),
+    # 進捗
+    Scenario("progress.stats", "GET", lambda rng, ids: "/progress/stats"),
+    Scenario("progress.breakdown", "GET",
+             lambda rng, ids: f"/progress/stats/breakdown?group_by={rng.choice(['category', 'tag', 'parent'])}"),
+    Scenario("progress.range", "GET",
+             lambda rng, ids: f"/progress/tasks/range/list?min_progress=20&max_progress=80&limit=100"
+                              f"&order_by={rng.choice(['progress', 'updated_at'])}"),
+    Scenario("progress.burndown", "GET", lambda rng, ids: "/progress/burndown"),
+    # 書き込み
+    Scenario("tasks.create", "POST", lambda rng, ids: "/tasks/",
+             lambda rng, ids: {"title": "benchmark", "priority": rng.randint(1, 5)}, write=True),
+    Scenario("tasks.update", "PUT", lambda rng, ids: f"/tasks/{_pick(rng, ids, 'tasks')}",
+             lambda rng, ids: {"title": f"updated {rng.randrange(1000000)}"}, write=True),
+    Scenario("progress.update", "PUT", lambda rng, ids: f"/progress/tasks/{_pick(rng, ids, 'tasks')}",
+             lambda rng, ids: {"progress": rng.randint(0, 100)}, write=True),
+    Scenario("tags.assign", "POST",
+             lambda rng, ids: f"/tags/{_pick(rng, ids, 'tags')}/tasks/{_pick(rng, ids, 'tasks')}", write=True),
+    Scenario("tags.bulk_assign", "POST", lambda rng, ids: "/tags/bulk/assign",
+             lambda rng, ids: {"tag_ids": [_pick(rng, ids, "tags")],
+                               "task_ids": [_pick(rng, ids, "tasks") for _ in range(100)]},
+             weight=0.2, write=True),
+    Scenario("priority.bulk", "POST", lambda rng, ids: "/tasks/priority/bulk",
+             lambda rng, ids: {"priority": rng.randint(1, 5), "tag_id": _pick(rng, ids, "tags")},
+             weight=0.2, write=True),
+    Scenario("tasks.concurrent_create", "POST", lambda rng, ids: "/tasks/",
+             lambda rng, ids: {"title": "benchmark"}, concurrency=8, write=True),
+]
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    """パーセンタイル（ソート済みの値を線形補間）"""
+    if not values:
+        return 0.0
+    position = (len(values) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def _summarize(latencies: List[float], errors: int, elapsed: float, concurrency: int) -> Dict[str, Any]:
+    """レイテンシの一覧を集計"""
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        "requests": count,
+        "errors": errors,
+        "concurrency": concurrency,
+        "throughput_rps": round(count / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / count * 1000, 3) if count else 0.0,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3) if count else 0.0,
+    }
+
+
+def _run_scenario(client, scenario: Scenario, ids: Ids, requests: int, warmup: int, seed: int) -> Dict[str, Any]:
+    """シナリオを実行して集計結果を返す"""
+    rng = random.Random(f"{seed}:{scenario.name}")
+    calls = []
+    for _ in range(warmup + requests):
+        body = scenario.body(rng, ids) if scenario.body else None
+        calls.append((scenario.path(rng, ids), body))
+
+    def call(path: str, body: Any) -> Tuple[float, bool]:
+        started = time.perf_counter()
+        response = client.request(scenario.method, "/api/v1" + path, json=body)
+        return time.perf_counter() - started, response.status_code < 400
+
+    for path, body in calls[:warmup]:
+        call(path, body)
+
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=scenario.concurrency) as executor:
+        for latency, ok in executor.map(lambda args: call(*args), calls[warmup:]):
+            latencies.append(latency)
+            errors += not ok
+    return _summarize(latencies, errors, time.perf_counter() - started, scenario.concurrency)
+
+
+def _run_concurrent_increments(client, requests: int, concurrency: int) -> Dict[str, Any]:
+    """同じタスクの進捗を並行して1ずつ増やし、失われた更新の数も記録する"""
+    requests = min(requests, 100)
+    task = client.post("/api/v1/tasks/", json={"title": "increment benchmark"}).json()
+    path = f"/api/v1/progress/tasks/{task['id']}/increment?increment=1"
+
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def call(_):
+        nonlocal errors
+        started = time.perf_counter()
+        response = client.post(path)
+        with lock:
+            latencies.append(time.perf_counter() - started)
+            errors += response.status_code >= 400
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(call, range(requests)))
+    result = _summarize(latencies, errors, time.perf_counter() - started, concurrency)
+
+    progress = client.get(f"/api/v1/progress/tasks/{task['id']}").json()["progress"]
+    result["lost_updates"] = requests - errors - progress
+    return result
+
+
+def _id_ranges() -> Ids:
+    """タスク・タグ・カテゴリのIDの範囲"""
+    from sqlalchemy import func, select
+    from backend.database import SessionLocal
+    from backend.database.models import Task, Tag, Category
+
+    db = SessionLocal()
+    try:
+        ranges = {}
+        for kind, model in (("tasks", Task), ("tags", Tag), ("categories", Category)):
+            low, high = db.execute(select(func.min(model.id), func.max(model.id))).first()
+            ranges[kind] = (low or 1, high or 1)
+        return ranges
+    finally:
+        db.close()
+
+
+def _commit() -> Optional[str]:
+    """実行したコミット（gitがなければNone）"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(before_path: str, after_path: str):
+    """2つの結果ファイルのp50・p99・スループットを比較"""
+    with open(before_path, encoding="utf-8") as f:
+        before = json.load(f)
+    with open(after_path, encoding="utf-8") as f:
+        after = json.load(f)
+
+    def change(old: float, new: float) -> str:
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    print(f"{before['meta'].get('commit')} -> {after['meta'].get('commit')}")
+    print(f"{'scenario':32}{'p50 ms':>20}{'p99 ms':>20}{'req/s':>20}")
+    for name, new in after["scenarios"].items():
+        old = before["scenarios"].get(name)
+        if old is None:
+            continue
+        print(f"{name:32}"
+              f"{new['p50_ms']:>10.2f} {change(old['p50_ms'], new['p50_ms']):>9}"
+              f"{new['p99_ms']:>10.2f} {change(old['p99_ms'], new['p99_ms']):>9}"
+              f"{new['throughput_rps']:>10.1f} {change(old['throughput_rps'], new['throughput_rps']):>9}")
+
+
+def main():
+    from backend.tools.dataset import parse_count
+
+    parser = argparse.ArgumentParser(description="Benchmark the ToDoApp API")
+    parser.add_argument("--tasks", type=parse_count, default=parse_count("10k"), help="e.g. 10k, 100k, 1m")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url", help="default: a temporary SQLite file")
+    parser.add_argument("--no-generate", action="store_true", help="use the existing data in --database-url")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario (scaled by its weight)")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=8, help="threads for the concurrent increment scenario")
+    parser.add_argument("--only", action="append", default=[], help="run scenarios whose name starts with this")
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    if not args.database_url:
+        args.database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='benchmark-'), 'benchmark.db')}"
+    # backendのimport前に設定する（配信ループ・SQLの監査は計測に含めない）
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ["REMINDER_DISPATCHER_ENABLED"] = "false"
+    os.environ["QUERY_AUDIT_ENABLED"] = "false"
+
+    from backend.tools.dataset import build
+
+    dataset = None
+    if not args.no_generate:
+        started = time.perf_counter()
+        dataset = build(args.tasks, seed=args.seed, reset=True)
+        print(f"Generated {args.tasks} tasks in {time.perf_counter() - started:.1f}s")
+
+    from fastapi.testclient import TestClient
+    from backend.main import app
+
+    ids = _id_ranges()
+    scenarios = [
+        scenario for scenario in SCENARIOS
+        if not args.only or any(scenario.name.startswith(prefix) for prefix in args.only)
+    ]
+    # 読み取りを先に実行する（書き込みの影響を受けないように）
+    scenarios.sort(key=lambda scenario: scenario.write)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    started = time.perf_counter()
+    with TestClient(app) as client:
+        for scenario in scenarios:
+            requests = max(1, int(args.requests * scenario.weight))
+            results[scenario.name] = {
+                "method": scenario.method,
+                **_run_scenario(client, scenario, ids, requests, args.warmup, args.seed),
+            }
+            print(f"{scenario.name:32}p50 {results[scenario.name]['p50_ms']:>9.2f} ms"
+                  f"  p99 {results[scenario.name]['p99_ms']:>9.2f} ms"
+                  f"  {results[scenario.name]['throughput_rps']:>8.1f} req/s")
+
+        if not args.only or any("progress.concurrent_increment".startswith(prefix) for prefix in args.only):
+            result = _run_concurrent_increments(client, args.requests, args.concurrency)
+            results["progress.concurrent_increment"] = {"method": "POST", **result}
+            print(f"{'progress.concurrent_increment':32}p50 {result['p50_ms']:>9.2f} ms"
+                  f"  p99 {result['p99_ms']:>9.2f} ms  {result['throughput_rps']:>8.1f} req/s"
+                  f"  lost updates: {result['lost_updates']}")
+
+    report = {
+        "meta": {
+            "commit": _commit(),
+            "created_at": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": args.database_url.split(":", 1)[0],
+            "dataset": dataset,
+            "requests": args.requests,
+            "seed": args.seed,
+            "elapsed_seconds": round(time.perf_counter() - started, 1),
+        },
+        "scenarios": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
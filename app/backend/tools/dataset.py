@@ -0,0 +1,242 @@
+"""ベンチマーク用の合成データセットの生成
+
+タスク（深いサブタスクの木を含む）・タグ・カテゴリ・リマインダーをスキーマに投入する:
+    python -m backend.tools.dataset --tasks 100k --database-url sqlite:///bench.db
+    python -m backend.tools.dataset --tasks 1m --seed 7 --reset
+
+同じ --seed と件数なら同じデータになる（コミット間で結果を比較するため）。
+ORMを通さずに一括INSERTするので、投入後に集計カウンタ（task_stats）と進捗履歴を作り直す。
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+# 1回のINSERTで送る行数
+BATCH_SIZE = 10000
+
+STATUSES = ("pending", "in_progress", "completed")
+STATUS_WEIGHTS = (50, 30, 20)
+PRIORITY_WEIGHTS = (10, 20, 40, 20, 10)  # 優先度1〜5
+RECURRENCES = ("FREQ=DAILY", "FREQ=WEEKLY", "FREQ=WEEKLY;BYDAY=MO,WE,FR", "FREQ=MONTHLY")
+
+
+def _epoch() -> datetime:
+    """生成する日時の基準（当日0時。期限切れ・近日中の件数の割合が実行日によらず同じになる）"""
+    return datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def parse_count(text: str) -> int:
+    """件数を解析（10k・1mのような接尾辞も可）"""
+    text = text.strip().lower()
+    scale = {"k": 1000, "m": 1000000}.get(text[-1:], 1)
+    return int(float(text[:-1] if scale > 1 else text) * scale)
+
+
+def _zipf_weights(count: int, exponent: float = 1.1) -> List[float]:
+    """順位の累積重み（上位のタグ・カテゴリほど多く使われる）"""
+    total = 0.0
+    weights = []
+    for rank in range(1, count + 1):
+        total += 1 / rank ** exponent
+        weights.append(total)
+    return weights
+
+
+def _reset(db):
+    """生成対象のテーブルを空にする"""
+    from sqlalchemy import delete
+    from backend.database.models import (
+        Task, Category, Tag, Reminder, TaskStat, ProgressHistory, ProgressSnapshot,
+        task_categories, task_tags
+    )
+
+    for table in (task_tags, task_categories, Reminder.__table__, Task.__table__, Tag.__table__,
+                  Category.__table__, TaskStat.__table__, ProgressHistory.__table__, ProgressSnapshot.__table__):
+        db.execute(delete(table))
+    db.commit()
+
+
+def _insert(db, table, rows: List[Dict[str, Any]]):
+    """バッチごとにINSERT"""
+    from sqlalchemy import insert
+
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.execute(insert(table), rows[start:start + BATCH_SIZE])
+
+
+def _sync_sequences(db, tables):
+    """IDを指定してINSERTしたので、PostgreSQLのシーケンスを最大IDに合わせる"""
+    from sqlalchemy import text
+
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    for table in tables:
+        db.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 1)) FROM {table}"
+        ))
+
+
+def generate(db, tasks: int, seed: int = 42, max_depth: int = 12, tags: int = 0, categories: int = 20,
+             reminder_rate: float = 0.3) -> Dict[str, Any]:
+    """合成データセットを投入して件数を返す（テーブルは空であること）"""
+    from backend.core.recurrence import parse_recurrence
+    from backend.database.models import Task, Category, Tag, Reminder, task_categories, task_tags
+
+    rng = random.Random(seed)
+    epoch = _epoch()
+    tags = tags or max(20, min(5000, tasks // 200))
+
+    category_rows = [
+        {"id": i, "name": f"category-{i:03d}", "color": f"#{rng.randrange(0x1000000):06x}"}
+        for i in range(1, categories + 1)
+    ]
+    tag_rows = [{"id": i, "name": f"tag-{i:05d}"} for i in range(1, tags + 1)]
+    tag_weights = _zipf_weights(tags)
+    category_weights = _zipf_weights(categories)
+    tag_ids = [row["id"] for row in tag_rows]
+    category_ids = [row["id"] for row in category_rows]
+
+    _insert(db, Category.__table__, category_rows)
+    _insert(db, Tag.__table__, tag_rows)
+
+    task_rows = []
+    tag_links = []
+    category_links = []
+    reminder_rows = []
+    counts = {"tag_links": 0, "category_links": 0, "reminders": 0}
+    depth = [0] * (tasks + 1)
+
+    def flush():
+        """溜まった行をINSERT（1M件でもメモリに載せきらないようバッチごとに書き込む）"""
+        _insert(db, Task.__table__, task_rows)
+        _insert(db, task_tags, tag_links)
+        _insert(db, task_categories, category_links)
+        _insert(db, Reminder.__table__, reminder_rows)
+        counts["tag_links"] += len(tag_links)
+        counts["category_links"] += len(category_links)
+        counts["reminders"] += len(reminder_rows)
+        for rows in (task_rows, tag_links, category_links, reminder_rows):
+            rows.clear()
+
+    for task_id in range(1, tasks + 1):
+        # 約3割は最上位のタスク。残りは既存のタスクの子で、1割は直前のタスクの子にして深い木を作る
+        parent_id = None
+        if task_id > 1 and rng.random() >= 0.3:
+            candidate = task_id - 1 if rng.random() < 0.1 else rng.randrange(1, task_id)
+            if depth[candidate] < max_depth:
+                parent_id = candidate
+                depth[task_id] = depth[candidate] + 1
+
+        status = rng.choices(STATUSES, weights=STATUS_WEIGHTS)[0]
+        progress = {"pending": 0, "completed": 100}.get(status) or rng.randrange(1, 100)
+        created_at = epoch - timedelta(seconds=rng.randrange(365 * 86400))
+        updated_at = created_at + timedelta(seconds=rng.randrange(30 * 86400))
+        due_date = None
+        recurrence = None
+        if rng.random() < 0.7:
+            due_date = epoch + timedelta(seconds=rng.randrange(-60 * 86400, 90 * 86400))
+            if rng.random() < 0.02:
+                recurrence = parse_recurrence(rng.choice(RECURRENCES), due_date)
+
+        task_rows.append({
+            "id": task_id,
+            "title": f"Task {task_id}",
+            "description": None if rng.random() < 0.5 else f"Generated task {task_id}",
+            "priority": rng.choices(range(1, 6), weights=PRIORITY_WEIGHTS)[0],
+            "due_date": due_date,
+            "status": status,
+            "progress": progress,
+            "parent_task_id": parent_id,
+            "recurrence": recurrence,
+            "created_at": created_at,
+            "updated_at": updated_at,
+        })
+
+        # タグは0〜5個（幾何分布）、カテゴリは0〜2個
+        count = 0
+        while count < 5 and rng.random() < 0.6:
+            count += 1
+        for tag_id in set(rng.choices(tag_ids, cum_weights=tag_weights, k=count)):
+            tag_links.append({"task_id": task_id, "tag_id": tag_id})
+        for category_id in set(rng.choices(category_ids, cum_weights=category_weights,
+                                           k=rng.choices((0, 1, 2), weights=(30, 55, 15))[0])):
+            category_links.append({"task_id": task_id, "category_id": category_id})
+
+        if due_date is not None and rng.random() < reminder_rate:
+            remind_at = due_date - timedelta(days=1)
+            reminder_rows.append({
+                "task_id": task_id,
+                "remind_at": remind_at,
+                "is_notified": remind_at < epoch,
+                "attempts": 0,
+            })
+
+        if len(task_rows) >= BATCH_SIZE:
+            flush()
+
+    flush()
+    _sync_sequences(db, ("categories", "tags", "tasks", "reminders"))
+    db.commit()
+
+    return {
+        "tasks": tasks,
+        "max_depth": max(depth),
+        "tags": tags,
+        "categories": categories,
+        **counts,
+        "seed": seed,
+    }
+
+
+def build(tasks: int, seed: int = 42, max_depth: int = 12, reset: bool = False) -> Dict[str, Any]:
+    """スキーマを用意してデータセットを投入し、集計カウンタと進捗履歴を作り直す"""
+    from sqlalchemy import func, select
+    from backend.database import SessionLocal, ensure_schema, ensure_history, verify_counters
+    from backend.database.models import Task
+
+    ensure_schema()
+
+    db = SessionLocal()
+    try:
+        if reset:
+            _reset(db)
+        elif db.execute(select(func.count()).select_from(Task)).scalar():
+            raise SystemExit("The database already has tasks; use --reset to replace them")
+
+        summary = generate(db, tasks, seed=seed, max_depth=max_depth)
+        verify_counters(db, repair=True)
+    finally:
+        db.close()
+
+    # 履歴は空なので、投入したタスクがバーンダウンの基準として記録される
+    ensure_history()
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic ToDoApp dataset")
+    parser.add_argument("--tasks", type=parse_count, default=parse_count("10k"), help="e.g. 10k, 100k, 1m")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--max-depth", type=int, default=12, help="maximum subtask depth")
+    parser.add_argument("--database-url", help="default: DATABASE_URL")
+    parser.add_argument("--reset", action="store_true", help="delete existing data first")
+    args = parser.parse_args()
+
+    if args.database_url:
+        # backendのimport前に設定する
+        os.environ["DATABASE_URL"] = args.database_url
+
+    started = time.perf_counter()
+    summary = build(args.tasks, seed=args.seed, max_depth=args.max_depth, reset=args.reset)
+    elapsed = time.perf_counter() - started
+
+    for key, value in summary.items():
+        print(f"{key + ':':16}{value}")
+    print(f"{'elapsed:':16}{elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""負荷試験ツール
+
+/api/v1 のエンドポイントを重み付きの組み合わせ（ミックス）で呼び出し、負荷を上げたときに
+レイテンシが悪化し始める点（SQLiteの書き込み競合・スレッドプールの枯渇など）を探す:
+    # アプリ内（ASGI）で同時実行数を変えながら実行（クローズドループ）
+    python -m backend.tools.loadtest --tasks 10k --concurrency 1,2,4,8,16,32
+    # 起動中のサーバーに一定の到着率で送る（オープンループ、到着はポアソン過程）
+    python -m backend.tools.loadtest --url http://localhost:8000 --rate 50,100,200 --duration 20
+    # 記録したリクエストを元の間隔の2倍速で再生（REQUEST_LOG_PATHで記録）
+    python -m backend.tools.loadtest --url http://localhost:8000 --replay requests.jsonl --speed 2
+
+ミックスは --mix tasks.get=10,tasks.create=1 またはJSONファイルで指定する（名前はbenchmarkのシナリオ）。
+オープンループでは予定した到着時刻からの時間をレイテンシとするので、詰まっている間の待ちも含まれる。
+アプリ内で動かす場合は負荷の生成もアプリと同じイベントループで動く点に注意。
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+# 既定のミックス（読み取り中心に少量の書き込み）
+DEFAULT_MIX = {
+    "tasks.list": 20, "tasks.filter": 10, "tasks.get": 20, "tasks.subtasks": 5, "tasks.next": 5,
+    "tasks.query": 5, "tags.list": 5, "categories.list": 5, "progress.stats": 10, "progress.range": 5,
+    "reminders.calendar": 2, "tasks.create": 3, "tasks.update": 3, "progress.update": 3, "tags.assign": 2,
+}
+
+# 同時実行数・到着率を上げたときに「悪化し始めた」とみなす条件
+KNEE_P99_FACTOR = 2.0  # p99が最初の水準のこの倍を超えた
+KNEE_MIN_GAIN = 1.1  # スループットの伸びがこの比率を下回った
+
+
+class Request(NamedTuple):
+    """送信するリクエスト"""
+    name: str
+    method: str
+    path: str  # クエリ文字列を含む
+    body: Optional[bytes] = None
+    content_type: Optional[str] = None
+
+
+def parse_levels(text: str) -> List[float]:
+    """1,2,4 のような一覧を解析"""
+    return [float(value) for value in text.split(",") if value.strip()]
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """ミックスを解析（name=weight,... またはJSONファイル）"""
+    if os.path.exists(text):
+        with open(text, encoding="utf-8") as f:
+            return {name: float(weight) for name, weight in json.load(f).items()}
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def mix_source(mix: Dict[str, float], ids, seed: int, prefix: str) -> Callable[[], Request]:
+    """ミックスの重みに従ってリクエストを作る関数"""
+    from backend.tools.benchmark import SCENARIOS
+
+    scenarios = {scenario.name: scenario for scenario in SCENARIOS}
+    unknown = set(mix) - set(scenarios)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios in mix: {', '.join(sorted(unknown))}")
+
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    rng = random.Random(seed)
+
+    def next_request() -> Request:
+        scenario = scenarios[rng.choices(names, weights=weights)[0]]
+        body = scenario.body(rng, ids) if scenario.body else None
+        return Request(
+            scenario.name, scenario.method, prefix + scenario.path(rng, ids),
+            json.dumps(body).encode() if body is not None else None,
+            "application/json" if body is not None else None,
+        )
+
+    return next_request
+
+
+def load_replay(path: str) -> List[Tuple[float, Request]]:
+    """記録したリクエストを (最初のリクエストからの秒数, リクエスト) の一覧として読む"""
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entries.append(json.loads(line))
+    entries.sort(key=lambda entry: entry["ts"])
+
+    start = entries[0]["ts"] if entries else 0
+    return [
+        (entry["ts"] - start, Request(
+            # 集計はIDを除いたパスごと
+            f"{entry['method']} {re.sub(r'/[0-9]+(?=/|$)', '/{id}', entry['path'])}",
+            entry["method"],
+            entry["path"] + (f"?{entry['query']}" if entry.get("query") else ""),
+            entry["body"].encode() if entry.get("body") else None,
+            entry.get("content_type"),
+        ))
+        for entry in entries
+    ]
+
+
+class Recorder:
+    """レイテンシ・ステータスの集計"""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.by_name: Dict[str, List[float]] = {}
+        self.server_errors = 0
+        self.client_errors = 0
+        self.failures = 0
+        self.dropped = 0
+
+    def record(self, request: Request, latency: float, status: Optional[int]):
+        self.latencies.append(latency)
+        self.by_name.setdefault(request.name, []).append(latency)
+        if status is None:
+            self.failures += 1
+        elif status >= 500:
+            self.server_errors += 1
+        elif status >= 400:
+            self.client_errors += 1
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        from backend.tools.benchmark import _summarize
+
+        result = _summarize(self.latencies, self.server_errors + self.failures, elapsed, 0)
+        del result["concurrency"]
+        result.update({
+            "client_errors": self.client_errors,
+            "dropped": self.dropped,
+            "routes": {
+                name: {key: value for key, value in _summarize(latencies, 0, elapsed, 0).items()
+                       if key in ("requests", "p50_ms", "p99_ms")}
+                for name, latencies in sorted(self.by_name.items())
+            },
+        })
+        return result
+
+
+async def _send(client, request: Request) -> Optional[int]:
+    """リクエストを送ってステータスを返す（接続エラーならNone）"""
+    headers = {"content-type": request.content_type} if request.content_type else None
+    try:
+        response = await client.request(request.method, request.path, content=request.body, headers=headers)
+        return response.status_code
+    except Exception:
+        return None
+
+
+async def run_closed_loop(client, next_request: Callable[[], Request], concurrency: int,
+                          duration: float) -> Dict[str, Any]:
+    """同時実行数を固定し、各ワーカーが応答を待って次を送る"""
+    recorder = Recorder()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + duration
+
+    async def worker():
+        while loop.time() < deadline:
+            request = next_request()
+            started = loop.time()
+            status = await _send(client, request)
+            recorder.record(request, loop.time() - started, status)
+
+    started = loop.time()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return {"concurrency": concurrency, **recorder.summary(loop.time() - started)}
+
+
+async def run_open_loop(client, arrivals: List[Tuple[float, Request]], max_in_flight: int) -> Dict[str, Any]:
+    """予定した時刻に応答を待たずに送る（同時に処理中の数が上限を超えた分は送らずに数える）"""
+    recorder = Recorder()
+    loop = asyncio.get_running_loop()
+    in_flight = set()
+    start = loop.time()
+
+    async def fire(request: Request, scheduled: float):
+        status = await _send(client, request)
+        # 予定時刻から測るので、送信が遅れた分（詰まっていた時間）も含まれる
+        recorder.record(request, loop.time() - scheduled, status)
+
+    for offset, request in arrivals:
+        delay = start + offset - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(in_flight) >= max_in_flight:
+            recorder.dropped += 1
+            continue
+        task = asyncio.ensure_future(fire(request, start + offset))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+
+    if in_flight:
+        await asyncio.gather(*in_flight)
+    return recorder.summary(loop.time() - start)
+
+
+def poisson_arrivals(next_request: Callable[[], Request], rate: float, duration: float,
+                     seed: int) -> List[Tuple[float, Request]]:
+    """到着率rate（件/秒）のポアソン到着"""
+    rng = random.Random(seed)
+    arrivals = []
+    offset = rng.expovariate(rate)
+    while offset < duration:
+        arrivals.append((offset, next_request()))
+        offset += rng.expovariate(rate)
+    return arrivals
+
+
+def find_knee(levels: List[Dict[str, Any]], key: str) -> Optional[float]:
+    """p99が悪化し始めた、またはスループットが伸びなくなった最初の水準"""
+    if not levels:
+        return None
+    baseline_p99 = levels[0]["p99_ms"]
+    for previous, current in zip(levels, levels[1:]):
+        if (current["p99_ms"] > baseline_p99 * KNEE_P99_FACTOR
+                or current["throughput_rps"] < previous["throughput_rps"] * KNEE_MIN_GAIN):
+            return current[key]
+    return None
+
+
+def _print_level(label: str, result: Dict[str, Any]):
+    print(f"{label:>14}  {result['throughput_rps']:>8.1f} req/s  p50 {result['p50_ms']:>9.2f} ms"
+          f"  p99 {result['p99_ms']:>9.2f} ms  errors {result['errors']}  dropped {result['dropped']}")
+
+
+async def _remote_id_ranges(client, prefix: str):
+    """起動中のサーバーからタスク・タグ・カテゴリのIDの範囲を推定"""
+    ranges = {}
+    for kind in ("tags", "categories"):
+        ids = [item["id"] for item in (await client.get(f"{prefix}/{kind}/")).json()] or [1]
+        ranges[kind] = (min(ids), max(ids))
+    total = (await client.get(f"{prefix}/progress/stats")).json()["total_tasks"]
+    ranges["tasks"] = (1, max(total, 1))
+    return ranges
+
+
+async def _run(args) -> Dict[str, Any]:
+    import httpx
+    from backend.config import settings
+
+    prefix = settings.API_PREFIX
+    if args.url:
+        transport = None
+        base_url = args.url
+    else:
+        from backend.main import app
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://loadtest"
+
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=args.timeout,
+                                 limits=limits) as client:
+        results: Dict[str, Any] = {}
+
+        if args.replay:
+            arrivals = [(offset / args.speed, request) for offset, request in load_replay(args.replay)]
+            print(f"Replaying {len(arrivals)} requests at {args.speed}x")
+            results["replay"] = await run_open_loop(client, arrivals, args.max_in_flight)
+            _print_level("replay", results["replay"])
+            return results
+
+        if args.url:
+            ids = await _remote_id_ranges(client, prefix)
+        else:
+            from backend.tools.benchmark import _id_ranges
+            ids = _id_ranges()
+        next_request = mix_source(args.mix, ids, args.seed, prefix)
+
+        if args.rate:
+            results["open_loop"] = []
+            for rate in args.rate:
+                arrivals = poisson_arrivals(next_request, rate, args.duration, args.seed)
+                result = {"rate": rate, **await run_open_loop(client, arrivals, args.max_in_flight)}
+                results["open_loop"].append(result)
+                _print_level(f"{rate:g} req/s", result)
+            results["open_loop_knee"] = find_knee(results["open_loop"], "rate")
+
+        if args.concurrency:
+            results["closed_loop"] = []
+            for concurrency in args.concurrency:
+                result = await run_closed_loop(client, next_request, int(concurrency), args.duration)
+                results["closed_loop"].append(result)
+                _print_level(f"{int(concurrency)} clients", result)
+            results["closed_loop_knee"] = find_knee(results["closed_loop"], "concurrency")
+
+        return results
+
+
+def main():
+    from backend.tools.dataset import parse_count
+
+    parser = argparse.ArgumentParser(description="Load test the ToDoApp API")
+    parser.add_argument("--url", help="target a running server instead of the in-process app")
+    parser.add_argument("--tasks", type=parse_count, default=parse_count("10k"),
+                        help="dataset size for the in-process app (e.g. 10k, 100k)")
+    parser.add_argument("--database-url", help="in-process database (default: a temporary SQLite file)")
+    parser.add_argument("--no-generate", action="store_true", help="use the existing data in --database-url")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="name=weight,... or a JSON file")
+    parser.add_argument("--concurrency", type=parse_levels, help="closed-loop levels, e.g. 1,2,4,8,16")
+    parser.add_argument("--rate", type=parse_levels, help="open-loop arrival rates in req/s, e.g. 50,100,200")
+    parser.add_argument("--replay", help="request log recorded with REQUEST_LOG_PATH")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed multiplier")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per level")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="open-loop cap on outstanding requests")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="loadtest.json")
+    args = parser.parse_args()
+
+    if not (args.concurrency or args.rate or args.replay):
+        args.concurrency = [1, 2, 4, 8, 16, 32]
+
+    dataset = None
+    if not args.url:
+        if not args.database_url:
+            args.database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='loadtest-'), 'loadtest.db')}"
+        # backendのimport前に設定する
+        os.environ["DATABASE_URL"] = args.database_url
+        os.environ["REMINDER_DISPATCHER_ENABLED"] = "false"
+        if not args.no_generate:
+            from backend.tools.dataset import build
+            dataset = build(args.tasks, seed=args.seed, reset=True)
+
+    started = time.perf_counter()
+    results = asyncio.run(_run(args))
+
+    for key in ("closed_loop_knee", "open_loop_knee"):
+        if key in results:
+            print(f"{key}: {results[key] if results[key] is not None else 'not reached'}")
+
+    from backend.tools.benchmark import _commit
+
+    report = {
+        "meta": {
+            "commit": _commit(),
+            "created_at": datetime.utcnow().isoformat(),
+            "target": args.url or "in-process",
+            "dataset": dataset,
+            "mix": args.mix if not args.replay else None,
+            "replay": args.replay,
+            "duration": args.duration,
+            "seed": args.seed,
+            "elapsed_seconds": round(time.perf_counter() - started, 1),
+        },
+        **results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
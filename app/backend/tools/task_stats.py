@@ -0,0 +1,39 @@
+"""集計カウンタ（task_stats）の検証・再構築
+
+タスクと関連テーブルから集計し直し、task_statsとのずれを報告する:
+    python -m backend.tools.task_stats            # 検証のみ（ずれがあれば終了コード1）
+    python -m backend.tools.task_stats --repair   # ずれがあれば作り直す
+"""
+import argparse
+from backend.database import SessionLocal, ensure_schema, verify_counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify or rebuild the task_stats counters")
+    parser.add_argument("--repair", action="store_true", help="rebuild task_stats from the tasks table")
+    args = parser.parse_args()
+
+    ensure_schema()
+
+    db = SessionLocal()
+    try:
+        report = verify_counters(db, repair=args.repair)
+    finally:
+        db.close()
+
+    for entry in report["drift"]:
+        expected_count, expected_progress = entry["expected"]
+        actual_count, actual_progress = entry["actual"]
+        print(f"{entry['dimension']}={entry['key']}: "
+              f"count {actual_count} (expected {expected_count}), "
+              f"progress_sum {actual_progress} (expected {expected_progress})")
+
+    print(f"{report['rows']} counters checked, {len(report['drift'])} drifted"
+          + (", rebuilt" if report["repaired"] else ""))
+
+    if report["drift"] and not args.repair:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
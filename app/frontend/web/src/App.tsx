@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import './App.css';
 import {
   taskApi,
@@ -6,6 +6,7 @@ import {
   tagApi,
   reminderApi,
   progressApi,
+  bootstrapApi,
 } from './api';
 import type {
   Task,
@@ -28,6 +29,8 @@ function App() {
   const [error, setError] = useState<string | null>(null);
   const [showTaskModal, setShowTaskModal] = useState(false);
   const [editingTask, setEditingTask] = useState<Task | null>(null);
+  // Incremented on every load so a slow follow-up fetch cannot overwrite a newer view
+  const loadCount = useRef(0);
 
   // Load data
   useEffect(() => {
@@ -35,10 +38,27 @@ function App() {
   }, [currentView]);
 
   const loadData = async () => {
+    const load = ++loadCount.current;
     try {
       setLoading(true);
       setError(null);
 
+      const params = listParams();
+      if (params) {
+        // Tasks, categories, tags and stats in a single round trip
+        const data = await bootstrapApi.get(params);
+        setTasks(data.tasks);
+        setCategories(data.categories);
+        setTags(data.tags);
+        setStats(data.stats);
+        setLoading(false);
+        if (data.has_more) {
+          // The first page is already shown; fetch the whole list behind it
+          loadRemainingTasks(params, load);
+        }
+        return;
+      }
+
       const [tasksData, categoriesData, tagsData, statsData] = await Promise.all([
         loadTasks(),
         categoryApi.getAll(),
@@ -57,19 +77,40 @@ function App() {
     }
   };
 
+  const loadRemainingTasks = async (
+    params: { status?: string; root_only?: boolean },
+    load: number
+  ) => {
+    try {
+      const tasksData = await taskApi.getAll(params);
+      if (load === loadCount.current) {
+        setTasks(tasksData);
+      }
+    } catch (err) {
+      if (load === loadCount.current) {
+        setError('残りのタスクの読み込みに失敗しました');
+      }
+      console.error(err);
+    }
+  };
+
+  // Task list filters for the current view (null for views with their own endpoint)
+  const listParams = (): { status?: string; root_only?: boolean } | null => {
+    switch (currentView) {
+      case 'overdue':
+      case 'upcoming':
+        return null;
+      case 'all':
+        return { root_only: true };
+      default:
+        return { status: currentView };
+    }
+  };
+
   const loadTasks = async () => {
     let tasksData: Task[];
 
     switch (currentView) {
-      case 'pending':
-        tasksData = await taskApi.getAll({ status: 'pending' });
-        break;
-      case 'in_progress':
-        tasksData = await taskApi.getAll({ status: 'in_progress' });
-        break;
-      case 'completed':
-        tasksData = await taskApi.getAll({ status: 'completed' });
-        break;
       case 'overdue':
         tasksData = await taskApi.getOverdue();
         break;
@@ -77,7 +118,7 @@ function App() {
         tasksData = await taskApi.getUpcoming(7);
         break;
       default:
-        tasksData = await taskApi.getAll({ root_only: true });
+        tasksData = await taskApi.getAll(listParams() ?? {});
     }
 
     setTasks(tasksData);
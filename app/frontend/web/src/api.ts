@@ -10,6 +10,7 @@ import type {
   Reminder,
   ReminderCreate,
   ProgressStats,
+  Bootstrap,
 } from './types';
 
 const API_BASE_URL = '/api/v1';
@@ -244,4 +245,18 @@ export const progressApi = {
   },
 };
 
+// Bootstrap API
+export const bootstrapApi = {
+  // Initial data (first page of tasks, categories, tags, pending reminders, stats) in one request
+  get: async (params?: {
+    status?: string;
+    root_only?: boolean;
+    limit?: number;
+    reminder_limit?: number;
+  }): Promise<Bootstrap> => {
+    const response = await api.get('/bootstrap', { params });
+    return response.data;
+  },
+};
+
 export default api;
@@ -8,6 +8,7 @@ export interface Task {
   status: 'pending' | 'in_progress' | 'completed';
   progress: number;
   parent_task_id: number | null;
+  recurrence: string | null;
   created_at: string;
   updated_at: string;
 }
@@ -20,6 +21,7 @@ export interface TaskCreate {
   status?: string;
   progress?: number;
   parent_task_id?: number;
+  recurrence?: string;
 }
 
 export interface TaskUpdate {
@@ -29,6 +31,7 @@ export interface TaskUpdate {
   due_date?: string;
   status?: string;
   progress?: number;
+  recurrence?: string | null;
 }
 
 // Category types
@@ -59,11 +62,13 @@ export interface Reminder {
   task_id: number;
   remind_at: string;
   is_notified: boolean;
+  recurrence: string | null;
 }
 
 export interface ReminderCreate {
   task_id: number;
   remind_at: string;
+  recurrence?: string;
 }
 
 // Progress types
@@ -74,3 +79,14 @@ export interface ProgressStats {
   in_progress_tasks: number;
   pending_tasks: number;
 }
+
+// Bootstrap types
+export interface Bootstrap {
+  tasks: Task[];
+  has_more: boolean;
+  categories: Category[];
+  tags: Tag[];
+  pending_reminders: Reminder[];
+  pending_reminders_has_more: boolean;
+  stats: ProgressStats;
+}
@@ -0,0 +1,70 @@
+import os
+import tempfile
+
+# 設定はbackendの読み込み時に環境変数から読むので、読み込む前にテスト用の値を入れる
+_database_dir = tempfile.TemporaryDirectory(prefix="todoapp-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_database_dir.name}/test.db"
+# 予算超過・N+1の疑いのあるリクエストを500にして、ルートのテストで検出する
+os.environ["QUERY_AUDIT_ENABLED"] = "true"
+os.environ["QUERY_AUDIT_STRICT"] = "true"
+os.environ["PROGRESS_SNAPSHOT_INTERVAL_SECONDS"] = "0"
+os.environ["REMINDER_DISPATCHER_ENABLED"] = "false"
+os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+os.environ["WRITE_QUEUE_ENABLED"] = "false"
+
+from datetime import datetime, timedelta
+import pytest
+from fastapi.testclient import TestClient
+from backend.config import settings
+from backend.database import SessionLocal
+from backend.main import create_app
+
+API = settings.API_PREFIX
+
+
+@pytest.fixture(scope="session")
+def client():
+    """起動時にスキーマを作成するアプリのテストクライアント（テスト全体で1つのデータベースを使う）"""
+    with TestClient(create_app(check_schema=True)) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def db():
+    """データベースセッション"""
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture(scope="session")
+def seeded(client):
+    """ルートのテスト用に、N+1を検出できる件数のタスク・タグ・カテゴリ・リマインダーを作成"""
+    now = datetime.utcnow()
+    categories = [
+        client.post(f"{API}/categories/", json={"name": f"seed-category-{i}"}).json()["id"] for i in range(3)
+    ]
+    tags = [client.post(f"{API}/tags/", json={"name": f"seed-tag-{i}"}).json()["id"] for i in range(4)]
+
+    tasks = []
+    for i in range(8):
+        task = {
+            "title": f"seed-{i}",
+            "priority": i % 5 + 1,
+            "due_date": (now + timedelta(days=i - 3)).isoformat(),
+        }
+        if i == 0:
+            task["recurrence"] = "FREQ=DAILY"
+        task_id = client.post(f"{API}/tasks/", json=task).json()["id"]
+        tasks.append(task_id)
+
+        client.post(f"{API}/tasks/{task_id}/subtasks", json={"title": f"seed-{i}-sub"})
+        client.post(f"{API}/tags/{tags[i % 4]}/tasks/{task_id}")
+        client.post(f"{API}/tags/{tags[(i + 1) % 4]}/tasks/{task_id}")
+        client.post(f"{API}/categories/{categories[i % 3]}/tasks/{task_id}")
+        client.post(f"{API}/reminders/", json={"task_id": task_id, "remind_at": (now - timedelta(hours=i)).isoformat()})
+        client.put(f"{API}/progress/tasks/{task_id}", json={"progress": i * 10})
+
+    return {"tasks": tasks, "tags": tags, "categories": categories}
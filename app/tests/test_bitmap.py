@@ -0,0 +1,49 @@
+import random
+from backend.core.bitmap import Bitmap
+
+
+def test_set_operations_match_python_sets():
+    """AND・OR・差・件数・順序がsetと一致する（チャンクをまたぐまばらなIDを含む）"""
+    rng = random.Random(0)
+    left = {rng.randrange(20000) for _ in range(500)} | {0, 4095, 4096}
+    right = {rng.randrange(20000) for _ in range(500)} | {4096, 19999}
+
+    a, b = Bitmap(left), Bitmap(right)
+
+    assert list(a & b) == sorted(left & right)
+    assert list(a | b) == sorted(left | right)
+    assert list(a - b) == sorted(left - right)
+    assert len(a) == len(left)
+    assert 4095 in a and 19999 not in a
+
+
+def test_discard_drops_empty_chunks():
+    """最後のIDを削除したチャンクは残さない"""
+    bitmap = Bitmap([1, 5000])
+    bitmap.discard(5000)
+    bitmap.discard(12345)
+
+    assert list(bitmap) == [1]
+    assert bitmap._chunks.keys() == {0}
+    assert not Bitmap([7]) - Bitmap([7])
+
+
+def test_slice_skips_whole_chunks():
+    """offsetはチャンク単位で読み飛ばしても昇順の位置と一致する"""
+    ids = sorted({value * 37 for value in range(1000)})
+    bitmap = Bitmap(ids)
+
+    assert bitmap.slice(0, 5) == ids[:5]
+    assert bitmap.slice(250, 10) == ids[250:260]
+    assert bitmap.slice(995, 10) == ids[995:]
+    assert bitmap.slice(1000, 10) == []
+
+
+def test_copy_is_independent():
+    """複製への変更は元に影響しない"""
+    bitmap = Bitmap([1, 2])
+    copied = bitmap.copy()
+    copied.add(3)
+
+    assert list(bitmap) == [1, 2]
+    assert list(copied) == [1, 2, 3]
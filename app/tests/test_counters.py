@@ -0,0 +1,37 @@
+from backend.database.counters import verify_counters
+from tests.conftest import API
+
+
+def test_counters_follow_every_kind_of_write(client, db):
+    """作成・更新・一括変更・関連の割り当て/解除・削除の後も集計し直した値と一致する"""
+    tag = client.post(f"{API}/tags/", json={"name": "counter-tag"}).json()["id"]
+    category = client.post(f"{API}/categories/", json={"name": "counter-category"}).json()["id"]
+    tasks = [client.post(f"{API}/tasks/", json={"title": f"counter-{i}", "priority": 2}).json()["id"]
+             for i in range(4)]
+    subtask = client.post(f"{API}/tasks/{tasks[0]}/subtasks", json={"title": "counter-sub"}).json()["id"]
+
+    responses = [
+        client.post(f"{API}/tags/bulk/assign", json={"tag_ids": [tag], "task_ids": tasks}),
+        client.post(f"{API}/categories/{category}/tasks/{tasks[1]}"),
+        client.put(f"{API}/progress/tasks/{tasks[1]}", json={"progress": 40}),
+        client.post(f"{API}/progress/tasks/{tasks[2]}/increment?increment=100"),
+        client.put(f"{API}/tasks/{tasks[3]}", json={"status": "in_progress", "priority": 5}),
+        client.post(f"{API}/tasks/priority/bulk", json={"priority": 1, "task_ids": tasks[:2]}),
+        client.delete(f"{API}/tags/{tag}/tasks/{tasks[0]}"),
+        client.put(f"{API}/tasks/{subtask}", json={"status": "completed"}),
+        client.delete(f"{API}/tasks/{tasks[0]}"),
+        client.delete(f"{API}/categories/{category}"),
+    ]
+
+    assert [response.status_code for response in responses if response.status_code >= 300] == []
+    assert verify_counters(db)["drift"] == []
+
+
+def test_stats_read_from_counters_match_tasks(client, db):
+    """進捗統計（task_statsから計算）がタスク一覧と一致する"""
+    tasks = client.get(f"{API}/tasks/").json()
+    stats = client.get(f"{API}/progress/stats").json()
+
+    assert stats["total_tasks"] == len(tasks)
+    assert stats["completed_tasks"] == sum(task["status"] == "completed" for task in tasks)
+    assert verify_counters(db)["drift"] == []
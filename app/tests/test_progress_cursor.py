@@ -0,0 +1,49 @@
+import pytest
+from tests.conftest import API
+
+
+@pytest.fixture(scope="module")
+def ranged(client):
+    """同じ進捗の行を含むタスク（キーセットの (進捗, id) で順序が決まることの確認用）"""
+    ids = []
+    for i in range(9):
+        task_id = client.post(f"{API}/tasks/", json={"title": f"cursor-{i}", "priority": 4}).json()["id"]
+        client.put(f"{API}/progress/tasks/{task_id}", json={"progress": 60 + (i % 3)})
+        ids.append(task_id)
+    return ids
+
+
+def _pages(client, **params):
+    """X-Next-Cursorをたどってすべてのページを読む"""
+    params = {"min_progress": 60, "max_progress": 62, "priority": 4, "limit": 4, **params}
+    pages = []
+    while True:
+        response = client.get(f"{API}/progress/tasks/range/list", params=params)
+        assert response.status_code == 200, response.text
+        pages.append([(task["progress"], task["id"]) for task in response.json()])
+        if "x-next-cursor" not in response.headers:
+            return pages
+        params["cursor"] = response.headers["x-next-cursor"]
+
+
+@pytest.mark.parametrize("direction", ["asc", "desc"])
+def test_pages_cover_every_row_once_in_order(client, ranged, direction):
+    """ページをつなげると (進捗, id) の順に重複・欠落なく並ぶ"""
+    pages = _pages(client, direction=direction)
+    rows = [row for page in pages for row in page]
+
+    assert [len(page) for page in pages] == [4, 4, 1]
+    assert rows == sorted(rows, reverse=direction == "desc")
+    assert sorted(task_id for _, task_id in rows) == ranged
+
+
+def test_updated_at_cursor(client, ranged):
+    """更新日時の並びでもカーソルで続きを読める"""
+    rows = [row for page in _pages(client, order_by="updated_at") for row in page]
+    assert sorted(task_id for _, task_id in rows) == ranged
+
+
+def test_invalid_cursor_is_rejected(client):
+    """壊れたカーソルは400"""
+    response = client.get(f"{API}/progress/tasks/range/list", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
@@ -0,0 +1,44 @@
+from tests.conftest import API
+
+
+def _latest(client, **scope):
+    """スコープの現在のバーンダウンの値（最後の点）"""
+    response = client.get(f"{API}/progress/burndown", params=scope)
+    assert response.status_code == 200, response.text
+    return response.json()[-1]
+
+
+def test_moving_a_task_moves_its_subtree(client):
+    """子を持つタスクを別のプロジェクトに移すと、子孫も移動元から除かれて移動先に加わる"""
+    root_a = client.post(f"{API}/tasks/", json={"title": "history-A"}).json()["id"]
+    root_b = client.post(f"{API}/tasks/", json={"title": "history-B"}).json()["id"]
+    child = client.post(f"{API}/tasks/{root_a}/subtasks", json={"title": "history-C"}).json()["id"]
+    grandchild = client.post(f"{API}/tasks/{child}/subtasks", json={"title": "history-D"}).json()["id"]
+    client.put(f"{API}/progress/tasks/{grandchild}", json={"progress": 30})
+
+    assert client.put(f"{API}/tasks/{child}", json={"parent_task_id": root_b}).status_code == 200
+
+    a, b = _latest(client, root=root_a), _latest(client, root=root_b)
+    assert (a["task_count"], a["done"]) == (1, 0)
+    assert (b["task_count"], b["done"]) == (3, 30)
+
+    # 移動後の子孫の変更は移動先だけに反映され、移動元はずれない
+    client.put(f"{API}/progress/tasks/{grandchild}", json={"progress": 100})
+    client.delete(f"{API}/tasks/{grandchild}")
+
+    a, b = _latest(client, root=root_a), _latest(client, root=root_b)
+    assert (a["task_count"], a["done"], a["completed_count"]) == (1, 0, 0)
+    assert (b["task_count"], b["done"], b["completed_count"]) == (2, 0, 0)
+
+
+def test_moving_a_root_under_another_project(client):
+    """最上位のタスクを別のプロジェクトの下に移すと、そのプロジェクトの値がすべて移る"""
+    root_a = client.post(f"{API}/tasks/", json={"title": "history-root-A"}).json()["id"]
+    root_b = client.post(f"{API}/tasks/", json={"title": "history-root-B"}).json()["id"]
+    client.post(f"{API}/tasks/{root_a}/subtasks", json={"title": "history-root-A-sub", "progress": 50})
+
+    client.put(f"{API}/tasks/{root_a}", json={"parent_task_id": root_b})
+
+    a, b = _latest(client, root=root_a), _latest(client, root=root_b)
+    assert (a["task_count"], a["done"]) == (0, 0)
+    assert (b["task_count"], b["done"]) == (3, 50)
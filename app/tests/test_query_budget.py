@@ -0,0 +1,95 @@
+import pytest
+from fastapi.routing import APIRoute
+from backend.core.query_audit import _check
+from tests.conftest import API
+
+# 予算を宣言したルートと、呼び出すときのパス（{tasks}などはseededのIDに置き換える）
+BUDGETED_REQUESTS = [
+    ("GET", "/tasks/", "/tasks/"),
+    ("GET", "/tasks/", "/tasks/?limit=3"),
+    ("GET", "/tasks/", "/tasks/?facets=true"),
+    ("GET", "/tasks/", "/tasks/?status=pending&facets=true"),
+    ("GET", "/tasks/next", "/tasks/next"),
+    ("POST", "/tasks/query", "/tasks/query"),
+    ("GET", "/tasks/calendar", "/tasks/calendar"),
+    ("GET", "/tasks/{task_id}/subtasks", "/tasks/{task}/subtasks"),
+    ("GET", "/tasks/priority/histogram", "/tasks/priority/histogram"),
+    ("GET", "/tasks/priority/histogram", "/tasks/priority/histogram?group_by=tag"),
+    ("GET", "/tasks/priority/histogram", "/tasks/priority/histogram?group_by=category"),
+    ("GET", "/tasks/overdue/list", "/tasks/overdue/list"),
+    ("GET", "/tasks/upcoming/list", "/tasks/upcoming/list"),
+    ("GET", "/categories/", "/categories/"),
+    ("GET", "/categories/{category_id}/tasks", "/categories/{category}/tasks"),
+    ("GET", "/tags/", "/tags/"),
+    ("GET", "/tags/suggest", "/tags/suggest?prefix=s"),
+    ("GET", "/tags/suggest", "/tags/suggest?prefix=seed-tag"),
+    ("GET", "/tags/{tag_id}/tasks", "/tags/{tag}/tasks"),
+    ("GET", "/tags/{tag_id}/related", "/tags/{tag}/related"),
+    ("GET", "/reminders/", "/reminders/"),
+    ("GET", "/reminders/pending", "/reminders/pending"),
+    ("GET", "/reminders/calendar", "/reminders/calendar"),
+    ("GET", "/reminders/task/{task_id}", "/reminders/task/{task}"),
+    ("GET", "/progress/tasks/range/list", "/progress/tasks/range/list"),
+    ("GET", "/progress/tasks/range/list", "/progress/tasks/range/list?limit=3&order_by=updated_at"),
+    ("GET", "/progress/stats", "/progress/stats"),
+    ("GET", "/progress/stats/breakdown", "/progress/stats/breakdown?group_by=category"),
+    ("GET", "/progress/stats/breakdown", "/progress/stats/breakdown?group_by=tag"),
+    ("GET", "/bootstrap", "/bootstrap"),
+]
+
+
+def _budgets(app):
+    """{(メソッド, パス): 予算}（API_PREFIXを除いたパス）"""
+    budgets = {}
+    for route in app.routes:
+        budget = getattr(getattr(route, "endpoint", None), "query_budget", None)
+        if isinstance(route, APIRoute) and budget is not None:
+            for method in route.methods:
+                budgets[(method, route.path[len(API):])] = budget
+    return budgets
+
+
+def test_every_budgeted_route_is_exercised(client):
+    """予算を宣言したルートはすべて下のテストで呼ぶ（ルートを追加したらここにも追加する）"""
+    covered = {(method, path) for method, path, _ in BUDGETED_REQUESTS}
+    assert set(_budgets(client.app)) <= covered
+
+
+@pytest.mark.parametrize("method,route,path", BUDGETED_REQUESTS, ids=lambda value: value)
+def test_route_stays_within_query_budget(client, seeded, method, route, path):
+    """予算を超えたりN+1の疑いがあれば監査（QUERY_AUDIT_STRICT）が500にする"""
+    url = API + path.format(
+        task=seeded["tasks"][0], tag=seeded["tags"][0], category=seeded["categories"][0]
+    )
+    if method == "POST":
+        expression = {"and": [{"tag": seeded["tags"][0]}, {"not": {"category": seeded["categories"][0]}}]}
+        response = client.post(url, json={"filter": expression})
+    else:
+        response = client.get(url)
+
+    assert response.status_code == 200, response.text
+    assert int(response.headers["x-query-count"]) <= _budgets(client.app)[(method, route)]
+
+
+def test_audit_reports_budget_and_repeated_statements():
+    """予算超過と、パラメータだけが異なる同じSQLの繰り返しを違反として返す"""
+    count, repeated, violations = _check({"SELECT 1": 1, "SELECT * FROM tags WHERE id = ?": 6}, 3)
+
+    assert count == 7
+    assert repeated == [("SELECT * FROM tags WHERE id = ?", 6)]
+    assert len(violations) == 2
+    assert _check({"SELECT 1": 2}, 3)[2] == []
+
+
+def test_strict_audit_fails_request_over_budget(client, seeded, monkeypatch):
+    """予算を下回るようにすると500と違反の内容が返る"""
+    route = next(
+        route for route in client.app.routes
+        if isinstance(route, APIRoute) and route.path == f"{API}/reminders/" and "GET" in route.methods
+    )
+    monkeypatch.setattr(route.endpoint, "query_budget", 0)
+
+    response = client.get(f"{API}/reminders/")
+
+    assert response.status_code == 500
+    assert response.json()["violations"] == [f"{response.json()['query_count']} queries exceed the budget of 0"]
@@ -0,0 +1,78 @@
+from datetime import datetime
+import pytest
+from backend.core.recurrence import RecurrenceRule, parse_recurrence
+
+
+def test_parse_round_trips():
+    """解析した結果を文字列に戻すと同じルールになる"""
+    text = "FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE;COUNT=10"
+    assert str(RecurrenceRule.parse(text)) == text
+    assert str(RecurrenceRule.parse("RRULE:freq=daily;until=20240105T000000Z")) == "FREQ=DAILY;UNTIL=20240105T000000"
+
+
+@pytest.mark.parametrize("text", [
+    "FREQ=HOURLY",
+    "FREQ=DAILY;INTERVAL=0",
+    "FREQ=DAILY;BYDAY=MO",
+    "FREQ=MONTHLY;BYMONTHDAY=32",
+    "FREQ=DAILY;COUNT=0",
+    "FREQ=DAILY;BYSETPOS=1",
+    "FREQ=DAILY;INTERVAL=x",
+])
+def test_parse_rejects_invalid_rules(text):
+    """不正・未対応のルールはValueError"""
+    with pytest.raises(ValueError):
+        RecurrenceRule.parse(text)
+
+
+def test_occurrences_are_bounded_by_window_and_limit():
+    """期間内の回だけを、最大limit件まで生成する"""
+    rule = RecurrenceRule.parse("FREQ=DAILY")
+    start = datetime(2024, 1, 1, 9)
+
+    window = list(rule.occurrences(start, datetime(2024, 3, 1), datetime(2024, 3, 3, 23), 10))
+    assert window == [datetime(2024, 3, d, 9) for d in (1, 2, 3)]
+    assert len(list(rule.occurrences(start, start, datetime(2030, 1, 1), 5))) == 5
+
+
+def test_count_and_until_end_the_series():
+    """COUNTは実体化されている回を含めた残り回数、UNTILは最後の回の上限"""
+    start = datetime(2024, 1, 1)
+    counted = RecurrenceRule.parse("FREQ=DAILY;COUNT=3")
+    until = RecurrenceRule.parse("FREQ=DAILY;UNTIL=20240102T000000")
+
+    assert list(counted.occurrences(start, start, datetime(2024, 2, 1), 100)) == [
+        datetime(2024, 1, 1), datetime(2024, 1, 2), datetime(2024, 1, 3)
+    ]
+    # 期間の手前まで一度に進めても残り回数を減らす
+    assert list(counted.occurrences(start, datetime(2024, 1, 3), datetime(2024, 2, 1), 100)) == [datetime(2024, 1, 3)]
+    assert list(until.occurrences(start, start, datetime(2024, 2, 1), 100)) == [datetime(2024, 1, 1), datetime(2024, 1, 2)]
+
+
+def test_weekly_by_day_and_monthly_end_of_month():
+    """曜日指定の週次と、月末に固定した月次の日付"""
+    weekly = RecurrenceRule.parse("FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE")
+    monday = datetime(2024, 1, 1)
+    assert list(weekly.occurrences(monday, monday, datetime(2024, 1, 18), 10)) == [
+        datetime(2024, 1, 1), datetime(2024, 1, 3), datetime(2024, 1, 15), datetime(2024, 1, 17)
+    ]
+
+    monthly = RecurrenceRule.parse(parse_recurrence("FREQ=MONTHLY", datetime(2024, 1, 31)))
+    assert list(monthly.occurrences(datetime(2024, 1, 31), datetime(2024, 1, 1), datetime(2024, 4, 30), 10)) == [
+        datetime(2024, 1, 31), datetime(2024, 2, 29), datetime(2024, 3, 31), datetime(2024, 4, 30)
+    ]
+
+
+def test_advance_moves_to_next_occurrence():
+    """次の回へ進めると残り回数が減り、最後の回の後はNone"""
+    rule = RecurrenceRule.parse("FREQ=DAILY;COUNT=2")
+
+    following, rest = rule.advance(datetime(2024, 1, 1))
+    assert following == datetime(2024, 1, 2)
+    assert rest.count == 1
+    assert rest.advance(following) is None
+    # afterより後の最初の回まで進める
+    assert RecurrenceRule.parse("FREQ=DAILY").advance(datetime(2024, 1, 1), after=datetime(2024, 1, 10, 12))[0] == \
+        datetime(2024, 1, 11)
+    with pytest.raises(ValueError):
+        parse_recurrence("FREQ=DAILY", None)
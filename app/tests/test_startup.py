@@ -0,0 +1,33 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from backend import main
+from backend.database import missing_schema
+from tests.conftest import API
+
+
+def test_missing_schema_lists_tables_and_columns():
+    """ensure_schemaを実行していない古いDBでは、足りないテーブル・列を返す"""
+    old = create_engine("sqlite://")
+    with old.begin() as conn:
+        conn.execute(text("CREATE TABLE tasks (id INTEGER PRIMARY KEY, title VARCHAR(200))"))
+
+    missing = missing_schema(old)
+    assert "tasks.recurrence" in missing
+    assert "task_stats" in missing
+    assert "tasks.id" not in missing
+
+
+def test_startup_without_schema_check_verifies_schema(client):
+    """スキーマの確認をしない起動でも、揃っていれば起動し、足りなければ起動しない"""
+    assert missing_schema() == []
+    with TestClient(main.create_app(check_schema=False)) as other:
+        assert other.get(f"{API}/reminders/").status_code == 200
+
+
+def test_startup_fails_on_outdated_schema(client, monkeypatch):
+    """古いDBではリクエストに500を返すのではなく、起動処理がエラーになる"""
+    monkeypatch.setattr(main, "missing_schema", lambda: ["tasks.recurrence"])
+    with pytest.raises(RuntimeError, match="tasks.recurrence.*--check-schema"):
+        with TestClient(main.create_app(check_schema=False)):
+            pass
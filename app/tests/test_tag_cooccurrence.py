@@ -0,0 +1,37 @@
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+from backend.config import settings
+from backend.database import engine
+from backend.database.models import task_tags
+from tests.conftest import API
+
+
+def _swap(task_id: int, old_tag: int, new_tag: int):
+    """イベントも版の更新も通さずに関連を付け替える（件数は変わらない）"""
+    with Session(engine) as other:
+        other.execute(delete(task_tags).filter_by(task_id=task_id, tag_id=old_tag))
+        other.execute(insert(task_tags).values(task_id=task_id, tag_id=new_tag))
+        other.commit()
+
+
+def test_swapped_link_is_detected(client, seeded, monkeypatch):
+    """件数が同じまま付け替えられた関連もチェックサムの不一致で共起行列に反映される"""
+    monkeypatch.setattr(settings, "TAG_COOCCURRENCE_CHECK_SECONDS", 0)
+    tags = seeded["tags"]
+    task = seeded["tasks"][1]  # tags[1]とtags[2]が付いている
+
+    def related():
+        response = client.get(f"{API}/tags/{tags[1]}/related")
+        assert response.status_code == 200, response.text
+        return {row["id"]: row["count"] for row in response.json()}
+
+    before = related()
+    _swap(task, tags[2], tags[0])
+    try:
+        after = related()
+        assert after.get(tags[2], 0) == before.get(tags[2], 0) - 1
+        assert after.get(tags[0], 0) == before.get(tags[0], 0) + 1
+    finally:
+        _swap(task, tags[0], tags[2])
+
+    assert related() == before
@@ -0,0 +1,43 @@
+import pytest
+from tests.conftest import API
+
+
+def test_expression_combines_tags_and_categories(client, seeded):
+    """AND・OR・NOTの結果が個別の一覧と一致する"""
+    tag, other_tag = seeded["tags"][:2]
+    category = seeded["categories"][0]
+    tagged = {task["id"] for task in client.get(f"{API}/tags/{tag}/tasks").json()}
+    other = {task["id"] for task in client.get(f"{API}/tags/{other_tag}/tasks").json()}
+    categorized = {task["id"] for task in client.get(f"{API}/categories/{category}/tasks").json()}
+
+    def query(expression):
+        response = client.post(f"{API}/tasks/query", json={"filter": expression, "limit": 1000})
+        assert response.status_code == 200, response.text
+        return {task["id"] for task in response.json()["tasks"]}
+
+    assert query({"and": [{"tag": tag}, {"not": {"category": category}}]}) == tagged - categorized
+    assert query({"or": [{"tag": tag}, {"tag": other_tag}]}) == tagged | other
+    assert query({"and": [{"tag": tag}, {"tag": other_tag}]}) == tagged & other
+
+
+@pytest.mark.parametrize("expression", [
+    {"tag": [1]},
+    {"tag": "1"},
+    {"category": "1"},
+    {"category": True},
+    {"tag": None},
+    {"and": [{"not": {"tag": 1}, "tag": 2}]},
+    {"and": []},
+    {"xor": [{"tag": 1}]},
+])
+def test_invalid_expression_is_rejected(client, expression):
+    """不正な式は500や0件ではなく400"""
+    response = client.post(f"{API}/tasks/query", json={"filter": expression})
+    assert response.status_code == 400, response.text
+
+
+def test_deep_nesting_is_rejected(client):
+    """入れ子が深すぎる式は400（再帰の上限に達して500にならない）"""
+    body = '{"filter":' + '{"or":[' * 400 + '{"tag":1}' + ']}' * 400 + '}'
+    response = client.post(f"{API}/tasks/query", content=body, headers={"content-type": "application/json"})
+    assert response.status_code == 400
@@ -0,0 +1,66 @@
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+from backend.config import settings
+from backend.database import engine, upsert_increment, DataVersion, VersionWatch
+from backend.database.models import task_tags
+from tests.conftest import API
+
+
+def _other_process(*statements):
+    """別のワーカープロセスでの書き込みを再現（このプロセスのフックを通さずに関連と版を更新）"""
+    with Session(engine) as other:
+        for statement in statements:
+            other.execute(statement)
+        other.execute(upsert_increment(DataVersion.__table__, ["version"]), [{"topic": task_tags.name, "version": 1}])
+        other.commit()
+
+
+def test_own_writes_are_not_foreign_changes(client, db, seeded, monkeypatch):
+    """このプロセスでの書き込みは版を上げるが、他のプロセスでの変更としては数えない"""
+    monkeypatch.setattr(settings, "INDEX_VERSION_CHECK_SECONDS", 0)
+    watch = VersionWatch(task_tags.name)
+    watch.sync(db)
+    before = db.get(DataVersion, task_tags.name).version
+
+    tag = seeded["tags"][0]
+    task = seeded["tasks"][1]
+    assert client.post(f"{API}/tags/{tag}/tasks/{task}").status_code < 300
+    assert client.delete(f"{API}/tags/{tag}/tasks/{task}").status_code < 300
+
+    db.expire_all()
+    assert db.get(DataVersion, task_tags.name).version == before + 2
+    assert not watch.changed(db)
+
+    _other_process()
+    assert watch.changed(db)
+
+
+def test_query_sees_links_written_by_another_process(client, seeded, monkeypatch):
+    """他のプロセスで追加・削除された関連がビットマップ・共起行列に反映される"""
+    monkeypatch.setattr(settings, "INDEX_VERSION_CHECK_SECONDS", 0)
+    tag, other_tag = seeded["tags"][0], seeded["tags"][1]
+    task = seeded["tasks"][1]  # other_tagは付いていて、tagは付いていない
+
+    def query():
+        response = client.post(f"{API}/tasks/query", json={"filter": {"tag": tag}, "limit": 1000})
+        assert response.status_code == 200, response.text
+        return {row["id"] for row in response.json()["tasks"]}
+
+    def related():
+        response = client.get(f"{API}/tags/{other_tag}/related")
+        assert response.status_code == 200, response.text
+        return {row["id"]: row["count"] for row in response.json()}
+
+    assert task not in query()
+    count = related().get(tag, 0)
+
+    link = {"task_id": task, "tag_id": tag}
+    _other_process(insert(task_tags).values(**link))
+    try:
+        assert task in query()
+        assert related()[tag] == count + 1
+    finally:
+        _other_process(delete(task_tags).filter_by(**link))
+
+    assert task not in query()
+    assert related().get(tag, 0) == count
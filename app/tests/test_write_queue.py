@@ -0,0 +1,71 @@
+import time
+from concurrent.futures import Future
+from contextvars import copy_context
+from typing import Any, Dict, Optional
+import pytest
+from backend.core.base_module import BaseModule
+from backend.core.module_manager import module_manager
+from backend.core.write_queue import WriteQueue, WriteRequest
+from backend.config import settings
+from backend.database import engine, SessionLocal, Task, VersionWatch
+
+
+class FailingWriterModule(BaseModule):
+    """タスクを作成してから失敗する書き込み（SAVEPOINTで自分の変更だけが取り消されることの確認用）"""
+
+    def __init__(self):
+        super().__init__("failing_writer")
+
+    def initialize(self) -> bool:
+        return True
+
+    def execute(self, action: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        self.db.add(Task(title=params["title"]))
+        self.db.flush()
+        raise ValueError("failed after writing")
+
+
+@pytest.fixture
+def failing_writer(client):
+    module_manager.register_module(FailingWriterModule())
+    yield
+    module_manager.unregister_module("failing_writer")
+
+
+def _request(module_name: str, action: str, params: Dict[str, Any]) -> WriteRequest:
+    return WriteRequest(module_name, action, params, copy_context(), Future(), time.perf_counter())
+
+
+def test_failed_action_rolls_back_only_its_own_changes(failing_writer, db, monkeypatch):
+    """1つのバッチで失敗したアクションの変更だけが取り消され、前後のアクションはコミットされる"""
+    monkeypatch.setattr(settings, "INDEX_VERSION_CHECK_SECONDS", 0)
+    watch = VersionWatch(Task.__tablename__)
+    watch.sync(db)
+    batch = [
+        _request("task_crud", "create", {"title": "queue-before"}),
+        _request("failing_writer", "write", {"title": "queue-failed"}),
+        _request("task_crud", "create", {"title": "queue-after"}),
+    ]
+
+    WriteQueue(engine, SessionLocal)._process(batch)
+
+    assert batch[0].future.result().title == "queue-before"
+    with pytest.raises(ValueError, match="failed after writing"):
+        batch[1].future.result()
+    assert batch[2].future.result().title == "queue-after"
+
+    titles = {title for (title,) in db.query(Task.title).filter(Task.title.like("queue-%"))}
+    assert titles == {"queue-before", "queue-after"}
+    # 取り消した書き込みの版の更新も取り消され、このプロセスの分と一致する
+    assert not watch.changed(db)
+
+
+def test_submit_runs_on_writer_thread(client):
+    """submitしたアクションは書き込みスレッドで実行され、結果がFutureで返る"""
+    queue = WriteQueue(engine, SessionLocal)
+    try:
+        task = queue.submit("task_crud", "create", {"title": "queue-submitted"}).result(timeout=10)
+        assert task.id is not None
+        assert queue.depth() == 0
+    finally:
+        queue.stop(timeout=10)